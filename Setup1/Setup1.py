@@ -7,7 +7,10 @@ from Setup1.state import (
     ImportDialogState, 
     ImportState, 
     ImportDarioState, 
-    ImportDarioDialogState
+    ImportDarioDialogState,
+    ProcesarState,
+    GridState,
+    DashboardState,
 )
 
 # Colores del tema basados en la imagen
@@ -24,6 +27,9 @@ THEME_COLORS = {
     "border": "#374151",
 }
 
+# Archivos por importación (más de uno se importa por lotes)
+MAX_UPLOAD_FILES = 50
+
 SPACING = {
     "xs": "0.25rem",
     "sm": "0.5rem",
@@ -83,6 +89,9 @@ class State(rx.State):
                 {"id": "importar_actividades_crm", "label": "Actividades CRM", "type": "page", "icon": "/excel_icon.png"},
                 {"id": "importar_actividades_dario", "label": "Actividades anotaciones Darío", "type": "page", "icon": "/excel_icon.png"},
                 {"id": "procesar_importaciones", "label": "Procesar importaciones", "type": "page", "icon": "/Procesar_icono.png"},
+                {"type": "title", "label": "Consulta"},
+                {"id": "grid_crm", "label": "Ver actividades CRM", "type": "page", "icon": "📋"},
+                {"id": "grid_dario", "label": "Ver actividades Darío", "type": "page", "icon": "📋"},
             ],
         }
         
@@ -114,6 +123,21 @@ class State(rx.State):
         self.current_page = ""
         yield ImportDarioDialogState.change(True)
 
+    def open_procesar_importaciones(self, page_title: str):
+        """Muestra el panel de "Procesar importaciones" con el resultado anterior limpio."""
+        self.navigate_to_page("procesar_importaciones", page_title)
+        yield ProcesarState.reset_feedback
+
+    def open_grid(self, page_id: str, page_title: str):
+        """Muestra la grilla de actividades ("grid_crm" o "grid_dario") en su primera página."""
+        self.navigate_to_page(page_id, page_title)
+        yield GridState.load(page_id.removeprefix("grid_"))
+
+    def open_dashboard(self, page_id: str, page_title: str):
+        """Muestra una página del Dashboard ("overview", "metrics" o "widgets") con datos actualizados."""
+        self.navigate_to_page(page_id, page_title)
+        yield DashboardState.load(page_id)
+
 
 def submenu_title(label: str) -> rx.Component:
     """Un título estilizado para secciones del submenú."""
@@ -290,7 +314,19 @@ def submenu_item(item: dict) -> rx.Component:
             rx.cond(
                 item["id"] == "importar_actividades_dario",
                 State.open_dario_import_dialog,
-                State.navigate_to_page(item["id"], item["label"]),
+                rx.cond(
+                    item["id"] == "procesar_importaciones",
+                    State.open_procesar_importaciones(item["label"]),
+                    rx.cond(
+                        item["id"].startswith("grid_"),
+                        State.open_grid(item["id"], item["label"]),
+                        rx.cond(
+                            (item["id"] == "overview") | (item["id"] == "metrics") | (item["id"] == "widgets"),
+                            State.open_dashboard(item["id"], item["label"]),
+                            State.navigate_to_page(item["id"], item["label"]),
+                        ),
+                    ),
+                ),
             )
         ),
     )
@@ -362,6 +398,265 @@ def submenu() -> rx.Component:
     )
 
 
+def procesar_panel() -> rx.Component:
+    """Acción de "Procesar importaciones": consolida las tablas de staging."""
+    return rx.vstack(
+        rx.text(
+            "Consolida las actividades importadas (CRM y Darío) en las tablas procesadas. "
+            "Solo se procesan las importaciones nuevas desde la última vez.",
+            color=THEME_COLORS["text_secondary"],
+            text_align="center",
+            max_width="480px",
+        ),
+        rx.checkbox(
+            "Reprocesar todas las importaciones",
+            checked=ProcesarState.full_rebuild,
+            on_change=ProcesarState.set_full_rebuild,
+            size="1",
+            color=THEME_COLORS["text_secondary"],
+        ),
+        rx.button(
+            rx.cond(ProcesarState.is_processing, rx.spinner(), rx.icon(tag="play")),
+            "Procesar",
+            on_click=ProcesarState.procesar,
+            disabled=ProcesarState.is_processing,
+            background_color=THEME_COLORS["accent_blue"],
+            cursor="pointer",
+        ),
+        rx.cond(
+            ProcesarState.show_result_message,
+            rx.text(ProcesarState.last_result_message, color=THEME_COLORS["text_secondary"], white_space="pre-line"),
+        ),
+        spacing="4",
+        align="center",
+        margin_top=SPACING["lg"],
+    )
+
+
+def grid_header(column: str, label: str) -> rx.Component:
+    """Encabezado de la grilla; las columnas ordenables alternan el orden al hacer clic."""
+    sortable = GridState.sortable.contains(column)
+    return rx.table.column_header_cell(
+        rx.hstack(
+            rx.text(label),
+            rx.cond(
+                GridState.sort == column,
+                rx.cond(GridState.descending, rx.icon(tag="arrow-down", size=14), rx.icon(tag="arrow-up", size=14)),
+            ),
+            spacing="1",
+            align="center",
+        ),
+        cursor=rx.cond(sortable, "pointer", "default"),
+        on_click=GridState.set_sort(column),
+        white_space="nowrap",
+    )
+
+
+def grid_filters() -> rx.Component:
+    """Filtros de la grilla: se aplican con el botón o con Enter."""
+    def field(placeholder: str, value, on_change, width: str = "8rem", type_: str = "text"):
+        return rx.input(
+            placeholder=placeholder,
+            value=value,
+            on_change=on_change,
+            type=type_,
+            width=width,
+            size="2",
+        )
+
+    return rx.form(
+        rx.hstack(
+            field("Responsable", GridState.filtro_responsable, GridState.set_filtro_responsable),
+            field("Número", GridState.filtro_numero, GridState.set_filtro_numero),
+            field("Desde", GridState.filtro_desde, GridState.set_filtro_desde, type_="date", width="10rem"),
+            field("Hasta", GridState.filtro_hasta, GridState.set_filtro_hasta, type_="date", width="10rem"),
+            field("Texto", GridState.filtro_texto, GridState.set_filtro_texto, width="14rem"),
+            rx.button(rx.icon(tag="search"), "Filtrar", type="submit", cursor="pointer"),
+            rx.button("Limpiar", variant="soft", type="button", on_click=GridState.clear_filters, cursor="pointer"),
+            spacing="2",
+            wrap="wrap",
+            align="center",
+        ),
+        on_submit=GridState.apply_filters,
+        reset_on_submit=False,
+    )
+
+
+def activity_grid() -> rx.Component:
+    """Grilla de actividades importadas: una página por vez, con filtros y orden."""
+    return rx.vstack(
+        grid_filters(),
+        rx.cond(
+            GridState.error_message != "",
+            rx.text(GridState.error_message, color="#ef4444"),
+        ),
+        rx.box(
+            rx.table.root(
+                rx.table.header(
+                    rx.table.row(
+                        rx.foreach(
+                            GridState.columns,
+                            lambda column, i: grid_header(column, GridState.headers[i]),
+                        ),
+                    ),
+                ),
+                rx.table.body(
+                    rx.foreach(
+                        GridState.rows,
+                        lambda row: rx.table.row(
+                            rx.foreach(row, lambda value: rx.table.cell(value, white_space="nowrap")),
+                        ),
+                    ),
+                ),
+                size="1",
+                variant="surface",
+                width="100%",
+            ),
+            max_height="65vh",
+            overflow="auto",
+            width="100%",
+        ),
+        rx.cond(
+            GridState.rows.length() == 0,
+            rx.text("No hay actividades para mostrar.", color=THEME_COLORS["text_secondary"]),
+        ),
+        rx.hstack(
+            rx.button(
+                rx.icon(tag="chevron-left"),
+                "Anterior",
+                on_click=GridState.prev_page,
+                disabled=~GridState.has_prev,
+                cursor="pointer",
+            ),
+            rx.button(
+                "Siguiente",
+                rx.icon(tag="chevron-right"),
+                on_click=GridState.next_page,
+                disabled=~GridState.has_next,
+                cursor="pointer",
+            ),
+            spacing="2",
+            justify="end",
+            width="100%",
+        ),
+        spacing="3",
+        width="100%",
+        max_width="1200px",
+        margin_top=SPACING["lg"],
+    )
+
+
+def summary_table(headers: list[str], rows) -> rx.Component:
+    """Tabla simple de filas ya formateadas (list[list[str]])."""
+    return rx.table.root(
+        rx.table.header(rx.table.row(*[rx.table.column_header_cell(h) for h in headers])),
+        rx.table.body(
+            rx.foreach(rows, lambda row: rx.table.row(rx.foreach(row, lambda value: rx.table.cell(value)))),
+        ),
+        size="1",
+        variant="surface",
+        width="100%",
+    )
+
+
+def dashboard_error() -> rx.Component:
+    return rx.cond(
+        DashboardState.error_message != "",
+        rx.text(DashboardState.error_message, color="#ef4444"),
+    )
+
+
+def dashboard_overview() -> rx.Component:
+    """Vista General: totales de actividades y duraciones."""
+    return rx.vstack(
+        dashboard_error(),
+        rx.grid(
+            rx.foreach(
+                DashboardState.kpis,
+                lambda kpi: rx.card(
+                    rx.vstack(
+                        rx.text(kpi["label"], font_size="0.8rem", color=THEME_COLORS["text_secondary"]),
+                        rx.text(kpi["value"], font_size="1.5rem", font_weight="700"),
+                        spacing="1",
+                    ),
+                ),
+            ),
+            columns="4",
+            spacing="3",
+            width="100%",
+        ),
+        spacing="3",
+        width="100%",
+        max_width="1000px",
+        margin_top=SPACING["lg"],
+    )
+
+
+def dashboard_metrics() -> rx.Component:
+    """Métricas: horas por responsable y período."""
+    return rx.vstack(
+        rx.form(
+            rx.hstack(
+                rx.select(
+                    ["dia", "semana", "mes"],
+                    value=DashboardState.periodo,
+                    on_change=DashboardState.set_periodo,
+                    size="2",
+                ),
+                rx.input(
+                    placeholder="Responsable",
+                    value=DashboardState.filtro_responsable,
+                    on_change=DashboardState.set_filtro_responsable,
+                    width="8rem",
+                    size="2",
+                ),
+                rx.button(rx.icon(tag="search"), "Filtrar", type="submit", cursor="pointer"),
+                spacing="2",
+                align="center",
+            ),
+            on_submit=DashboardState.apply_filters,
+            reset_on_submit=False,
+        ),
+        dashboard_error(),
+        rx.box(
+            summary_table(["Responsable", "Desde", "Actividades", "Horas"], DashboardState.horas_rows),
+            max_height="65vh",
+            overflow="auto",
+            width="100%",
+        ),
+        spacing="3",
+        width="100%",
+        max_width="800px",
+        margin_top=SPACING["lg"],
+    )
+
+
+def dashboard_widgets() -> rx.Component:
+    """Widgets: números de actividad más frecuentes y duraciones de Darío por versión."""
+    return rx.vstack(
+        dashboard_error(),
+        rx.hstack(
+            rx.vstack(
+                rx.text("Números con más actividades", font_weight="600", color=THEME_COLORS["text_secondary"]),
+                summary_table(["Número", "Actividades", "Horas"], DashboardState.numeros_rows),
+                width="100%",
+            ),
+            rx.vstack(
+                rx.text("Duración Darío por versión", font_weight="600", color=THEME_COLORS["text_secondary"]),
+                summary_table(["Versión", "Actividades", "Duración"], DashboardState.version_rows),
+                width="100%",
+            ),
+            spacing="4",
+            align="start",
+            width="100%",
+        ),
+        spacing="3",
+        width="100%",
+        max_width="1000px",
+        margin_top=SPACING["lg"],
+    )
+
+
 def work_area() -> rx.Component:
     """Área de trabajo principal."""
     margin_left = rx.cond(
@@ -382,13 +677,27 @@ def work_area() -> rx.Component:
                     line_height="1.2",
                 ),
                 rx.cond(
-                    State.current_page != "",
-                    rx.text(
-                        f"Página actual: {State.current_page}",
-                        font_size="1.125rem",
-                        color=THEME_COLORS["text_secondary"],
-                        text_align="center",
-                        margin_top=SPACING["lg"],
+                    State.current_page == "procesar_importaciones",
+                    procesar_panel(),
+                    rx.cond(
+                        State.current_page.startswith("grid_"),
+                        activity_grid(),
+                        rx.match(
+                            State.current_page,
+                            ("overview", dashboard_overview()),
+                            ("metrics", dashboard_metrics()),
+                            ("widgets", dashboard_widgets()),
+                            rx.cond(
+                                State.current_page != "",
+                                rx.text(
+                                    f"Página actual: {State.current_page}",
+                                    font_size="1.125rem",
+                                    color=THEME_COLORS["text_secondary"],
+                                    text_align="center",
+                                    margin_top=SPACING["lg"],
+                                ),
+                            ),
+                        ),
                     ),
                 ),
                 spacing="4",
@@ -403,6 +712,27 @@ def work_area() -> rx.Component:
     )
 
 
+def import_progress(state) -> rx.Component:
+    """Barra de avance de una importación en curso (estado con progress_value/progress_text)."""
+    return rx.vstack(
+        rx.hstack(rx.spinner(), rx.text("Importando..."), spacing="2"),
+        rx.progress(value=state.progress_value, max=100, width="100%"),
+        rx.text(state.progress_text, font_size="0.8rem", color=THEME_COLORS["text_secondary"]),
+        spacing="2",
+        width="100%",
+    )
+
+
+def force_reimport_checkbox(state) -> rx.Component:
+    """Opción para reimportar aunque el contenido ya esté cargado."""
+    return rx.checkbox(
+        "Reimportar aunque el archivo no haya cambiado",
+        checked=state.force_reimport,
+        on_change=state.set_force_reimport,
+        size="1",
+    )
+
+
 def index() -> rx.Component:
     """Layout principal de la aplicación."""
     def import_dialog():
@@ -429,22 +759,23 @@ def index() -> rx.Component:
                     rx.upload(
                         rx.vstack(
                             rx.icon(tag="upload"),
-                            rx.text("Selecciona o suelta un archivo .xls/.xlsx"),
+                            rx.text("Selecciona o suelta uno o más archivos .xls/.xlsx"),
                             spacing="2",
                             align="center",
                         ),
-                        multiple=False,
+                        multiple=True,
                         accept={"application/vnd.ms-excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
-                        max_files=1,
+                        max_files=MAX_UPLOAD_FILES,
                         on_drop=ImportState.import_actividades_from_upload(rx.upload_files()),
                         key=ImportState.upload_key,
                     ),
+                    force_reimport_checkbox(ImportState),
                     rx.cond(
                         ImportState.is_importing,
-                        rx.hstack(rx.spinner(), rx.text("Importando..."), spacing="2"),
+                        import_progress(ImportState),
                         rx.cond(
                             ImportState.show_result_message,
-                            rx.text(ImportState.last_result_message, color=THEME_COLORS["text_secondary"]),
+                            rx.text(ImportState.last_result_message, color=THEME_COLORS["text_secondary"], white_space="pre-line"),
                             rx.box()  # Elemento vacío cuando no hay mensaje
                         )
                     ),
@@ -488,28 +819,29 @@ def index() -> rx.Component:
                     rx.upload(
                         rx.vstack(
                             rx.icon(tag="upload"),
-                            rx.text("Selecciona o suelta un archivo .xls/.xlsx"),
+                            rx.text("Selecciona o suelta uno o más archivos .xls/.xlsx"),
                             spacing="2",
                             align="center",
                         ),
-                        multiple=False,
+                        multiple=True,
                         accept={
                             "application/vnd.ms-excel": [".xls"],
                             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": [".xlsx"],
                         },
-                        max_files=1,
+                        max_files=MAX_UPLOAD_FILES,
                         on_drop=ImportDarioState.handle_upload(rx.upload_files()),
                         key=ImportDarioState.upload_key,
                         margin_top=SPACING["md"],
                         border=f"2px dashed {THEME_COLORS['border']}",
                         padding=SPACING["lg"],
                     ),
+                    force_reimport_checkbox(ImportDarioState),
                     rx.cond(
                         ImportDarioState.is_importing,
-                        rx.hstack(rx.spinner(), rx.text("Importando..."), spacing="2"),
+                        import_progress(ImportDarioState),
                         rx.cond(
                             ImportDarioState.show_result_message,
-                            rx.text(ImportDarioState.last_result_message, color=THEME_COLORS["text_secondary"]),
+                            rx.text(ImportDarioState.last_result_message, color=THEME_COLORS["text_secondary"], white_space="pre-line"),
                         ),
                     ),
                     spacing="4",
@@ -540,4 +872,14 @@ app = rx.App(
     ]
 )
 
-app.add_page(index, route="/")
\ No newline at end of file
+app.add_page(index, route="/")
+
+
+def migrate_database():
+    """Aplica las migraciones pendientes de Setup.db una vez, al iniciar el backend."""
+    from utils.db import migrate_schema
+
+    migrate_schema()
+
+
+app.register_lifespan_task(migrate_database)
@@ -1,10 +1,62 @@
 """Estado principal de la aplicación."""
 
+import asyncio
 import reflex as rx
 import random
 from typing import Dict, List, Optional
 from pathlib import Path
-import tempfile
+
+# Intervalo de consulta del estado de un trabajo de importación (segundos).
+# Solo se envía un delta al navegador cuando el avance cambió.
+JOB_POLL_INTERVAL = 0.25
+# Cada cuántos segundos se verifica que el trabajo no haya quedado abandonado
+JOB_STALE_CHECK_INTERVAL = 5.0
+
+
+def _format_progress(progress: Optional[dict]) -> tuple[int, str]:
+    """Convierte una instantánea de `ImportProgress` en (porcentaje, texto) para el diálogo."""
+    from utils.import_progress import STAGE_LABELS
+
+    if not progress:
+        return 0, "En cola..."
+    fraction = progress.get("fraction")
+    percent = int(fraction * 100) if fraction is not None else 0
+    text = f"{STAGE_LABELS.get(progress['stage'], progress['stage'])}: {progress['rows_read']:,} filas leídas"
+    if progress.get("rows_total"):
+        text += f" de ~{progress['rows_total']:,}"
+    text += f" · {progress['rows_inserted']:,} insertadas"
+    if progress.get("rows_updated"):
+        text += f" · {progress['rows_updated']:,} actualizadas"
+    if progress.get("rows_deleted"):
+        text += f" · {progress['rows_deleted']:,} eliminadas"
+    text += f" · {progress['rows_skipped']:,} omitidas"
+    eta = progress.get("eta_seconds")
+    if eta is not None:
+        text += f" · ETA {int(eta) + 1} s"
+    return percent, text.replace(",", ".")
+
+def _upload_filename(file, default: str = "archivo.xlsx") -> str:
+    """Nombre del archivo subido (algunas versiones exponen .name en lugar de .filename)."""
+    return getattr(file, "filename", None) or getattr(file, "name", None) or default
+
+
+async def _spool_uploads(files: list) -> list:
+    """Lee los archivos subidos por bloques (en memoria si son chicos, en disco si no).
+
+    Si alguno falla, se liberan los ya leídos antes de propagar el error.
+    """
+    from utils.upload_spool import UploadSpool
+
+    spools = []
+    try:
+        for file in files:
+            spools.append(await UploadSpool.from_upload(file, _upload_filename(file)))
+    except Exception:
+        for spool in spools:
+            spool.close()
+        raise
+    return spools
+
 
 class AppState(rx.State):
     """Estado principal de la aplicación que maneja navegación y UI."""
@@ -117,59 +169,102 @@ class ImportState(rx.State):
     upload_key: int = 0
     # Flag para controlar si mostrar el mensaje
     show_result_message: bool = False
+    # Trabajo de importación en curso (IMPORT_Jobs.id)
+    job_id: int = 0
+    # Avance del trabajo en curso (0-100) y su descripción
+    progress_value: int = 0
+    progress_text: str = ""
+    # Reimportar aunque el contenido ya esté cargado (ver utils.import_registry)
+    force_reimport: bool = False
+
+    def set_force_reimport(self, value: bool):
+        self.force_reimport = bool(value)
 
     def reset_feedback(self):
         """Limpia mensajes y estados para permitir nuevas importaciones."""
         self.is_importing = False
+        self.progress_value = 0
+        self.progress_text = ""
         self.last_result_message = ""
         self.show_result_message = False
         self.upload_key += 1  # Forzar remount del upload component
 
     async def import_actividades_from_upload(self, files: list[rx.UploadFile]):
-        """Procesa el archivo subido y realiza la importación.
+        """Recibe los archivos subidos y encola su importación.
 
-        Espera uno (1) archivo .xls/.xlsx y persiste los datos en SQLite.
+        Espera uno o más archivos .xls/.xlsx; con varios se importan por lotes
+        (interpretación en paralelo, una sola transacción). La importación
+        corre en el pool de workers; `watch_job` informa el resultado.
         """
         if not files:
             self.last_result_message = "No se seleccionó ningún archivo."
             self.show_result_message = True
             return
 
-        file = files[0]
-        # Algunas versiones exponen .name en lugar de .filename
-        filename = getattr(file, "filename", None) or getattr(file, "name", None) or "archivo.xlsx"
-
-        # Guardar temporalmente el archivo en disco para pasarlo a openpyxl
-        # Reflex expone file.read() async
-
         # Solo permitir extensiones esperadas
         allowed_ext = {".xls", ".xlsx"}
-        ext = Path(filename).suffix.lower()
-        if ext not in allowed_ext:
+        if any(Path(_upload_filename(f)).suffix.lower() not in allowed_ext for f in files):
             self.last_result_message = "Formato no soportado. Selecciona .xls o .xlsx"
             self.show_result_message = True
             return
 
         self.is_importing = True
+        self.show_result_message = False
+        self.progress_value, self.progress_text = _format_progress(None)
         try:
-            data = await file.read()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-                tmp.write(data)
-                tmp_path = tmp.name
-
-            # Ejecutar importación
-            from utils.xls_import_crm import import_actividades_from_excel
-
-            inserted = import_actividades_from_excel(tmp_path)
-            self.last_result_message = f"Importación completada. Registros insertados: {inserted}."
-            self.show_result_message = True
+            from utils.import_jobs import enqueue_import
+
+            # El trabajo toma el contenido de los spools; cerrarlos después es inocuo
+            spools = await _spool_uploads(files)
+            try:
+                # Registra el trabajo (y la primera vez crea el pool): escribe en la base
+                self.job_id = await asyncio.to_thread(
+                    enqueue_import, "crm", spools[0] if len(spools) == 1 else spools, {"force": self.force_reimport}
+                )
+            finally:
+                for spool in spools:
+                    spool.close()
         except Exception as e:
             self.last_result_message = f"Error en importación: {str(e)}"
             self.show_result_message = True
-        finally:
             self.is_importing = False
             # Forzar que el componente de subida se remonte y limpie archivos previos
             self.upload_key += 1
+            return
+        return ImportState.watch_job
+
+    @rx.event(background=True)
+    async def watch_job(self):
+        """Consulta el trabajo en curso hasta que finaliza, publicando su avance y el resultado."""
+        from utils.import_jobs import FINISHED_STATES, expire_stale_job, get_job
+
+        loop = asyncio.get_running_loop()
+        last_text = ""
+        next_check = loop.time() + JOB_STALE_CHECK_INTERVAL
+        while True:
+            async with self:
+                job_id = self.job_id
+            job = await asyncio.to_thread(get_job, job_id)
+            # Un trabajo en cola que nadie toma, o con su worker muerto, se da por fallido
+            if job is not None and job["status"] not in FINISHED_STATES and loop.time() >= next_check:
+                next_check = loop.time() + JOB_STALE_CHECK_INTERVAL
+                if await asyncio.to_thread(expire_stale_job, job_id):
+                    continue
+            if job is None or job["status"] in FINISHED_STATES:
+                async with self:
+                    self.last_result_message = job["message"] if job else "El trabajo de importación no existe."
+                    self.show_result_message = True
+                    self.is_importing = False
+                    # Forzar que el componente de subida se remonte y limpie archivos previos
+                    self.upload_key += 1
+                return
+            value, text = _format_progress(job["progress"])
+            if text != last_text:
+                last_text = text
+                async with self:
+                    self.progress_value = value
+                    self.progress_text = text
+            await asyncio.sleep(JOB_POLL_INTERVAL)
 
 
 class ImportDialogState(rx.State):
@@ -212,16 +307,28 @@ class ImportDarioState(rx.State):
     show_result_message: bool = False
     upload_key: int = 0
     numero_responsable: str = ""
+    # Trabajo de importación en curso (IMPORT_Jobs.id)
+    job_id: int = 0
+    # Avance del trabajo en curso (0-100) y su descripción
+    progress_value: int = 0
+    progress_text: str = ""
+    # Reimportar aunque el contenido ya esté cargado (ver utils.import_registry)
+    force_reimport: bool = False
+
+    def set_force_reimport(self, value: bool):
+        self.force_reimport = bool(value)
 
     def reset_feedback(self):
         """Limpia el estado para una nueva importación."""
         self.is_importing = False
+        self.progress_value = 0
+        self.progress_text = ""
         self.last_result_message = ""
         self.show_result_message = False
         self.upload_key += 1
 
     async def handle_upload(self, files: list[rx.UploadFile]):
-        """Gestiona el archivo subido y lanza la importación."""
+        """Gestiona los archivos subidos y encola la importación (por lotes si son varios)."""
         if not files:
             self.last_result_message = "No se seleccionó ningún archivo."
             self.show_result_message = True
@@ -234,31 +341,69 @@ class ImportDarioState(rx.State):
             self.show_result_message = True
             return
         
-        file = files[0]
-        filename = getattr(file, "filename", "archivo.xlsx")
-        ext = Path(filename).suffix.lower()
-        if ext not in {".xls", ".xlsx"}:
-            self.last_result_message = f"Extensión no soportada: {ext}"
-            self.show_result_message = True
-            return
+        for file in files:
+            ext = Path(_upload_filename(file)).suffix.lower()
+            if ext not in {".xls", ".xlsx"}:
+                self.last_result_message = f"Extensión no soportada: {ext}"
+                self.show_result_message = True
+                return
         
         self.is_importing = True
         self.show_result_message = False
+        self.progress_value, self.progress_text = _format_progress(None)
         try:
-            data = await file.read()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-                tmp.write(data)
-                tmp_path = tmp.name
-            
-            from utils.xls_import_dario import import_actividades_dario
-            inserted = import_actividades_dario(tmp_path, num_resp)
-            self.last_result_message = f"Importación completada. Se insertaron {inserted} registros."
+            from utils.import_jobs import enqueue_import
+
+            spools = await _spool_uploads(files)
+            try:
+                self.job_id = await asyncio.to_thread(
+                    enqueue_import,
+                    "dario",
+                    spools[0] if len(spools) == 1 else spools,
+                    {"numero_responsable": num_resp, "force": self.force_reimport},
+                )
+            finally:
+                for spool in spools:
+                    spool.close()
         except Exception as e:
             self.last_result_message = f"Error en la importación: {e}"
-        finally:
             self.is_importing = False
             self.show_result_message = True
             self.upload_key += 1
+            return
+        return ImportDarioState.watch_job
+
+    @rx.event(background=True)
+    async def watch_job(self):
+        """Consulta el trabajo en curso hasta que finaliza, publicando su avance y el resultado."""
+        from utils.import_jobs import FINISHED_STATES, expire_stale_job, get_job
+
+        loop = asyncio.get_running_loop()
+        last_text = ""
+        next_check = loop.time() + JOB_STALE_CHECK_INTERVAL
+        while True:
+            async with self:
+                job_id = self.job_id
+            job = await asyncio.to_thread(get_job, job_id)
+            # Un trabajo en cola que nadie toma, o con su worker muerto, se da por fallido
+            if job is not None and job["status"] not in FINISHED_STATES and loop.time() >= next_check:
+                next_check = loop.time() + JOB_STALE_CHECK_INTERVAL
+                if await asyncio.to_thread(expire_stale_job, job_id):
+                    continue
+            if job is None or job["status"] in FINISHED_STATES:
+                async with self:
+                    self.last_result_message = job["message"] if job else "El trabajo de importación no existe."
+                    self.is_importing = False
+                    self.show_result_message = True
+                    self.upload_key += 1
+                return
+            value, text = _format_progress(job["progress"])
+            if text != last_text:
+                last_text = text
+                async with self:
+                    self.progress_value = value
+                    self.progress_text = text
+            await asyncio.sleep(JOB_POLL_INTERVAL)
 
 
 class ImportDarioDialogState(rx.State):
@@ -273,3 +418,260 @@ class ImportDarioDialogState(rx.State):
             yield ImportDarioState.reset_feedback
 
 
+
+
+class ProcesarState(rx.State):
+    """Consolida las importaciones en las tablas PROC_ (ver utils.consolidation)."""
+
+    is_processing: bool = False
+    last_result_message: str = ""
+    show_result_message: bool = False
+    # Reprocesar todas las filas de staging, no solo las cargadas desde la última corrida
+    full_rebuild: bool = False
+
+    def set_full_rebuild(self, value: bool):
+        self.full_rebuild = bool(value)
+
+    def reset_feedback(self):
+        self.is_processing = False
+        self.last_result_message = ""
+        self.show_result_message = False
+
+    async def procesar(self):
+        """Ejecuta "Procesar importaciones" fuera del loop de eventos y publica el resultado."""
+        from utils.consolidation import process_imports
+
+        self.is_processing = True
+        self.show_result_message = False
+        yield
+        try:
+            stats = await asyncio.to_thread(process_imports, self.full_rebuild)
+        except Exception as e:
+            self.last_result_message = f"Error al procesar importaciones: {e}"
+        else:
+            if stats.changed:
+                self.last_result_message = (
+                    f"Procesamiento completado en {stats.elapsed * 1000:.0f} ms.\n"
+                    f"Actividades CRM: {stats.crm_upserted} nuevas o actualizadas, {stats.crm_deleted} eliminadas"
+                    f" ({stats.crm_enriched} vinculadas de nuevo con Darío).\n"
+                    f"Actividades Darío: {stats.dario_upserted} nuevas o actualizadas, {stats.dario_deleted} eliminadas."
+                )
+            else:
+                self.last_result_message = "Sin cambios: no hay importaciones nuevas para procesar."
+        self.is_processing = False
+        self.show_result_message = True
+
+
+class GridState(rx.State):
+    """Grilla de actividades importadas, paginada por clave (ver utils.activity_grid).
+
+    Solo la página visible vive en el estado; las claves de la primera y
+    última fila (variables de backend) permiten pedir la anterior o la
+    siguiente sin OFFSET ni conteo total.
+    """
+
+    grid: str = "crm"
+    sort: str = "id"
+    descending: bool = False
+    sortable: List[str] = []
+    # Filtros tal como se escriben en la UI (se validan al aplicar)
+    filtro_responsable: str = ""
+    filtro_numero: str = ""
+    filtro_desde: str = ""
+    filtro_hasta: str = ""
+    filtro_texto: str = ""
+    columns: List[str] = []
+    headers: List[str] = []
+    rows: List[List[str]] = []
+    has_prev: bool = False
+    has_next: bool = False
+    error_message: str = ""
+
+    _first_key: Optional[tuple] = None
+    _last_key: Optional[tuple] = None
+
+    def set_filtro_responsable(self, value: str):
+        self.filtro_responsable = value
+
+    def set_filtro_numero(self, value: str):
+        self.filtro_numero = value
+
+    def set_filtro_desde(self, value: str):
+        self.filtro_desde = value
+
+    def set_filtro_hasta(self, value: str):
+        self.filtro_hasta = value
+
+    def set_filtro_texto(self, value: str):
+        self.filtro_texto = value
+
+    def _filters(self):
+        """Filtros validados; lanza ValueError con un mensaje para el usuario."""
+        from datetime import date
+
+        from utils.activity_grid import GridFilters
+
+        def integer(value: str, label: str) -> Optional[int]:
+            value = value.strip()
+            if not value:
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"'{label}' debe ser un entero.") from None
+
+        def day(value: str, label: str) -> Optional[date]:
+            value = value.strip()
+            if not value:
+                return None
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"'{label}' debe ser una fecha (AAAA-MM-DD).") from None
+
+        return GridFilters(
+            numero_responsable=integer(self.filtro_responsable, "Responsable"),
+            numero=integer(self.filtro_numero, "Número"),
+            desde=day(self.filtro_desde, "Desde"),
+            hasta=day(self.filtro_hasta, "Hasta"),
+            texto=self.filtro_texto.strip(),
+        )
+
+    async def _fetch(self, after: Optional[tuple] = None, before: Optional[tuple] = None):
+        from utils.activity_grid import fetch_page, format_cell
+
+        try:
+            filters = self._filters()
+            page = await asyncio.to_thread(
+                fetch_page, self.grid, self.sort, self.descending, filters, after, before
+            )
+        except Exception as e:
+            self.error_message = str(e)
+            return
+        self.error_message = ""
+        if not page.rows and (after is not None or before is not None):
+            # La página pedida ya no tiene filas (p. ej. tras una reimportación): se queda en la actual
+            self.has_next = self.has_next and before is not None
+            self.has_prev = self.has_prev and after is not None
+            return
+        self.rows = [[format_cell(c, v) for c, v in zip(self.columns, row)] for row in page.rows]
+        self._first_key, self._last_key = page.first_key, page.last_key
+        self.has_prev, self.has_next = page.has_prev, page.has_next
+
+    async def load(self, grid: str):
+        """Abre la grilla `grid` ("crm" o "dario") en su primera página, sin filtros."""
+        from utils.activity_grid import GRIDS
+
+        spec = GRIDS[grid]
+        self.grid = grid
+        self.sort = "id"
+        self.descending = False
+        self.sortable = list(spec.sortable)
+        self.columns = list(spec.columns)
+        self.headers = list(spec.labels)
+        self.filtro_responsable = self.filtro_numero = self.filtro_texto = ""
+        self.filtro_desde = self.filtro_hasta = ""
+        self.rows = []
+        await self._fetch()
+
+    async def set_sort(self, column: str):
+        """Ordena por `column`; sobre la misma columna alterna ascendente/descendente."""
+        if column not in self.sortable:
+            return
+        if column == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort = column
+            self.descending = False
+        await self._fetch()
+
+    async def apply_filters(self):
+        await self._fetch()
+
+    async def clear_filters(self):
+        self.filtro_responsable = self.filtro_numero = self.filtro_texto = ""
+        self.filtro_desde = self.filtro_hasta = ""
+        await self._fetch()
+
+    async def next_page(self):
+        if self.has_next:
+            await self._fetch(after=self._last_key)
+
+    async def prev_page(self):
+        if self.has_prev:
+            await self._fetch(before=self._first_key)
+
+
+class DashboardState(rx.State):
+    """Páginas del Dashboard: leen solo las tablas resumen (ver utils.rollups)."""
+
+    # Tarjetas de la vista general: etiqueta y valor ya formateado
+    kpis: List[Dict[str, str]] = []
+    # Horas por responsable del período elegido
+    periodo: str = "semana"
+    filtro_responsable: str = ""
+    horas_rows: List[List[str]] = []
+    numeros_rows: List[List[str]] = []
+    version_rows: List[List[str]] = []
+    error_message: str = ""
+
+    def set_filtro_responsable(self, value: str):
+        self.filtro_responsable = value
+
+    async def load(self, page: str):
+        """Carga los datos de la página del Dashboard `page` ("overview", "metrics" o "widgets")."""
+        loaders = {"overview": self._load_overview, "metrics": self._load_metrics, "widgets": self._load_widgets}
+        try:
+            await loaders[page]()
+        except Exception as e:
+            self.error_message = f"Error al leer el Dashboard: {e}"
+        else:
+            self.error_message = ""
+
+    async def _load_overview(self):
+        from utils.rollups import overview
+        from utils.temporal import format_duration
+
+        totals = await asyncio.to_thread(overview)
+        self.kpis = [
+            {"label": "Actividades CRM", "value": f"{totals.actividades:,}".replace(",", ".")},
+            {"label": "Horas CRM", "value": format_duration(totals.horas_seg)},
+            {"label": "Responsables", "value": str(totals.responsables)},
+            {"label": "Números de actividad", "value": f"{totals.numeros:,}".replace(",", ".")},
+            {"label": "Actividades Darío", "value": f"{totals.dario_actividades:,}".replace(",", ".")},
+            {"label": "Duración Darío", "value": format_duration(totals.dario_duracion_seg)},
+            {"label": "Versiones", "value": str(totals.versiones)},
+        ]
+
+    async def _load_metrics(self):
+        from utils.rollups import hours_by_responsable
+        from utils.temporal import format_duration
+
+        value = self.filtro_responsable.strip()
+        try:
+            responsable = int(value) if value else None
+        except ValueError:
+            raise ValueError("'Responsable' debe ser un entero.") from None
+        rows = await asyncio.to_thread(hours_by_responsable, self.periodo, responsable)
+        self.horas_rows = [
+            [str(resp), inicio.isoformat(), str(actividades), format_duration(horas)]
+            for resp, inicio, actividades, horas in rows
+        ]
+
+    async def _load_widgets(self):
+        from utils.rollups import durations_by_version, top_numeros
+        from utils.temporal import format_duration
+
+        numeros = await asyncio.to_thread(top_numeros)
+        versions = await asyncio.to_thread(durations_by_version)
+        self.numeros_rows = [[str(n), str(count), format_duration(horas)] for n, count, horas in numeros]
+        self.version_rows = [
+            [version or "(sin versión)", str(count), format_duration(duracion)] for version, count, duracion in versions
+        ]
+
+    async def set_periodo(self, value: str):
+        self.periodo = value
+        await self.load("metrics")
+
+    async def apply_filters(self):
+        await self.load("metrics")
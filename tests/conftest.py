@@ -0,0 +1,24 @@
+"""Configuración común de las pruebas: raíz del repositorio en el path y base temporal."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils import db, row_spool  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Base SQLite vacía en un directorio temporal, migrada a la última versión."""
+    monkeypatch.setattr(db, "DB_URL", f"sqlite:///{tmp_path / 'Setup.db'}")
+    monkeypatch.setattr(row_spool, "ROW_SPOOL_DIR", str(tmp_path / "rows"))
+    db.dispose_engine()
+    try:
+        yield db.get_session_factory()
+    finally:
+        db.dispose_engine()
@@ -0,0 +1,72 @@
+"""El camino columnar (NumPy) produce los mismos registros que el escalar."""
+
+import random
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from utils.columnar import digits_column, seconds_column, serial_date_column
+from utils.import_progress import ProgressReporter
+from utils.synthetic_workbooks import crm_rows
+from utils.temporal import DATE_FORMATS, TemporalColumn
+from utils.xls_import_crm import _parse_horas_seg, _parse_numero_act, _parse_rows
+
+# Valores que cubren los casos que el camino vectorizado deja al escalar
+EDGE_VALUES = [
+    None, "", "  ", True, 0, -5, 7, 10**20, -(10**20), 2**53, 2**53 + 1, 1.5, -0.25, 45000.75,
+    float("nan"), float("inf"), "2024-0001.234", "ab-12.345", "ñ-12", "12-", "-", "x" * 30 + "9" * 25, "2024-3 9",
+]
+
+
+def _mixed(rng: random.Random, count: int) -> list:
+    return [
+        rng.choice(EDGE_VALUES) if rng.random() < 0.5 else rng.choice((rng.randint(-100, 100), rng.uniform(-1e6, 3e6)))
+        for _ in range(count)
+    ]
+
+
+def _serial(value: datetime) -> float:
+    delta = value - datetime(1899, 12, 30)
+    return delta.days + delta.seconds / 86400
+
+
+def test_digits_column_matches_scalar():
+    rng = random.Random(1)
+    for _ in range(200):
+        values = _mixed(rng, rng.randint(1, 100))
+        assert digits_column(values, _parse_numero_act) == [_parse_numero_act(v) for v in values]
+
+
+def test_seconds_column_matches_scalar():
+    rng = random.Random(2)
+    for _ in range(200):
+        count = rng.randint(1, 100)
+        hours, minutes = _mixed(rng, count), _mixed(rng, count)
+        expected = [_parse_horas_seg(h, m) for h, m in zip(hours, minutes)]
+        assert seconds_column(hours, minutes, _parse_horas_seg) == expected
+
+
+@pytest.mark.parametrize("epoch", ["windows", "mac"])
+def test_serial_date_column_matches_scalar(epoch):
+    rng = random.Random(3)
+    parse = TemporalColumn(DATE_FORMATS, epoch, as_date=True)
+    values = (
+        [rng.uniform(0, 3e6) for _ in range(100)]
+        + [float(rng.randint(1, 100)) for _ in range(20)]
+        + [day + 0.99999999 for day in range(1, 80)]
+        + [None, "", "01/02/2024", datetime(2024, 5, 6, 7, 8)]
+    )
+    assert serial_date_column(values, parse) == [parse(v) for v in values]
+
+
+@pytest.mark.parametrize("serial_dates", [False, True], ids=["datetime", "serial"])
+def test_parse_rows_columnar_matches_scalar(serial_dates):
+    rows = list(crm_rows(10_000, seed=4))
+    if serial_dates:
+        rows = [(_serial(row[0]), *row[1:]) if row and isinstance(row[0], datetime) else row for row in rows]
+    scalar = list(_parse_rows(rows, "windows", ProgressReporter(), columnar=False))
+    columnar = list(_parse_rows(rows, "windows", ProgressReporter(), columnar=True))
+    assert len(scalar) == 10_000
+    assert columnar == scalar
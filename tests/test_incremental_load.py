@@ -0,0 +1,81 @@
+"""Carga incremental: altas, cambios y bajas al reimportar (diff por row_key / row_hash)."""
+
+from sqlalchemy import func, select
+
+from utils.db import ImportBaja, TMPActividadesDario, profiled_session
+from utils.import_progress import ProgressReporter
+from utils.incremental_load import LOAD_INCREMENTAL, LOAD_REPLACE, keyed_rows, load_rows, value_columns
+from utils.synthetic_workbooks import dario_rows
+from utils.xls_import_dario import DARIO_KEY_COLUMNS, _parse_rows_dario
+
+RESPONSABLE = 7
+
+
+def _records(rows: int = 200, seed: int = 8) -> list[dict]:
+    data = list(dario_rows(rows, seed))[1:]
+    return list(_parse_rows_dario(data, RESPONSABLE, "windows", ProgressReporter()))
+
+
+def _load(records, mode=LOAD_INCREMENTAL, numero_responsable=RESPONSABLE):
+    model = TMPActividadesDario
+    rows = keyed_rows(records, DARIO_KEY_COLUMNS, value_columns(model))
+    with profiled_session() as session:
+        stats = load_rows(session, model, rows, mode=mode, scope=(numero_responsable,), batch_size=50)
+        session.commit()
+    return stats
+
+
+def _count(session_factory, model=TMPActividadesDario) -> int:
+    session = session_factory()
+    try:
+        return session.scalar(select(func.count()).select_from(model))
+    finally:
+        session.close()
+
+
+def test_reimport_counts(temp_db):
+    records = _records()
+    first = _load(records)
+    assert (first.inserted, first.updated, first.deleted, first.unchanged) == (len(records), 0, 0, 0)
+
+    # El mismo archivo otra vez no cambia nada
+    again = _load(records)
+    assert (again.inserted, again.updated, again.deleted, again.unchanged) == (0, 0, 0, len(records))
+
+    # 3 filas editadas, 2 quitadas y 4 nuevas
+    changed = [dict(r) for r in records]
+    for r in changed[10:13]:
+        r["sintesis"] = "Editada"
+    del changed[50:52]
+    changed += [{**r, "numero": r["numero"] + 1_000_000} for r in records[:4]]
+    stats = _load(changed)
+    assert (stats.inserted, stats.updated, stats.deleted) == (4, 3, 2)
+    assert stats.unchanged == len(records) - 5
+    assert _count(temp_db) == len(changed)
+    # Las bajas quedan anotadas para "Procesar importaciones"
+    assert _count(temp_db, ImportBaja) == 2
+
+
+def test_duplicate_keys_keep_file_order(temp_db):
+    records = _records(50)
+    duplicated = records + [dict(records[0], sintesis="Repetida")]
+    assert _load(duplicated).inserted == len(duplicated)
+    # Quitar la repetición es una baja, no un cambio de la primera aparición
+    stats = _load(records)
+    assert (stats.inserted, stats.updated, stats.deleted) == (0, 0, 1)
+
+
+def test_scope_keeps_other_responsables(temp_db):
+    _load(_records(30))
+    other = [dict(r, numero_responsable=8) for r in _records(20, seed=9)]
+    stats = _load(other, numero_responsable=8)
+    assert (stats.inserted, stats.deleted) == (len(other), 0)
+    assert _count(temp_db) == len(_records(30)) + len(other)
+
+
+def test_replace_mode_counts(temp_db):
+    records = _records(40)
+    _load(records)
+    stats = _load(records[:25], mode=LOAD_REPLACE)
+    assert stats.inserted == 25
+    assert _count(temp_db) == 25
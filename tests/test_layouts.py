@@ -0,0 +1,104 @@
+"""Extractores generados por `LayoutSpec` sobre los encabezados de CRM y Darío."""
+
+from datetime import date, datetime
+
+import pytest
+
+from utils.header_index import norm_text
+from utils.import_progress import ProgressReporter
+from utils.layouts import SKIP, STOP
+from utils.synthetic_workbooks import (
+    CRM_BLANK_EVERY,
+    CRM_HEADERS as CRM_SHEET_HEADERS,
+    CRM_PAGE_ROWS,
+    DARIO_EMPTY_EVERY,
+    DARIO_HEADERS,
+    crm_rows,
+    dario_rows,
+)
+from utils.temporal import DATE_FORMATS, TemporalColumn
+from utils.xls_import_crm import CRM_COLUMNS, CRM_HEADERS, CRM_LAYOUT, _parse_rows
+from utils.xls_import_dario import DARIO_LAYOUT, _parse_rows_dario
+
+
+def test_crm_headers_resolve_layout_positions():
+    head = list(crm_rows(0))
+    headers, row = CRM_HEADERS.find(head)
+    assert row == 4
+    assert CRM_HEADERS.resolve(headers) == {"fecha": 1, "numero": 2, "asunto": 4}
+    # Horas y minutos del layout están en J y L del export
+    assert CRM_SHEET_HEADERS[CRM_LAYOUT.columns["horas"] - 1] == "Hs"
+    assert CRM_SHEET_HEADERS[CRM_LAYOUT.columns["minutos"] - 1] == "Min"
+
+
+def test_crm_extractor_rules():
+    parse_fecha = TemporalColumn(DATE_FORMATS, "windows", as_date=True)
+    extract = CRM_LAYOUT.compile(
+        {"fecha": 1, "numero": 2, "asunto": 4},
+        {
+            "numero_responsable": 195,
+            "parse_fecha": parse_fecha,
+            "parse_fecha_column": None,
+            "not_a_date": lambda value: value is not None and parse_fecha(value) is None,
+        },
+    )
+    assert "def extract(row):" in extract.source
+    row = (datetime(2024, 3, 1, 9), "2024-000.123", "Acme", "Soporte", None, None, None, None, None, 2, None, 30)
+    assert extract(row) == (195, date(2024, 3, 1), 123, "Soporte", 2 * 3600 + 30 * 60)
+    # Encabezado repetido por página (A vacía) y separador vacío
+    assert extract((None, *CRM_SHEET_HEADERS[1:])) is SKIP
+    assert extract(()) is SKIP
+    # Fila de totales: A deja de ser una fecha
+    assert extract(("Total",)) is STOP
+
+
+def test_crm_layout_missing_binding():
+    with pytest.raises(ValueError, match="falta el valor enlazado"):
+        CRM_LAYOUT.compile({"fecha": 1, "numero": 2, "asunto": 4}, {"numero_responsable": 1})
+
+
+@pytest.mark.parametrize("columnar", [False, True], ids=["scalar", "columnar"])
+def test_crm_parse_synthetic_export(columnar):
+    if columnar:
+        pytest.importorskip("numpy")
+    rows = 500
+    reporter = ProgressReporter()
+    records = list(_parse_rows(crm_rows(rows, seed=5, responsable=321), "windows", reporter, columnar=columnar))
+    # Se descartan encabezados repetidos y separadores; la fila de totales corta la lectura
+    assert len(records) == rows
+    assert reporter.progress.rows_skipped == (rows - 1) // CRM_PAGE_ROWS + (rows - 1) // CRM_BLANK_EVERY
+    first = dict(zip(CRM_COLUMNS, records[0]))
+    assert first["numero_responsable"] == 321
+    assert first["fecha"] == date(2024, 1, 1)
+    assert first["asunto"].endswith(" 0")
+    assert all(r[3] != "Fuera del informe" for r in records)
+
+
+def test_dario_layout_matches_headers():
+    headers = {name: norm_text(DARIO_HEADERS[column - 1]) for name, column in DARIO_LAYOUT.columns.items()}
+    assert headers == {
+        "size": "size",
+        "numero": "numero",
+        "nombre": "nombre",
+        "comienzo": "comienzo",
+        "fin": "fin",
+        "sintesis": "sintesis",
+        "observaciones": "observaciones",
+        "vcx_s": "vcx-s",
+        "req_sincro": "req. sincro",
+        "version": "version",
+    }
+    assert DARIO_LAYOUT.width == len(DARIO_HEADERS)
+
+
+def test_dario_parse_synthetic_sheet():
+    rows = 300
+    data = list(dario_rows(rows, seed=6))[1:]
+    records = list(_parse_rows_dario(data, 7, "windows", ProgressReporter()))
+    # Las filas sin Size/Número/Nombre se descartan
+    assert len(records) == rows - (rows - 1) // DARIO_EMPTY_EVERY
+    first = records[0]
+    assert first["numero_responsable"] == 7
+    assert first["nombre"] == "Tarea 0"
+    assert isinstance(first["comienzo"], datetime)
+    assert first["duracion_seg"] == (first["fin"] - first["comienzo"]).total_seconds()
@@ -0,0 +1,215 @@
+"""Consulta paginada de las tablas de staging para la grilla de actividades.
+
+La paginación es por clave (keyset / seek): cada página se pide "después" o
+"antes" de la clave (valor de orden, id) de la última o primera fila de la
+página actual, con `ORDER BY columna, id LIMIT n` sobre columnas indexadas.
+Así cada página cuesta lo mismo sin importar cuántas filas haya antes, y no
+se cuenta el total (sería recorrer la tabla completa).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import select, tuple_
+
+from .db import TMPActividades, TMPActividadesDario, get_session_factory
+from .temporal import format_duration
+
+
+# Filas por página de la grilla
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    """Tabla consultable: columnas visibles, columnas de orden (indexadas) y de filtro."""
+
+    model: Any
+    columns: tuple[str, ...]
+    labels: tuple[str, ...]
+    # Solo columnas con índice propio: ORDER BY columna, id lo recorre sin ordenar
+    sortable: tuple[str, ...]
+    date_column: str
+    number_column: str
+    text_column: str
+
+
+GRIDS: dict[str, GridSpec] = {
+    "crm": GridSpec(
+        model=TMPActividades,
+        columns=("id", "numero_responsable", "fecha", "numero_act", "asunto", "horas_seg"),
+        labels=("Id", "Responsable", "Fecha", "Número", "Asunto", "Horas"),
+        sortable=("id", "fecha", "numero_act"),
+        date_column="fecha",
+        number_column="numero_act",
+        text_column="asunto",
+    ),
+    "dario": GridSpec(
+        model=TMPActividadesDario,
+        columns=("id", "numero_responsable", "numero", "size", "nombre", "comienzo", "fin", "duracion_seg", "version"),
+        labels=("Id", "Responsable", "Número", "Size", "Nombre", "Comienzo", "Fin", "Duración", "Versión"),
+        sortable=("id", "comienzo", "numero"),
+        date_column="comienzo",
+        number_column="numero",
+        text_column="nombre",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class GridFilters:
+    """Filtros de la grilla (None / "" = sin filtro). `desde` y `hasta` son inclusivos."""
+
+    numero_responsable: Optional[int] = None
+    numero: Optional[int] = None
+    desde: Optional[date] = None
+    hasta: Optional[date] = None
+    texto: str = ""
+
+
+@dataclass
+class GridPage:
+    """Una página de la grilla: filas (valores crudos) y claves para pedir la anterior/siguiente."""
+
+    rows: list[tuple] = field(default_factory=list)
+    first_key: Optional[tuple] = None
+    last_key: Optional[tuple] = None
+    has_prev: bool = False
+    has_next: bool = False
+
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _filter_conditions(spec: GridSpec, filters: GridFilters) -> list:
+    table = spec.model.__table__
+    conditions = []
+    if filters.numero_responsable is not None:
+        conditions.append(table.c.numero_responsable == filters.numero_responsable)
+    if filters.numero is not None:
+        conditions.append(table.c[spec.number_column] == filters.numero)
+    column = table.c[spec.date_column]
+    # Para columnas DateTime el rango cubre los días completos
+    is_datetime = spec.date_column == "comienzo"
+    if filters.desde is not None:
+        start = datetime.combine(filters.desde, datetime.min.time()) if is_datetime else filters.desde
+        conditions.append(column >= start)
+    if filters.hasta is not None:
+        if is_datetime:
+            conditions.append(column < datetime.combine(filters.hasta + timedelta(days=1), datetime.min.time()))
+        else:
+            conditions.append(column <= filters.hasta)
+    if filters.texto:
+        conditions.append(table.c[spec.text_column].like(_like_pattern(filters.texto), escape="\\"))
+    return conditions
+
+
+def _segments(column, id_column, key: Optional[tuple], ascending: bool) -> list[tuple[list, list]]:
+    """Consultas (condiciones, orden) que recorren las filas posteriores a `key`.
+
+    SQLite ordena los NULL primero en orden ascendente, así que el recorrido
+    se parte en dos tramos: filas con `column` NULL (por id) y el resto (por
+    `column`, id). Cada tramo se pide con una comparación de tuplas, que el
+    índice de la columna resuelve como búsqueda por rango en lugar de
+    recorrer desde el principio.
+    """
+    if column is id_column:
+        order = [id_column.asc()] if ascending else [id_column.desc()]
+        condition = [] if key is None else [id_column > key[1] if ascending else id_column < key[1]]
+        return [(condition, order)]
+
+    nulls_order = [id_column.asc()] if ascending else [id_column.desc()]
+    values_order = [column.asc(), id_column.asc()] if ascending else [column.desc(), id_column.desc()]
+    nulls = [column.is_(None)]
+    values = [column.is_not(None)]
+    if key is None:
+        segments = [(nulls, nulls_order), (values, values_order)]
+    elif key[0] is None:
+        after = id_column > key[1] if ascending else id_column < key[1]
+        segments = [(nulls + [after], nulls_order)]
+        if ascending:
+            segments.append((values, values_order))
+    else:
+        seek = tuple_(column, id_column) > tuple_(*key) if ascending else tuple_(column, id_column) < tuple_(*key)
+        segments = [(values + [seek], values_order)]
+        if not ascending:
+            segments.append((nulls, nulls_order))
+    return segments if ascending or key is not None else segments[::-1]
+
+
+def fetch_page(
+    grid: str,
+    sort: str = "id",
+    descending: bool = False,
+    filters: Optional[GridFilters] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> GridPage:
+    """Devuelve la página siguiente a `after`, la anterior a `before`, o la primera.
+
+    `after`/`before` son claves (valor de `sort`, id) tomadas de
+    `GridPage.last_key`/`first_key`. Se leen a lo sumo `page_size + 1` filas.
+    """
+    try:
+        spec = GRIDS[grid]
+    except KeyError:
+        raise ValueError(f"Grilla desconocida: {grid}") from None
+    if sort not in spec.sortable:
+        raise ValueError(f"No se puede ordenar por '{sort}' (columnas: {', '.join(spec.sortable)}).")
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    table = spec.model.__table__
+    # Hacia atrás se recorre en el orden inverso y luego se invierten las filas
+    backward = before is not None
+    key = before if backward else after
+    ascending = descending == backward
+    filter_conditions = _filter_conditions(spec, filters or GridFilters())
+    columns = [table.c[name] for name in spec.columns]
+
+    rows: list[tuple] = []
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        for conditions, order in _segments(table.c[sort], table.c.id, key, ascending):
+            limit = page_size + 1 - len(rows)
+            if limit <= 0:
+                break
+            stmt = select(*columns).where(*filter_conditions, *conditions).order_by(*order).limit(limit)
+            rows.extend(tuple(row) for row in session.execute(stmt))
+    finally:
+        session.close()
+
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+    page = GridPage(rows=rows)
+    if rows:
+        sort_index = spec.columns.index(sort)
+        page.first_key = (rows[0][sort_index], rows[0][0])
+        page.last_key = (rows[-1][sort_index], rows[-1][0])
+    if backward:
+        page.has_prev, page.has_next = more, True
+    else:
+        page.has_prev, page.has_next = key is not None, more
+    return page
+
+
+def format_cell(column: str, value) -> str:
+    """Texto de una celda para mostrar en la grilla."""
+    if value is None:
+        return ""
+    if column.endswith("_seg"):
+        return format_duration(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
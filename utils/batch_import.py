@@ -0,0 +1,203 @@
+"""Importación por lotes: varios archivos interpretados en paralelo y cargados en una transacción."""
+
+from __future__ import annotations
+
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+from .db import DEFAULT_BATCH_SIZE, IMPORT_SQLITE_PROFILE, TMPActividades, TMPActividadesDario, profiled_session
+from .import_progress import STAGE_CACHED, STAGE_COMMIT, STAGE_DONE, STAGE_ROWS, ProgressCallback, ProgressReporter
+from .import_metrics import import_history, new_metrics
+from .incremental_load import LOAD_INCREMENTAL, LOAD_REPLACE, check_mode, keyed_rows, load_rows, value_columns
+from .import_registry import combined_sha256, lookup as lookup_import, record as record_import, source_sha256
+from .row_spool import RowSpool
+
+
+# Contenido de un archivo: ruta en disco o bytes ya leídos (ambos se pueden enviar a otro proceso)
+BatchSource = Union[str, bytes]
+
+
+@dataclass
+class FileResult:
+    """Resultado de un archivo dentro de un lote."""
+
+    filename: str
+    rows: int = 0
+    error: Optional[str] = None
+    parse_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BatchImportError(RuntimeError):
+    """Un archivo del lote no se pudo interpretar: el lote no se cargó (la base no cambió)."""
+
+    def __init__(self, results: Sequence[FileResult]):
+        self.results = list(results)
+        failed = "; ".join(f"{r.filename}: {r.error}" for r in self.results if r.error is not None)
+        super().__init__(f"No se importó el lote (la base no se modificó). Archivos con error: {failed}")
+
+
+def _parse_file(kind: str, source: BatchSource, filename: str, numero_responsable: Optional[int]):
+    """Interpreta un archivo en un proceso worker. Devuelve (archivo de filas, filas, error, segundos).
+
+    Los registros se vuelcan por lotes a un `RowSpool` en vez de devolverse:
+    el proceso principal recibe solo la ruta y los lee cuando le toca cargar
+    ese archivo (y lo elimina). Con error no queda archivo (ruta None).
+    """
+    started = time.perf_counter()
+    src = io.BytesIO(source) if isinstance(source, bytes) else source
+    spool = RowSpool()
+    try:
+        if kind == "crm":
+            from .xls_import_crm import parse_actividades
+
+            records = parse_actividades(src, filename)
+        elif kind == "dario":
+            from .xls_import_dario import parse_actividades_dario
+
+            records = parse_actividades_dario(src, int(numero_responsable), filename)
+        else:
+            raise RuntimeError(f"Tipo de importación desconocido: {kind}")
+        spool.extend(records, DEFAULT_BATCH_SIZE)
+        return spool.detach(), spool.rows, None, time.perf_counter() - started
+    except Exception as e:
+        spool.close()
+        return None, 0, str(e), time.perf_counter() - started
+
+
+def import_batch(
+    kind: str,
+    files: Sequence[tuple[BatchSource, str]],
+    numero_responsable: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    progress: Optional[ProgressCallback] = None,
+    force: bool = False,
+    mode: str = LOAD_INCREMENTAL,
+) -> Optional[list[FileResult]]:
+    """Importa varios archivos del mismo tipo ('crm' | 'dario') en una única transacción.
+
+    `files` es una secuencia de (origen, nombre). Los archivos se interpretan
+    en paralelo en `max_workers` procesos (por defecto, uno por CPU), que
+    vuelcan sus registros a archivos temporales (`row_spool`); estos se cargan
+    en el orden recibido, de a un lote por vez. `mode` se aplica al lote
+    completo como en una importación individual: incremental por responsable
+    (por defecto) o vaciando la tabla una sola vez al comienzo.
+
+    Si algún archivo no se puede interpretar no se carga ninguno y se lanza
+    `BatchImportError` con el resultado de cada archivo: sus filas quedarían
+    fuera del lote y la carga borraría las que ya tenía cargadas (mismo
+    responsable en el alcance, o la tabla completa en modo reemplazo).
+
+    Si el mismo lote (mismos contenidos en el mismo orden) ya es la carga
+    vigente según `import_registry`, no se reimporta y se devuelve None
+    (`progress` recibe `STAGE_CACHED` con los registros de aquella carga);
+    `force=True` reimporta igual.
+    """
+    check_mode(mode)
+    if kind == "crm":
+        from .xls_import_crm import CRM_COLUMNS, CRM_KEY_COLUMNS
+
+        model, key_columns, scope = TMPActividades, CRM_KEY_COLUMNS, None
+    elif kind == "dario":
+        if numero_responsable is None:
+            raise ValueError("La importación de Darío requiere 'numero_responsable'.")
+        from .xls_import_dario import DARIO_KEY_COLUMNS
+
+        model, key_columns, scope = TMPActividadesDario, DARIO_KEY_COLUMNS, (int(numero_responsable),)
+    else:
+        raise RuntimeError(f"Tipo de importación desconocido: {kind}")
+
+    reporter = ProgressReporter(progress, rows_total=len(files), metrics=new_metrics())
+    with import_history(kind, ", ".join(name for _, name in files), reporter):
+        digest = combined_sha256(source_sha256(source) for source, _ in files)
+        params = {"batch": len(files), "mode": mode}
+        if kind == "dario":
+            params["numero_responsable"] = int(numero_responsable)
+        if not force:
+            cached = lookup_import(kind, digest, params)
+            if cached is not None:
+                reporter.inserted(cached)
+                reporter.stage(STAGE_CACHED)
+                return None
+
+        results = [FileResult(filename=name) for _, name in files]
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(files)))
+        futures = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_parse_file, kind, source, name, numero_responsable) for source, name in files
+                ]
+
+                def collect(result: FileResult, future) -> Optional[str]:
+                    path, count, error, seconds = future.result()
+                    result.parse_seconds = seconds
+                    result.error = error
+                    result.rows = count
+                    return path
+
+                def failed() -> BatchImportError:
+                    for result, future in zip(results, futures):
+                        collect(result, future)
+                    return BatchImportError(results)
+
+                # El reemplazo confirma el vaciado de la tabla antes de insertar: hay
+                # que saber antes de empezar que todos los archivos se interpretaron
+                if mode == LOAD_REPLACE:
+                    wait(futures)
+                    if any(future.result()[2] is not None for future in futures):
+                        raise failed()
+
+                def records():
+                    # Registros de todos los archivos, en el orden recibido, a medida que están listos
+                    for result, future in zip(results, futures):
+                        path = collect(result, future)
+                        if result.error is not None:
+                            # Sale de la transacción sin commit: se descarta lo ya escrito
+                            raise failed()
+                        with RowSpool.open(path) as spool:
+                            parsed = iter(spool)
+                            if kind == "crm":
+                                parsed = (dict(zip(CRM_COLUMNS, record)) for record in parsed)
+                            yield from parsed
+                        # En lotes, el avance se mide en archivos procesados
+                        reporter.progress.rows_read += 1
+                        reporter.notify()
+
+                rows = keyed_rows(records(), key_columns, value_columns(model))
+                with profiled_session(profile) as session:
+                    reporter.stage(STAGE_ROWS)
+                    stats = load_rows(
+                        session, model, rows, mode=mode, scope=scope, batch_size=batch_size, on_flush=reporter.inserted
+                    )
+                    reporter.synced(stats.inserted, stats.updated, stats.deleted, stats.write_seconds, stats.write_cpu)
+                    record_import(session, kind, digest, params, stats.rows)
+                    reporter.stage(STAGE_COMMIT)
+                    session.commit()
+        finally:
+            # Al salir del pool todos los workers terminaron: se eliminan los
+            # archivos que no se llegaron a leer (lote con error o carga fallida)
+            for future in futures:
+                if not future.cancelled() and future.exception() is None and future.result()[0] is not None:
+                    RowSpool.open(future.result()[0]).close()
+        reporter.stage(STAGE_DONE)
+        return results
+
+
+def summarize(results: Sequence[FileResult]) -> str:
+    """Texto con el resumen por archivo para mostrar al usuario."""
+    total = sum(r.rows for r in results)
+    ok = sum(1 for r in results if r.ok)
+    lines = [f"Importación por lotes: {total} registros de {ok}/{len(results)} archivos."]
+    for r in results:
+        lines.append(f"- {r.filename}: {r.rows} registros" if r.ok else f"- {r.filename}: error ({r.error})")
+    return "\n".join(lines)
@@ -0,0 +1,173 @@
+"""Benchmark de los importadores CRM y Darío sobre workbooks sintéticos.
+
+Para cada tipo (crm, dario), formato (.xlsx, .xls) y cantidad de filas
+genera un workbook con `synthetic_workbooks` (se reutiliza si ya existe en
+`--workdir`) y lo importa en un proceso nuevo, sobre una base vacía, con la
+función pública del importador. Informa filas/s, tiempo de CPU, pico de
+memoria (RSS máximo del proceso) y el tiempo de cada etapa según el avance
+informado por el importador (hash = lectura del archivo para el registro de
+importaciones, antes de abrirlo).
+
+Con `--json` los resultados se guardan para compararlos después con
+`--baseline`: si algún caso baja más de `--tolerance` en filas/s el comando
+termina con código 1.
+
+Uso:
+    python -m utils.bench_import --rows 1000 --rows 100000 --format xlsx
+    python -m utils.bench_import --rows 50000 --json base.json
+    python -m utils.bench_import --rows 50000 --baseline base.json --tolerance 0.15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Optional
+
+from .synthetic_workbooks import KINDS, XLS_MAX_ROWS, write_workbook, xlwt
+
+
+FORMATS = ("xlsx", "xls")
+# Etapas en el orden en que se informan (ver import_progress)
+STAGES = ("hash", "open", "headers", "rows", "commit")
+RESPONSABLE = 195
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KiB; macOS, bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(kind: str, path: str, workdir: str, columnar: bool) -> dict:
+    """Importa `path` en este proceso (uno nuevo por caso) y devuelve las mediciones."""
+    os.environ["IMPORT_COLUMNAR"] = "1" if columnar else "0"
+    os.chdir(workdir)
+    from .db import get_session_factory
+    from .xls_import_crm import import_actividades_from_excel
+    from .xls_import_dario import import_actividades_dario
+
+    get_session_factory()  # Esquema creado fuera de la medición
+    marks = [("hash", time.perf_counter())]
+
+    def progress(snapshot) -> None:
+        if snapshot.stage != marks[-1][0]:
+            marks.append((snapshot.stage, time.perf_counter()))
+
+    cpu = time.process_time()
+    started = marks[0][1]
+    if kind == "crm":
+        rows = import_actividades_from_excel(path, progress=progress, force=True)
+    else:
+        rows = import_actividades_dario(path, RESPONSABLE, progress=progress, force=True)
+    finished = time.perf_counter()
+    cpu = time.process_time() - cpu
+
+    stages = {}
+    for (stage, at), (_, until) in zip(marks, marks[1:] + [("end", finished)]):
+        stages[stage] = stages.get(stage, 0.0) + until - at
+    seconds = finished - started
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else 0.0,
+        "cpu_seconds": cpu,
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": {stage: stages[stage] for stage in STAGES if stage in stages},
+    }
+
+
+def bench_case(kind: str, fmt: str, rows: int, workdir: Path, columnar: bool = True, seed: int = 0) -> dict:
+    """Genera (o reutiliza) el workbook del caso y lo importa en un proceso nuevo sobre una base vacía."""
+    source = workdir / f"{kind}_{rows}_{seed}.{fmt}"
+    if not source.exists():
+        write_workbook(kind, source, rows, seed=seed, responsable=RESPONSABLE)
+    with tempfile.TemporaryDirectory(dir=workdir) as dbdir:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(_run_case, kind, str(source.resolve()), dbdir, columnar).result()
+    return {"case": f"{kind}.{fmt}/{rows}", "kind": kind, "format": fmt, "columnar": columnar, **result}
+
+
+def _skip_reason(fmt: str, rows: int) -> Optional[str]:
+    if fmt == "xls" and xlwt is None:
+        return "sin xlwt"
+    # Encabezados repetidos y separadores del export CRM ocupan ~3% más de filas
+    if fmt == "xls" and rows + rows // 30 + 10 > XLS_MAX_ROWS:
+        return f"más de {XLS_MAX_ROWS} filas"
+    return None
+
+
+def _print_result(r: dict) -> None:
+    stages = " ".join(f"{name}={r['stages'].get(name, 0.0):.2f}" for name in STAGES)
+    rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+    print(
+        f"{r['case']:<22}{r['rows']:>9}{r['seconds']:>9.2f}{r['rows_per_sec']:>11.0f}"
+        f"{r['cpu_seconds']:>9.2f}{rss:>9}  {stages}"
+    )
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Casos cuyo rendimiento (filas/s) bajó más de `tolerance` respecto de `baseline`."""
+    previous = {(r["case"], r["columnar"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = previous.get((r["case"], r["columnar"]))
+        if base and r["rows_per_sec"] < base["rows_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{r['case']}: {r['rows_per_sec']:.0f} filas/s (antes {base['rows_per_sec']:.0f}, "
+                f"{r['rows_per_sec'] / base['rows_per_sec'] - 1:+.0%})"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, action="append", help="Filas de datos por caso (repetible; por defecto 1000)")
+    parser.add_argument("--kind", action="append", choices=KINDS, help="Por defecto, ambos")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="Por defecto, ambos")
+    parser.add_argument("--no-columnar", action="store_true", help="Importar con la conversión fila a fila")
+    parser.add_argument("--workdir", type=Path, help="Carpeta de los workbooks generados (se reutilizan)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Guardar los resultados en este archivo")
+    parser.add_argument("--baseline", type=Path, help="Resultados anteriores (--json) para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Caída de filas/s admitida (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.gettempdir()) / "bench_import"
+    workdir.mkdir(parents=True, exist_ok=True)
+    print(f"{'caso':<22}{'filas':>9}{'seg':>9}{'filas/s':>11}{'cpu':>9}{'RSS MB':>9}  etapas (s)")
+    results = []
+    for rows in args.rows or [1000]:
+        for kind in args.kind or KINDS:
+            for fmt in args.format or FORMATS:
+                reason = _skip_reason(fmt, rows)
+                if reason:
+                    print(f"{kind}.{fmt}/{rows:<14} omitido ({reason})")
+                    continue
+                result = bench_case(kind, fmt, rows, workdir, columnar=not args.no_columnar, seed=args.seed)
+                _print_result(result)
+                results.append(result)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
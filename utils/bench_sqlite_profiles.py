@@ -0,0 +1,88 @@
+"""Benchmark de los perfiles SQLite definidos en `utils.db.SQLITE_PROFILES`.
+
+Para cada perfil (y para la configuración por defecto de SQLite, como
+referencia) crea una base temporal, carga filas sintéticas en
+TMP_Actividades con `BulkInserter` (un commit por lote, como una importación)
+y mide filas/s, latencia media de commit y el tiempo de una agregación.
+
+Uso:
+    python -m utils.bench_sqlite_profiles --rows 200000 --batch-size 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from .db import SQLITE_PROFILES, Base, BulkInserter, TMPActividades, create_sqlite_engine
+
+
+# Referencia: conexión sin PRAGMA (journal rollback, synchronous=FULL)
+BASELINE = "sqlite-defaults"
+
+
+def _rows(n: int):
+    base = date(2024, 1, 1)
+    for i in range(n):
+        yield (195, base + timedelta(days=i % 365), 100000 + i, f"Asunto {i}", (i % 9 * 60 + i % 60) * 60)
+
+
+def bench_profile(profile: str, rows: int, batch_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_engine(url) if profile == BASELINE else create_sqlite_engine(url, profile)
+        Base.metadata.create_all(engine)
+        commits: list[float] = []
+        started = time.perf_counter()
+        with Session(engine) as session:
+            bulk = BulkInserter(
+                session,
+                TMPActividades,
+                columns=("numero_responsable", "fecha", "numero_act", "asunto", "horas_seg"),
+                batch_size=batch_size,
+            )
+            for i, row in enumerate(_rows(rows), start=1):
+                bulk.add(row)
+                if i % batch_size == 0:
+                    t0 = time.perf_counter()
+                    session.commit()
+                    commits.append(time.perf_counter() - t0)
+            bulk.flush()
+            session.commit()
+        load_time = time.perf_counter() - started
+
+        with engine.connect() as conn:
+            t0 = time.perf_counter()
+            conn.execute(select(TMPActividades.fecha, func.count()).group_by(TMPActividades.fecha)).fetchall()
+            query_time = time.perf_counter() - t0
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "rows_per_sec": rows / load_time if load_time else 0.0,
+        "commit_ms": 1000 * sum(commits) / len(commits) if commits else 0.0,
+        "query_ms": 1000 * query_time,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--profile", action="append", choices=sorted(SQLITE_PROFILES), help="Por defecto, todos")
+    args = parser.parse_args(argv)
+
+    print(f"{'perfil':<14}{'filas/s':>12}{'commit ms':>12}{'query ms':>12}")
+    for profile in args.profile or [BASELINE, *SQLITE_PROFILES]:
+        r = bench_profile(profile, args.rows, args.batch_size)
+        print(f"{r['profile']:<14}{r['rows_per_sec']:>12.0f}{r['commit_ms']:>12.2f}{r['query_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Conversión columnar opcional con NumPy para campos numéricos y de fecha.
+
+Cada conversor recibe una columna completa (lista de valores crudos de un
+bloque de filas) y devuelve la lista convertida, idéntica a aplicar el
+conversor escalar fila a fila. Los valores que el camino vectorizado no
+cubre exactamente (textos no ASCII, números fuera de rango, tipos no
+numéricos) se marcan en una máscara y se convierten con el conversor
+escalar, sin lanzar excepciones por fila.
+
+Sin NumPy instalado (o con IMPORT_COLUMNAR=0) los importadores usan solo el
+camino escalar.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date
+from typing import Callable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Dependencia opcional
+    np = None
+
+from .temporal import EPOCH_WINDOWS, TemporalColumn, _EPOCH_ORDINALS
+
+
+HAVE_NUMPY = np is not None
+# Etapa columnar activada por defecto cuando NumPy está disponible
+COLUMNAR_ENABLED = HAVE_NUMPY and os.environ.get("IMPORT_COLUMNAR", "1") != "0"
+# Filas por bloque convertido
+CHUNK_ROWS = 4096
+
+# Enteros con representación exacta en float64
+_EXACT_INT = 2**53
+# Horas/minutos mayores no se vectorizan (evita desbordes de int64)
+_MAX_TIME_PART = 2**31
+# Dígitos que caben en int64 sin desborde
+_MAX_DIGITS = 18
+_MS_PER_DAY = 24 * 60 * 60 * 1000
+_MAX_ORDINAL = date.max.toordinal()
+_UNIX_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _numeric(values: Sequence, limit: float):
+    """(array float64, máscara) de los int/float con |v| < `limit`; el resto queda fuera de la máscara."""
+    out = np.fromiter(
+        (
+            v
+            if (v.__class__ is float or v.__class__ is int) and -limit < v < limit
+            else np.nan
+            for v in values
+        ),
+        dtype=np.float64,
+        count=len(values),
+    )
+    return out, ~np.isnan(out)
+
+
+def _fallback(result: list, values_rows, mask, scalar: Callable) -> list:
+    """Completa con el conversor escalar las posiciones fuera de `mask`."""
+    for i in np.flatnonzero(~mask).tolist():
+        result[i] = scalar(*values_rows(i))
+    return result
+
+
+def hours_minutes_seconds(hours: Sequence, minutes: Sequence):
+    """(segundos totales int64, máscara) para las filas con horas y minutos vacíos o numéricos.
+
+    Equivale a `int(v or 0)` sobre cada parte: None y NaN/inf cuentan como 0
+    y los float se truncan hacia cero.
+    """
+    parts = []
+    handled = np.ones(len(hours), dtype=bool)
+    for column in (hours, minutes):
+        values, numeric = _numeric(column, _MAX_TIME_PART)
+        nonfinite = np.fromiter(
+            (v is None or (v.__class__ is float and (v != v or v in (np.inf, -np.inf))) for v in column),
+            dtype=bool,
+            count=len(column),
+        )
+        handled &= numeric | nonfinite
+        parts.append(np.where(numeric, np.trunc(values), 0).astype(np.int64))
+    return (parts[0] * 60 + parts[1]) * 60, handled
+
+
+def seconds_column(hours: Sequence, minutes: Sequence, scalar: Callable) -> list:
+    """Duración en segundos a partir de las columnas de horas y minutos (`scalar` = `_parse_horas_seg`)."""
+    seconds, handled = hours_minutes_seconds(hours, minutes)
+    result = seconds.tolist()
+    return _fallback(result, lambda i: (hours[i], minutes[i]), handled, scalar)
+
+
+def digits_column(values: Sequence, scalar: Callable) -> list:
+    """Dígitos a la derecha del último '-' como entero (`scalar` = `_parse_numero_act`).
+
+    Los textos ASCII se procesan como una matriz de bytes: máscara de
+    dígitos posteriores al último guion y suma posicional en int64. Los
+    enteros valen su valor absoluto (los dígitos de `str(v)`). Sin dígitos
+    el resultado es None.
+    """
+    n = len(values)
+    result: list = [None] * n
+    handled = np.zeros(n, dtype=bool)
+    text_rows = []
+    texts = []
+    for i, v in enumerate(values):
+        if v is None:
+            handled[i] = True
+        elif v.__class__ is int:
+            result[i] = -v if v < 0 else v
+            handled[i] = True
+        elif v.__class__ is str and v.isascii():
+            text_rows.append(i)
+            texts.append(v)
+    if texts:
+        raw = np.array(texts, dtype=np.bytes_)
+        width = raw.dtype.itemsize
+        if width:
+            matrix = raw.view(np.uint8).reshape(len(texts), width)
+            dash = matrix == ord("-")
+            last_dash = np.where(dash.any(axis=1), width - 1 - np.argmax(dash[:, ::-1], axis=1), -1)
+            keep = (matrix >= ord("0")) & (matrix <= ord("9"))
+            keep &= np.arange(width)[None, :] > last_dash[:, None]
+            count = keep.sum(axis=1)
+            # Exponente de cada dígito: dígitos conservados a su derecha
+            exponent = np.cumsum(keep[:, ::-1], axis=1)[:, ::-1] - 1
+            fits = count <= _MAX_DIGITS
+            powers = np.where(keep & fits[:, None], 10 ** np.clip(exponent, 0, _MAX_DIGITS), 0)
+            numbers = (powers * (matrix.astype(np.int64) - ord("0"))).sum(axis=1)
+            for row, digits, ok, number in zip(text_rows, count.tolist(), fits.tolist(), numbers.tolist()):
+                if ok:
+                    result[row] = number if digits else None
+                    handled[row] = True
+        else:
+            handled[text_rows] = True
+    return _fallback(result, lambda i: (values[i],), handled, scalar)
+
+
+def serial_date_column(values: Sequence, parse: TemporalColumn) -> list:
+    """Columna de fechas (`parse.as_date`): seriales numéricos vectorizados, el resto con `parse`.
+
+    Los seriales se convierten con la tabla de ordinales de `temporal`
+    (respetando el sistema 1900/1904 de `parse.epoch`) a datetime64[D].
+    """
+    if not parse.as_date:
+        raise ValueError("serial_date_column convierte solo columnas de fechas (as_date=True).")
+    serials, numeric = _numeric(values, _EXACT_INT)
+    result: list = [None] * len(values)
+    day = np.floor(serials)
+    fraction = serials - day
+    # Redondeo a milisegundos como `serial_to_datetime`: puede pasar al día siguiente
+    rollover = np.round(fraction * _MS_PER_DAY) >= _MS_PER_DAY
+    ordinal = _EPOCH_ORDINALS[parse.epoch] + day + rollover
+    if parse.epoch == EPOCH_WINDOWS:
+        ordinal += day < 60
+    # Seriales < 1 no son fechas; fuera del rango de `date` se delega al escalar
+    is_date = numeric & (serials >= 1)
+    in_range = (ordinal >= 1) & (ordinal <= _MAX_ORDINAL)
+    valid = is_date & in_range
+    handled = (numeric & (serials < 1)) | valid
+    if valid.any():
+        days = (ordinal[valid] - _UNIX_ORDINAL).astype(np.int64).astype("datetime64[D]").astype(object)
+        for i, value in zip(np.flatnonzero(valid).tolist(), days.tolist()):
+            result[i] = value
+    return _fallback(result, lambda i: (values[i],), handled, parse)
+
@@ -0,0 +1,219 @@
+"""Procesar importaciones: consolida las tablas de staging en tablas PROC_ indexadas.
+
+Todo el trabajo se hace con sentencias SQL por conjuntos (INSERT…SELECT con
+upsert, DELETE/UPDATE con subconsultas), sin recorrer filas en Python. Cada
+fila de staging lleva el número de la carga que la escribió (`row_seq`, ver
+`incremental_load.new_load_seq`) y PROC_Watermarks guarda la última carga
+consolidada de cada tabla, de modo que cada corrida solo procesa lo nuevo:
+
+1. Se borran los hechos de las filas de staging borradas por cargas
+   posteriores a la marca: cada carga las anota en IMPORT_Bajas con su
+   número, y las bajas ya consolidadas se descartan al final.
+2. Se insertan o actualizan (por `source_id`) las filas con `row_seq` mayor
+   a la marca.
+3. Las actividades CRM se enriquecen con la actividad de Darío del mismo
+   responsable y número; si cambió una actividad de Darío se vuelven a
+   enriquecer las actividades CRM de su mismo número.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import text
+
+from .db import get_engine, get_session_factory
+
+
+logger = logging.getLogger(__name__)
+
+CRM_SOURCE = "TMP_Actividades"
+DARIO_SOURCE = "TMP_Actividades_Dario"
+
+# Marca inicial: procesa también las filas cargadas antes de existir row_seq (row_seq = 0)
+_NO_WATERMARK = -1
+
+_SELECT_WATERMARK = text("SELECT last_seq FROM PROC_Watermarks WHERE source = :source")
+# Última carga confirmada de la tabla: sus filas y sus bajas ya son visibles
+_SELECT_HIGH = text("SELECT COALESCE(MAX(id), 0) FROM IMPORT_Cargas WHERE tabla = :source")
+_UPSERT_WATERMARK = text(
+    """
+    INSERT INTO PROC_Watermarks (source, last_seq, processed_at) VALUES (:source, :last_seq, :processed_at)
+    ON CONFLICT (source) DO UPDATE SET last_seq = excluded.last_seq, processed_at = excluded.processed_at
+    """
+)
+
+# Claves (responsable, número) de Darío afectadas en esta corrida: filas
+# nuevas o modificadas (clave nueva y anterior) y filas eliminadas
+_CREATE_DARIO_KEYS = text(
+    "CREATE TEMP TABLE IF NOT EXISTS proc_claves_dario (numero_responsable INTEGER, numero INTEGER)"
+)
+_CLEAR_DARIO_KEYS = text("DELETE FROM temp.proc_claves_dario")
+_COLLECT_DARIO_KEYS = text(
+    """
+    INSERT INTO temp.proc_claves_dario (numero_responsable, numero)
+    SELECT s.numero_responsable, s.numero FROM TMP_Actividades_Dario s WHERE s.row_seq > :last
+    UNION
+    SELECT f.numero_responsable, f.numero FROM PROC_Actividades_Dario f
+    WHERE f.source_id IN (SELECT s.id FROM TMP_Actividades_Dario s WHERE s.row_seq > :last)
+       OR f.source_id IN (
+           SELECT b.source_id FROM IMPORT_Bajas b WHERE b.tabla = 'TMP_Actividades_Dario' AND b.row_seq > :last
+       )
+    """
+)
+
+# Hechos de las filas de staging borradas después de la marca
+_DELETE_DARIO = text(
+    """
+    DELETE FROM PROC_Actividades_Dario
+    WHERE source_id IN (
+        SELECT b.source_id FROM IMPORT_Bajas b WHERE b.tabla = 'TMP_Actividades_Dario' AND b.row_seq > :last
+    )
+    """
+)
+_UPSERT_DARIO = text(
+    """
+    INSERT INTO PROC_Actividades_Dario (
+        source_id, numero_responsable, numero, size, nombre, fecha, comienzo, fin,
+        sintesis, observaciones, vcx_s, req_sincro, version, duracion_seg
+    )
+    SELECT s.id, s.numero_responsable, s.numero, s.size, s.nombre, date(s.comienzo), s.comienzo, s.fin,
+           s.sintesis, s.observaciones, s.vcx_s, s.req_sincro, s.version, s.duracion_seg
+    FROM TMP_Actividades_Dario s
+    WHERE s.row_seq > :last
+    ON CONFLICT (source_id) DO UPDATE SET
+        numero_responsable = excluded.numero_responsable, numero = excluded.numero, size = excluded.size,
+        nombre = excluded.nombre, fecha = excluded.fecha, comienzo = excluded.comienzo, fin = excluded.fin,
+        sintesis = excluded.sintesis, observaciones = excluded.observaciones, vcx_s = excluded.vcx_s,
+        req_sincro = excluded.req_sincro, version = excluded.version, duracion_seg = excluded.duracion_seg
+    """
+)
+
+_DELETE_CRM = text(
+    """
+    DELETE FROM PROC_Actividades
+    WHERE source_id IN (
+        SELECT b.source_id FROM IMPORT_Bajas b WHERE b.tabla = 'TMP_Actividades' AND b.row_seq > :last
+    )
+    """
+)
+# Actividad de Darío que enriquece a una CRM: la de menor id con el mismo responsable y número
+_UPSERT_CRM = text(
+    """
+    INSERT INTO PROC_Actividades (
+        source_id, numero_responsable, fecha, numero_act, asunto, horas_seg, dario_id, nombre, size, version
+    )
+    SELECT s.id, s.numero_responsable, s.fecha, s.numero_act, s.asunto, s.horas_seg, d.id, d.nombre, d.size, d.version
+    FROM TMP_Actividades s
+    LEFT JOIN PROC_Actividades_Dario d ON d.id = (
+        SELECT MIN(x.id) FROM PROC_Actividades_Dario x
+        WHERE x.numero_responsable = s.numero_responsable AND x.numero = s.numero_act
+    )
+    WHERE s.row_seq > :last
+    ON CONFLICT (source_id) DO UPDATE SET
+        numero_responsable = excluded.numero_responsable, fecha = excluded.fecha,
+        numero_act = excluded.numero_act, asunto = excluded.asunto, horas_seg = excluded.horas_seg,
+        dario_id = excluded.dario_id, nombre = excluded.nombre, size = excluded.size, version = excluded.version
+    """
+)
+_ENRICH_CRM = text(
+    """
+    UPDATE PROC_Actividades SET (dario_id, nombre, size, version) = (
+        SELECT d.id, d.nombre, d.size, d.version FROM PROC_Actividades_Dario d
+        WHERE d.id = (
+            SELECT MIN(x.id) FROM PROC_Actividades_Dario x
+            WHERE x.numero_responsable = PROC_Actividades.numero_responsable
+              AND x.numero = PROC_Actividades.numero_act
+        )
+    )
+    WHERE (numero_responsable, numero_act) IN (SELECT numero_responsable, numero FROM temp.proc_claves_dario)
+    """
+)
+# Reproceso completo: también los hechos sin fila de staging que no pasaron por IMPORT_Bajas
+_DELETE_ORPHANS = {
+    DARIO_SOURCE: text(
+        """
+        DELETE FROM PROC_Actividades_Dario
+        WHERE NOT EXISTS (SELECT 1 FROM TMP_Actividades_Dario s WHERE s.id = PROC_Actividades_Dario.source_id)
+        """
+    ),
+    CRM_SOURCE: text(
+        """
+        DELETE FROM PROC_Actividades
+        WHERE NOT EXISTS (SELECT 1 FROM TMP_Actividades s WHERE s.id = PROC_Actividades.source_id)
+        """
+    ),
+}
+_PRUNE_DELETIONS = text("DELETE FROM IMPORT_Bajas WHERE tabla = :source AND row_seq <= :last_seq")
+
+
+@dataclass
+class ProcessStats:
+    """Resultado de una corrida de "Procesar importaciones"."""
+
+    crm_upserted: int = 0
+    crm_deleted: int = 0
+    dario_upserted: int = 0
+    dario_deleted: int = 0
+    crm_enriched: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return any((self.crm_upserted, self.crm_deleted, self.dario_upserted, self.dario_deleted, self.crm_enriched))
+
+
+def _watermark(conn, source: str, full: bool) -> int:
+    if full:
+        return _NO_WATERMARK
+    last = conn.execute(_SELECT_WATERMARK, {"source": source}).scalar()
+    return _NO_WATERMARK if last is None else last
+
+
+def process_imports(full: bool = False) -> ProcessStats:
+    """Consolida TMP_Actividades y TMP_Actividades_Dario en las tablas PROC_.
+
+    Con `full=True` se ignoran las marcas, se reprocesan todas las filas de
+    staging y se comparan las tablas completas para borrar los hechos
+    huérfanos. Corre en una sola transacción `BEGIN IMMEDIATE`: las cargas que
+    lleguen mientras tanto esperan y quedan para la próxima corrida.
+    """
+    get_session_factory()  # Esquema creado
+    started = time.perf_counter()
+    stats = ProcessStats()
+    with get_engine().connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            last_dario = _watermark(conn, DARIO_SOURCE, full)
+            last_crm = _watermark(conn, CRM_SOURCE, full)
+
+            conn.execute(_CREATE_DARIO_KEYS)
+            conn.execute(_CLEAR_DARIO_KEYS)
+            conn.execute(_COLLECT_DARIO_KEYS, {"last": last_dario})
+            stats.dario_deleted = conn.execute(_DELETE_DARIO, {"last": last_dario}).rowcount
+            if full:
+                stats.dario_deleted += conn.execute(_DELETE_ORPHANS[DARIO_SOURCE]).rowcount
+            stats.dario_upserted = conn.execute(_UPSERT_DARIO, {"last": last_dario}).rowcount
+
+            stats.crm_deleted = conn.execute(_DELETE_CRM, {"last": last_crm}).rowcount
+            if full:
+                stats.crm_deleted += conn.execute(_DELETE_ORPHANS[CRM_SOURCE]).rowcount
+            stats.crm_upserted = conn.execute(_UPSERT_CRM, {"last": last_crm}).rowcount
+            stats.crm_enriched = conn.execute(_ENRICH_CRM).rowcount
+            conn.execute(_CLEAR_DARIO_KEYS)
+
+            now = datetime.now()
+            for source in (DARIO_SOURCE, CRM_SOURCE):
+                high = conn.execute(_SELECT_HIGH, {"source": source}).scalar()
+                conn.execute(_UPSERT_WATERMARK, {"source": source, "last_seq": high, "processed_at": now})
+                conn.execute(_PRUNE_DELETIONS, {"source": source, "last_seq": high})
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    stats.elapsed = time.perf_counter() - started
+    logger.info("Procesar importaciones: %s", stats)
+    return stats
@@ -1,31 +1,84 @@
+import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import date
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Mapping, Optional, Sequence, Union
 
-from sqlalchemy import Column, Date, Integer, String, create_engine, text, DateTime, Text
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import Column, Date, Float, Index, Integer, String, UniqueConstraint, create_engine, event, DateTime, Text, insert
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 
+logger = logging.getLogger(__name__)
+
 DB_FILENAME = "Setup.db"
 DB_URL = f"sqlite:///{DB_FILENAME}"
 
+# Filas por sentencia executemany en las cargas masivas
+DEFAULT_BATCH_SIZE = 5000
+
+# Perfiles de conexión SQLite (PRAGMA -> valor). "interactive" se aplica a
+# toda conexión nueva; "bulk-import" se activa solo mientras dura una carga.
+SQLITE_PROFILES: dict[str, dict[str, Union[str, int]]] = {
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # KiB (negativo) -> ~16 MB
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+    "bulk-import": {
+        "journal_mode": "WAL",
+        # No OFF: la base es compartida y un corte de luz o caída del sistema
+        # podría corromperla. En WAL, NORMAL ya evita el fsync de cada commit.
+        "synchronous": "NORMAL",
+        "cache_size": -131072,  # ~128 MB
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+DEFAULT_SQLITE_PROFILE = "interactive"
+IMPORT_SQLITE_PROFILE = "bulk-import"
+
 
 Base = declarative_base()
 
 
 class TMPActividades(Base):
     __tablename__ = "TMP_Actividades"
+    __table_args__ = (
+        Index("ix_tmp_actividades_row_seq", "row_seq"),
+        Index("ix_tmp_actividades_resp_numero", "numero_responsable", "numero_act"),
+        Index("ix_tmp_actividades_numero_act", "numero_act"),
+        Index("ix_tmp_actividades_fecha", "fecha"),
+        Index("ux_tmp_actividades_row_key", "numero_responsable", "row_key", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     numero_responsable = Column(Integer, nullable=False)
     fecha = Column(Date, nullable=True)
     numero_act = Column(Integer, nullable=True)
     asunto = Column(String(512), nullable=True)
-    horas = Column(String(16), nullable=True)  # Formato HH:MM:SS
+    horas_seg = Column(Integer, nullable=True)  # Duración en segundos (texto HH:MM:SS en la vista V_Actividades)
+    # Carga incremental: clave natural + ordinal y hash de los valores (ver incremental_load)
+    row_key = Column(Text, nullable=True)
+    row_hash = Column(String(32), nullable=True)
+    # Carga (IMPORT_Cargas.id) que insertó o modificó la fila por última vez (ver consolidation)
+    row_seq = Column(Integer, nullable=False, server_default="0")
 
 
 class TMPActividadesDario(Base):
     __tablename__ = "TMP_Actividades_Dario"
+    __table_args__ = (
+        Index("ix_tmp_actividades_dario_row_seq", "row_seq"),
+        Index("ix_tmp_actividades_dario_resp_numero", "numero_responsable", "numero"),
+        Index("ix_tmp_actividades_dario_numero", "numero"),
+        Index("ix_tmp_actividades_dario_comienzo", "comienzo"),
+        Index("ux_tmp_actividades_dario_row_key", "numero_responsable", "row_key", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     size = Column(String(2), nullable=True)
@@ -39,34 +92,414 @@ class TMPActividadesDario(Base):
     req_sincro = Column(Text, nullable=True)
     version = Column(Text, nullable=True)
     numero_responsable = Column(Integer, nullable=False)
+    duracion_seg = Column(Integer, nullable=True)  # fin - comienzo, en segundos
+    # Carga incremental: clave natural + ordinal y hash de los valores (ver incremental_load)
+    row_key = Column(Text, nullable=True)
+    row_hash = Column(String(32), nullable=True)
+    # Carga (IMPORT_Cargas.id) que insertó o modificó la fila por última vez (ver consolidation)
+    row_seq = Column(Integer, nullable=False, server_default="0")
 
 
-def get_engine():
-    os.makedirs(os.getcwd(), exist_ok=True)
-    engine = create_engine(DB_URL, future=True)
+class ImportJob(Base):
+    __tablename__ = "IMPORT_Jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(16), nullable=False)  # 'crm' | 'dario'
+    file_path = Column(Text, nullable=False)
+    params = Column(Text, nullable=True)  # JSON con argumentos del importador
+    status = Column(String(16), nullable=False, default="queued")  # queued|running|done|failed
+    message = Column(Text, nullable=True)
+    inserted = Column(Integer, nullable=True)
+    worker_pid = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class ImportRegistro(Base):
+    __tablename__ = "IMPORT_Registro"
+    __table_args__ = (UniqueConstraint("sha256", "kind", "params_key", name="uq_import_registro"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sha256 = Column(String(64), nullable=False)  # Hash del contenido importado
+    kind = Column(String(16), nullable=False)  # 'crm' | 'dario'
+    params_key = Column(Text, nullable=False)  # JSON canónico de parámetros (p. ej. numero_responsable)
+    rows = Column(Integer, nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # Estado de la tabla destino tras la carga
+    imported_at = Column(DateTime, nullable=False)
+
+
+# Una fila por importación, con sus mediciones por etapa (ver import_metrics)
+class ImportHistorial(Base):
+    __tablename__ = "IMPORT_Historial"
+    __table_args__ = (Index("ix_import_historial_started_at", "started_at"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(16), nullable=False)  # 'crm' | 'dario'
+    filename = Column(String(512), nullable=True)
+    status = Column(String(16), nullable=False)  # ok | cached | error
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=False)
+    rows_read = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    rows_updated = Column(Integer, nullable=False, default=0)
+    rows_deleted = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    wall_seconds = Column(Float, nullable=False)
+    cpu_seconds = Column(Float, nullable=False)
+    peak_kb = Column(Integer, nullable=True)  # Solo con IMPORT_METRICS_MEMORY=1
+    stages = Column(Text, nullable=False)  # JSON: [{stage, wall, cpu, rows, peak_kb}, ...]
+    error = Column(Text, nullable=True)
+
+
+class ImportCarga(Base):
+    __tablename__ = "IMPORT_Cargas"
+    # AUTOINCREMENT: los ids nunca se reutilizan, aunque se vacíe la tabla
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tabla = Column(String(64), nullable=False)  # Tabla de staging cargada
+    created_at = Column(DateTime, nullable=False)
+
+
+# Filas de staging borradas por cada carga, para que "Procesar importaciones"
+# borre sus hechos sin comparar las tablas completas (ver consolidation)
+class ImportBaja(Base):
+    __tablename__ = "IMPORT_Bajas"
+    __table_args__ = (Index("ix_import_bajas_tabla_seq", "tabla", "row_seq"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tabla = Column(String(64), nullable=False)  # Tabla de staging
+    source_id = Column(Integer, nullable=False)  # Id de la fila borrada
+    row_seq = Column(Integer, nullable=False)  # Carga (IMPORT_Cargas.id) que la borró
+
+
+# Tablas consolidadas por "Procesar importaciones" (ver consolidation)
+class PROCActividadesDario(Base):
+    __tablename__ = "PROC_Actividades_Dario"
+    __table_args__ = (Index("ix_proc_actividades_dario_resp_numero", "numero_responsable", "numero"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_id = Column(Integer, nullable=False, unique=True)  # TMP_Actividades_Dario.id
+    numero_responsable = Column(Integer, nullable=False)
+    numero = Column(Integer, nullable=True)
+    size = Column(String(2), nullable=True)
+    nombre = Column(Text, nullable=True)
+    fecha = Column(Date, nullable=True)  # Día de comienzo
+    comienzo = Column(DateTime, nullable=True)
+    fin = Column(DateTime, nullable=True)
+    sintesis = Column(Text, nullable=True)
+    observaciones = Column(Text, nullable=True)
+    vcx_s = Column(Text, nullable=True)
+    req_sincro = Column(Text, nullable=True)
+    version = Column(Text, nullable=True)
+    duracion_seg = Column(Integer, nullable=True)
+
+
+class PROCActividades(Base):
+    __tablename__ = "PROC_Actividades"
+    __table_args__ = (
+        Index("ix_proc_actividades_resp_numero", "numero_responsable", "numero_act"),
+        Index("ix_proc_actividades_resp_fecha", "numero_responsable", "fecha"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_id = Column(Integer, nullable=False, unique=True)  # TMP_Actividades.id
+    numero_responsable = Column(Integer, nullable=False)
+    fecha = Column(Date, nullable=True)
+    numero_act = Column(Integer, nullable=True)
+    asunto = Column(String(512), nullable=True)
+    horas_seg = Column(Integer, nullable=True)
+    # Actividad de Darío con el mismo responsable y número (la primera cargada), si existe
+    dario_id = Column(Integer, nullable=True)  # PROC_Actividades_Dario.id
+    nombre = Column(Text, nullable=True)
+    size = Column(String(2), nullable=True)
+    version = Column(Text, nullable=True)
+
+
+class PROCWatermark(Base):
+    __tablename__ = "PROC_Watermarks"
+
+    source = Column(String(64), primary_key=True)  # Tabla de staging
+    last_seq = Column(Integer, nullable=False)  # Última carga (row_seq) consolidada
+    processed_at = Column(DateTime, nullable=False)
+
+
+# Tablas resumen del Dashboard, mantenidas en la misma transacción de cada carga (ver rollups)
+class SUMHorasResponsable(Base):
+    __tablename__ = "SUM_Horas_Responsable"
+
+    periodo = Column(String(8), primary_key=True)  # "dia", "semana" (desde el lunes) o "mes"
+    numero_responsable = Column(Integer, primary_key=True)
+    inicio = Column(Date, primary_key=True)  # Primer día del período
+    actividades = Column(Integer, nullable=False)
+    horas_seg = Column(Integer, nullable=False)
+
+
+class SUMActividadesNumero(Base):
+    __tablename__ = "SUM_Actividades_Numero"
+
+    numero_act = Column(Integer, primary_key=True)
+    actividades = Column(Integer, nullable=False)
+    horas_seg = Column(Integer, nullable=False)
+
+
+class SUMDarioVersion(Base):
+    __tablename__ = "SUM_Dario_Version"
+
+    version = Column(Text, primary_key=True)  # "" = sin versión
+    actividades = Column(Integer, nullable=False)
+    duracion_seg = Column(Integer, nullable=False)
+
+
+def apply_sqlite_profile(dbapi_connection, profile: str = DEFAULT_SQLITE_PROFILE) -> None:
+    """Aplica los PRAGMA de un perfil sobre una conexión DBAPI de sqlite3.
+
+    Debe llamarse fuera de una transacción: SQLite no permite cambiar
+    `synchronous` ni `journal_mode` con una transacción abierta.
+    """
+    try:
+        pragmas = SQLITE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Perfil SQLite desconocido: {profile}") from None
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(url: str = DB_URL, profile: str = DEFAULT_SQLITE_PROFILE):
+    """Crea un engine SQLite que aplica `profile` a cada conexión nueva."""
+    # timeout: espera por el lock de SQLite si otro proceso está escribiendo
+    engine = create_engine(url, future=True, connect_args={"timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_profile(dbapi_connection, profile)
+
     return engine
 
 
+# Migraciones de Alembic (ver utils/migrations y alembic.ini)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+_engine_lock = threading.RLock()
+_engine = None
+_engine_pid: Optional[int] = None
+_session_factory = None
+
+
+def get_engine():
+    """Devuelve el engine del proceso, creándolo la primera vez.
+
+    El engine (y su pool de conexiones) se comparte entre todas las
+    importaciones del proceso. Si el proceso fue bifurcado (workers), el hijo
+    crea su propio engine en lugar de reutilizar conexiones del padre.
+    """
+    global _engine, _engine_pid, _session_factory
+    pid = os.getpid()
+    if _engine is not None and _engine_pid == pid:
+        return _engine
+    with _engine_lock:
+        if _engine is None or _engine_pid != pid:
+            if _engine is not None:
+                # Conexiones heredadas del proceso padre: no cerrarlas desde aquí
+                _engine.dispose(close=False)
+            os.makedirs(os.getcwd(), exist_ok=True)
+            _engine = create_sqlite_engine(DB_URL)
+            _engine_pid = pid
+            _session_factory = None
+        return _engine
+
+
+def _alembic_config(connection=None):
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    config.set_main_option("sqlalchemy.url", DB_URL)
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def migrate_schema(engine=None) -> None:
+    """Aplica las migraciones pendientes (equivale a `alembic upgrade head`).
+
+    Se llama una vez al arrancar la aplicación. Corre dentro de una
+    transacción `BEGIN IMMEDIATE`, de modo que si varios procesos arrancan a
+    la vez solo uno migra y el resto espera y encuentra el esquema al día.
+    """
+    from alembic import command
+
+    engine = engine if engine is not None else get_engine()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            command.upgrade(_alembic_config(conn), "head")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def schema_is_current(engine=None) -> bool:
+    """True si la base ya está en la última migración (una sola consulta)."""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    engine = engine if engine is not None else get_engine()
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision() == head
+
+
 def get_session_factory():
-    engine = get_engine()
-    # Asegurar esquema de tabla temporal si existe con tipos antiguos
-    try:
-        with engine.connect() as conn:
-            rows = conn.execute(text("PRAGMA table_info('TMP_Actividades')")).fetchall()
-            if rows:
-                numero_act_info = None
-                for row in rows:
-                    # PRAGMA table_info: (cid, name, type, notnull, dflt_value, pk)
-                    if row[1] == "numero_act":
-                        numero_act_info = row
-                        break
-                if numero_act_info is not None and str(numero_act_info[2]).upper() != "INTEGER":
-                    conn.execute(text("DROP TABLE IF EXISTS TMP_Actividades"))
-                    conn.commit()
-    except Exception:
-        # En caso de error, continuar y dejar que create_all maneje lo posible
-        pass
-    Base.metadata.create_all(engine)
-    return sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    """Devuelve el sessionmaker del proceso.
+
+    La primera vez se verifica que el esquema esté en la última migración;
+    si no lo está (p. ej. un script que no pasó por el arranque de la
+    aplicación) se migra en ese momento.
+    """
+    global _session_factory
+    factory = _session_factory
+    if factory is not None and _engine_pid == os.getpid():
+        return factory
+    with _engine_lock:
+        engine = get_engine()
+        if _session_factory is None:
+            if not schema_is_current(engine):
+                migrate_schema(engine)
+            _session_factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+        return _session_factory
+
+
+@contextmanager
+def profiled_session(profile: str = DEFAULT_SQLITE_PROFILE) -> Iterator[Session]:
+    """Sesión fijada a una única conexión del pool con el perfil SQLite indicado.
+
+    Todas las transacciones de la sesión usan la misma conexión, de modo que
+    el perfil se mantiene entre commits. Al salir se restaura el perfil por
+    defecto antes de devolver la conexión al pool.
+    """
+    factory = get_session_factory()
+    with get_engine().connect() as conn:
+        raw = conn.connection.driver_connection
+        if profile != DEFAULT_SQLITE_PROFILE:
+            apply_sqlite_profile(raw, profile)
+        session = factory(bind=conn)
+        try:
+            yield session
+        finally:
+            session.close()
+            if profile != DEFAULT_SQLITE_PROFILE:
+                apply_sqlite_profile(raw, DEFAULT_SQLITE_PROFILE)
+
+
+def begin_immediate(session: Session) -> None:
+    """Toma el lock de escritura de SQLite para la transacción en curso de `session`.
+
+    pysqlite recién emite BEGIN con la primera escritura: las lecturas
+    previas (p. ej. las claves existentes de una carga incremental) no ven
+    lo que otra carga escribe en paralelo. Con `BEGIN IMMEDIATE` esas
+    lecturas ya corren con el lock tomado. Si la conexión ya está en una
+    transacción no hace nada.
+    """
+    raw = session.connection().connection.driver_connection
+    if not raw.in_transaction:
+        raw.execute("BEGIN IMMEDIATE")
+
+
+def dispose_engine() -> None:
+    """Cierra el pool de conexiones y olvida el esquema verificado (p. ej. al cambiar de DB)."""
+    global _engine, _engine_pid, _session_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _engine_pid = None
+        _session_factory = None
+
+
+class BulkInserter:
+    """Inserta filas en una tabla por lotes con sentencias executemany.
+
+    Acepta filas como dict (columna -> valor) o como tuplas en el orden de
+    `columns`. No crea instancias ORM: cada lote se envía con un único
+    `INSERT` parametrizado a través de la conexión de la sesión, dentro de
+    su transacción (el llamador hace el commit).
+
+    Uso:
+        with BulkInserter(session, TMPActividades, columns=(...)) as bulk:
+            for row in rows:
+                bulk.add(row)
+        bulk.rows, bulk.rows_per_sec
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        model,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_flush: Optional[Callable[[int], None]] = None,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size debe ser mayor que 0")
+        self.session = session
+        self.table = model.__table__
+        self.columns = tuple(columns) if columns else None
+        self.batch_size = batch_size
+        # Recibe el total de filas insertadas tras cada lote (p. ej. para informar avance)
+        self.on_flush = on_flush
+        self.rows = 0
+        self.elapsed = 0.0
+        self.cpu = 0.0  # CPU del hilo dentro de los executemany
+        self._stmt = insert(self.table)
+        self._pending: list[dict] = []
+
+    def add(self, row: Union[Mapping, Sequence]) -> None:
+        if not isinstance(row, Mapping):
+            if self.columns is None:
+                raise ValueError("Para filas como tupla hay que indicar 'columns'.")
+            row = dict(zip(self.columns, row))
+        self._pending.append(row)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows: Iterable[Union[Mapping, Sequence]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        started = time.perf_counter()
+        cpu = time.thread_time()
+        self.session.execute(self._stmt, self._pending)
+        self.elapsed += time.perf_counter() - started
+        self.cpu += time.thread_time() - cpu
+        self.rows += len(self._pending)
+        self._pending = []
+        if self.on_flush is not None:
+            self.on_flush(self.rows)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
 
+    def __enter__(self) -> "BulkInserter":
+        return self
 
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+            logger.info(
+                "Carga masiva en %s: %d filas en %.3fs (%.0f filas/s)",
+                self.table.name,
+                self.rows,
+                self.elapsed,
+                self.rows_per_sec,
+            )
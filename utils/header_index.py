@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import unicodedata
+from functools import lru_cache
+from typing import Mapping, Optional, Sequence
+
+
+# Textos normalizados retenidos en memoria (encabezados y celdas cortas se repiten mucho)
+NORM_CACHE_SIZE = 4096
+# Un encabezado nunca es más largo que esto: celdas mayores no pueden repetirlo
+_MAX_HEADER_LEN = 64
+
+
+@lru_cache(maxsize=NORM_CACHE_SIZE)
+def _norm_str(s: str) -> str:
+    s = s.strip().lower()
+    if not s.isascii():
+        s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+    return " ".join(s.split())
+
+
+def norm_text(text) -> str:
+    """Normaliza un texto: minúsculas, sin acentos, espacios colapsados.
+
+    Los textos ASCII no pasan por la descomposición Unicode, y los
+    resultados se memorizan en un caché acotado (`NORM_CACHE_SIZE`).
+    """
+    if text is None:
+        return ""
+    return _norm_str(text if isinstance(text, str) else str(text))
+
+
+class HeaderIndex:
+    """Encabezados esperados de una hoja, compilados una sola vez.
+
+    `aliases` asocia cada campo con sus nombres posibles en orden de
+    preferencia; `tokens` son los nombres que identifican una fila de
+    encabezados (y una fila de datos que los repite).
+    """
+
+    def __init__(self, aliases: Mapping[str, Sequence[str]], tokens: Sequence[str]):
+        self.aliases = {
+            field: tuple(dict.fromkeys(norm_text(name) for name in names)) for field, names in aliases.items()
+        }
+        self.tokens = frozenset(norm_text(token) for token in tokens)
+
+    def find(self, rows: Sequence[tuple]) -> tuple[dict[str, int], int]:
+        """Busca la fila de encabezados y devuelve (mapa_normalizado, fila).
+
+        `rows` son las primeras filas de la hoja como tuplas de valores; la
+        fila devuelta es 1-based, igual que en Excel, o -1 si no se encontró.
+        """
+        for r, row in enumerate(rows, start=1):
+            if not row:
+                continue
+            headers: dict[str, int] = {}
+            for idx, value in enumerate(row, start=1):
+                headers[norm_text(value) or f"col{idx}"] = idx
+            if not self.tokens.isdisjoint(headers):
+                return headers, r
+        return {}, -1
+
+    def resolve(self, headers: Mapping[str, int]) -> dict[str, Optional[int]]:
+        """Columna (1-based) de cada campo según el primer alias presente, o None."""
+        columns: dict[str, Optional[int]] = {}
+        for field, names in self.aliases.items():
+            columns[field] = next((headers[name] for name in names if name in headers), None)
+        return columns
+
+    def is_token(self, value) -> bool:
+        """True si la celda repite un nombre de encabezado.
+
+        Solo los textos cortos pueden serlo: fechas, números y textos largos
+        se descartan sin normalizar.
+        """
+        if not isinstance(value, str) or len(value) > _MAX_HEADER_LEN:
+            return False
+        return _norm_str(value) in self.tokens
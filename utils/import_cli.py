@@ -0,0 +1,219 @@
+"""Importación masiva desde la línea de comandos, sin el servidor web.
+
+Recibe archivos o carpetas (se recorren recursivamente buscando .xls y
+.xlsx) y los importa con `batch_import.import_batch`: los archivos se
+interpretan en paralelo en `--workers` procesos y se cargan en una única
+transacción, como un lote subido desde la aplicación. SQLite admite un
+solo escritor, por eso el paralelismo está en la lectura de las planillas
+y no en la escritura.
+
+Las planillas de Darío no indican el responsable: `--responsable` lo
+asigna, sea a todos los archivos (`--responsable 195`) o a los que
+coinciden con un patrón glob sobre la ruta (`--responsable '*/ana/*=212'`,
+repetible; gana el primer patrón que coincide y el valor sin patrón queda
+como valor por defecto). Se hace un lote por responsable.
+
+Se ejecuta desde la carpeta de la aplicación (donde está Setup.db).
+Si un archivo no se puede interpretar, su lote no se carga (ver
+`import_batch`) y el comando termina con código 1.
+
+Uso:
+    python -m utils.import_cli crm exports/2024/ --workers 8
+    python -m utils.import_cli dario planillas/ --responsable 195 --responsable '*/ana/*=212'
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .batch_import import BatchImportError, FileResult, import_batch
+from .db import DEFAULT_BATCH_SIZE
+from .import_progress import STAGE_LABELS, ImportProgress
+from .incremental_load import LOAD_INCREMENTAL, LOAD_MODES, LOAD_REPLACE
+
+
+KINDS = ("crm", "dario")
+EXTENSIONS = (".xls", ".xlsx")
+
+
+def find_files(paths: Iterable) -> list[Path]:
+    """Archivos .xls/.xlsx de `paths` (las carpetas se recorren recursivamente), sin repetir y en orden."""
+    found: dict[Path, None] = {}
+    for path in map(Path, paths):
+        if path.is_dir():
+            candidates = sorted(p for p in path.rglob("*") if p.is_file())
+        elif path.exists():
+            candidates = [path]
+        else:
+            raise FileNotFoundError(f"No existe: {path}")
+        for p in candidates:
+            # "~$..." son los archivos de bloqueo que deja Excel con la planilla abierta
+            if p.suffix.lower() in EXTENSIONS and not p.name.startswith("~$"):
+                found.setdefault(p.resolve(), None)
+    return list(found)
+
+
+def parse_responsables(values: Iterable[str]) -> tuple[Optional[int], list[tuple[str, int]]]:
+    """Separa `--responsable` en (valor por defecto, [(patrón, número)])."""
+    default: Optional[int] = None
+    patterns: list[tuple[str, int]] = []
+    for value in values:
+        pattern, sep, numero = value.rpartition("=")
+        try:
+            number = int(numero)
+        except ValueError:
+            raise ValueError(f"Responsable inválido: {value!r} (se espera NÚMERO o PATRÓN=NÚMERO)") from None
+        if sep:
+            patterns.append((pattern, number))
+        else:
+            default = number
+    return default, patterns
+
+
+def responsable_for(path: Path, default: Optional[int], patterns: list[tuple[str, int]]) -> Optional[int]:
+    for pattern, number in patterns:
+        if fnmatch(str(path), pattern) or fnmatch(path.name, pattern):
+            return number
+    return default
+
+
+def _print_progress(p: ImportProgress) -> None:
+    if sys.stderr.isatty():
+        label = STAGE_LABELS.get(p.stage, p.stage)
+        print(f"\r  {label}: {p.rows_read} archivos, {p.rows_inserted} registros", end="", file=sys.stderr)
+
+
+def run_group(
+    kind: str,
+    files: list[Path],
+    numero_responsable: Optional[int],
+    workers: Optional[int],
+    batch_size: int,
+    force: bool,
+    mode: str,
+) -> tuple[Optional[list[FileResult]], ImportProgress, float]:
+    """Importa un lote. Devuelve (resultados o None si no hubo cambios, último avance, segundos)."""
+    last: dict = {}
+
+    def progress(p: ImportProgress) -> None:
+        last["progress"] = p
+        _print_progress(p)
+
+    started = time.perf_counter()
+    results = import_batch(
+        kind,
+        [(str(path), str(path)) for path in files],
+        numero_responsable=numero_responsable,
+        max_workers=workers,
+        batch_size=batch_size,
+        progress=progress,
+        force=force,
+        mode=mode,
+    )
+    seconds = time.perf_counter() - started
+    if sys.stderr.isatty():
+        print(file=sys.stderr)
+    return results, last["progress"], seconds
+
+
+def _report(title: str, results: Optional[list[FileResult]], progress: ImportProgress, seconds: float) -> None:
+    if results is None:
+        print(f"{title}: sin cambios, el lote ya estaba importado ({progress.rows_inserted} registros).")
+        return
+    rows = sum(r.rows for r in results)
+    parse = sum(r.parse_seconds for r in results)
+    print(
+        f"{title}: {rows} registros de {len(results)} archivos en {seconds:.1f} s "
+        f"({rows / seconds:.0f} filas/s, {len(results) / seconds:.1f} archivos/s; "
+        f"lectura {parse:.1f} s en total, {parse / seconds:.1f}x en paralelo)"
+    )
+    print(
+        f"  {progress.rows_inserted} nuevos, {progress.rows_updated} actualizados, "
+        f"{progress.rows_deleted} eliminados"
+    )
+    if progress.timings:
+        print(f"  {progress.timings}")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("paths", nargs="+", help="Archivos .xls/.xlsx o carpetas")
+    parser.add_argument(
+        "--responsable",
+        action="append",
+        default=[],
+        metavar="[PATRÓN=]NÚMERO",
+        help="Responsable de las planillas de Darío (repetible, ver arriba)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Procesos de lectura (por defecto, uno por CPU)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--mode", choices=LOAD_MODES, default=LOAD_INCREMENTAL)
+    parser.add_argument("--force", action="store_true", help="Reimportar aunque el contenido ya esté cargado")
+    args = parser.parse_args(argv)
+
+    try:
+        files = find_files(args.paths)
+        default, patterns = parse_responsables(args.responsable)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    if not files:
+        parser.error("No se encontraron archivos .xls/.xlsx.")
+
+    if args.kind == "crm":
+        groups: dict[Optional[int], list[Path]] = {None: files}
+    else:
+        groups = {}
+        missing = []
+        for path in files:
+            numero = responsable_for(path, default, patterns)
+            if numero is None:
+                missing.append(path)
+            else:
+                groups.setdefault(numero, []).append(path)
+        if missing:
+            parser.error("Sin responsable (use --responsable): " + ", ".join(map(str, missing)))
+        # Cada lote vacía la tabla completa: con varios responsables solo quedaría el último
+        if args.mode == LOAD_REPLACE and len(groups) > 1:
+            parser.error("--mode replace no admite varios responsables; impórtelos por separado.")
+
+    started = time.perf_counter()
+    total_rows = total_files = 0
+    failed = False
+    for numero, group in groups.items():
+        title = args.kind if numero is None else f"{args.kind} (responsable {numero})"
+        total_files += len(group)
+        try:
+            results, progress, seconds = run_group(
+                args.kind, group, numero, args.workers, args.batch_size, args.force, args.mode
+            )
+        except BatchImportError as e:
+            if sys.stderr.isatty():
+                print(file=sys.stderr)
+            print(f"{title}: lote no importado, la base no se modificó.")
+            for r in e.results:
+                if not r.ok:
+                    print(f"  error en {r.filename}: {r.error}")
+            failed = True
+            continue
+        _report(title, results, progress, seconds)
+        if results is not None:
+            total_rows += sum(r.rows for r in results)
+
+    seconds = time.perf_counter() - started
+    if len(groups) > 1:
+        print(
+            f"Total: {total_rows} registros de {total_files} archivos en {seconds:.1f} s "
+            f"({total_rows / seconds:.0f} filas/s)"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
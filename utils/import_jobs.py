@@ -0,0 +1,498 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from multiprocessing import Manager
+from typing import MutableMapping, Optional, Sequence, Union
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+
+from .db import ImportJob, get_session_factory
+from .import_progress import STAGE_CACHED, ImportProgress, ProgressCallback
+from .incremental_load import LOAD_INCREMENTAL
+from .upload_spool import UploadSpool
+
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+# Reintentos del reclamo de un trabajo si la base está bloqueada, y espera inicial entre ellos (s)
+CLAIM_RETRIES = 5
+CLAIM_BACKOFF = 0.5
+
+# Segundos que un trabajo puede seguir en cola sin que el pool del proceso lo tenga pendiente
+JOB_CLAIM_TIMEOUT = float(os.environ.get("IMPORT_JOB_CLAIM_TIMEOUT", 30))
+
+# Cantidad de workers y tipo de pool ('thread' | 'process'), configurables por entorno
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", min(4, os.cpu_count() or 1)))
+IMPORT_WORKER_MODE = os.environ.get("IMPORT_WORKER_MODE", "thread")
+
+
+def _run_importer(
+    kind: str,
+    source,
+    params: dict,
+    progress: Optional[ProgressCallback] = None,
+    filename: Optional[str] = None,
+) -> int:
+    """Ejecuta el importador correspondiente a `kind` y devuelve los registros insertados."""
+    if kind == "crm":
+        from .xls_import_crm import import_actividades_from_excel
+
+        return import_actividades_from_excel(
+            source,
+            progress=progress,
+            filename=filename,
+            force=bool(params.get("force")),
+            mode=params.get("mode", LOAD_INCREMENTAL),
+        )
+    if kind == "dario":
+        from .xls_import_dario import import_actividades_dario
+
+        return import_actividades_dario(
+            source,
+            int(params["numero_responsable"]),
+            progress=progress,
+            filename=filename,
+            force=bool(params.get("force")),
+            mode=params.get("mode", LOAD_INCREMENTAL),
+        )
+    raise RuntimeError(f"Tipo de importación desconocido: {kind}")
+
+
+def _run_batch(kind: str, params: dict, payload: Optional[list], progress: Optional[ProgressCallback]):
+    """Ejecuta un trabajo por lotes. Devuelve (registros insertados, resumen por archivo).
+
+    Si el lote ya estaba importado sin cambios devuelve (0, None).
+    """
+    from .batch_import import import_batch, summarize
+
+    files = params["files"]
+    payload = payload or [None] * len(files)
+    sources = [(data if data is not None else f["path"], f["filename"]) for f, data in zip(files, payload)]
+    results = import_batch(
+        kind,
+        sources,
+        numero_responsable=params.get("numero_responsable"),
+        progress=progress,
+        force=bool(params.get("force")),
+        mode=params.get("mode", LOAD_INCREMENTAL),
+    )
+    if results is None:
+        return 0, None
+    return sum(r.rows for r in results), summarize(results)
+
+
+def _changes_text(progress: ImportProgress) -> str:
+    """Detalle de lo escrito en la tabla: nuevos, actualizados y eliminados."""
+    return (
+        f"{progress.rows_inserted} nuevos, {progress.rows_updated} actualizados, "
+        f"{progress.rows_deleted} eliminados"
+    )
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _remove_files(job: ImportJob, params: dict) -> None:
+    """Los archivos subidos pertenecen al trabajo: se eliminan al terminar."""
+    if not params.get("delete_file"):
+        return
+    if params.get("batch"):
+        paths = [f["path"] for f in params["files"] if f.get("path")]
+    elif not params.get("in_memory"):
+        paths = [job.file_path]
+    else:
+        paths = []
+    for path in paths:
+        try:
+            os.remove(path)
+        except Exception:
+            pass
+
+
+def _claim(session, job_id: int) -> bool:
+    """Pasa el trabajo de 'queued' a 'running'; reintenta si la base está bloqueada."""
+    delay = CLAIM_BACKOFF
+    for attempt in range(CLAIM_RETRIES):
+        try:
+            claimed = session.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id, ImportJob.status == JOB_QUEUED)
+                .values(status=JOB_RUNNING, worker_pid=os.getpid(), started_at=datetime.now())
+            ).rowcount
+            session.commit()
+            return bool(claimed)
+        except OperationalError:
+            session.rollback()
+            if attempt == CLAIM_RETRIES - 1:
+                raise
+            logger.warning("Base bloqueada al reclamar el trabajo %s; se reintenta en %.1f s", job_id, delay)
+            time.sleep(delay)
+            delay *= 2
+    return False
+
+
+def _fail_unclaimed(session, job_id: int, message: str) -> None:
+    """Marca fallido un trabajo que no se pudo reclamar (si sigue en cola)."""
+    try:
+        session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == JOB_QUEUED)
+            .values(status=JOB_FAILED, message=message, finished_at=datetime.now())
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("No se pudo marcar fallido el trabajo de importación %s", job_id)
+        return
+    job = session.get(ImportJob, job_id)
+    if job is not None and job.status == JOB_FAILED:
+        _remove_files(job, json.loads(job.params or "{}"))
+
+
+def run_job(
+    job_id: int,
+    progress_store: Optional[MutableMapping] = None,
+    payload: Union[bytes, list, None] = None,
+) -> None:
+    """Ejecuta un trabajo encolado: lo reclama, importa y registra el resultado.
+
+    El reclamo es atómico (`UPDATE ... WHERE status='queued'`), por lo que si
+    varios workers ven el mismo trabajo solo uno lo ejecuta; si la base sigue
+    bloqueada tras `CLAIM_RETRIES` intentos el trabajo queda fallido en lugar
+    de en cola. Es una función de módulo para poder enviarse también a un
+    pool de procesos.
+
+    El avance del importador se publica en `progress_store[job_id]` (un dict
+    en memoria o un proxy de `multiprocessing.Manager`), no en la base: una
+    escritura por notificación competiría con la carga por el lock de SQLite.
+
+    Los trabajos `in_memory` reciben el contenido del archivo en `payload`;
+    `file_path` guarda entonces solo el nombre original. En los trabajos por
+    lotes (`batch`), `params["files"]` lista los archivos y `payload` trae el
+    contenido de los que están en memoria, en el mismo orden.
+
+    Si el importador omite la carga porque el contenido ya estaba importado
+    (`STAGE_CACHED`, ver `import_registry`), el mensaje lo indica. Con
+    `params["force"]` se reimporta igual; `params["mode"]` elige la carga
+    incremental (por defecto) o el reemplazo de la tabla.
+    """
+    last: dict = {}
+
+    def progress(p: ImportProgress) -> None:
+        last["progress"] = p
+        if progress_store is not None:
+            progress_store[job_id] = p.as_dict()
+
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        try:
+            claimed = _claim(session, job_id)
+        except Exception as e:
+            logger.exception("No se pudo iniciar el trabajo de importación %s", job_id)
+            _fail_unclaimed(session, job_id, f"Error en importación: no se pudo iniciar el trabajo: {e}")
+            return
+        if not claimed:
+            return
+        job = session.get(ImportJob, job_id)
+        params = json.loads(job.params or "{}")
+        try:
+            if params.get("in_memory") and payload is None:
+                raise RuntimeError("El contenido del archivo ya no está disponible (servidor reiniciado).")
+            if params.get("batch"):
+                inserted, message = _run_batch(job.kind, params, payload, progress)
+                if message is not None:
+                    message += f"\nCambios: {_changes_text(last['progress'])}."
+            else:
+                source = io.BytesIO(payload) if params.get("in_memory") else job.file_path
+                inserted = _run_importer(job.kind, source, params, progress, filename=job.file_path)
+                message = (
+                    f"Importación completada. Registros importados: {inserted} "
+                    f"({_changes_text(last['progress'])})."
+                )
+            if last["progress"].stage == STAGE_CACHED:
+                inserted = last["progress"].rows_inserted
+                params["cached"] = True
+                job.params = json.dumps(params)
+                message = (
+                    f"Sin cambios: el contenido ya estaba importado ({inserted} registros). "
+                    "No se volvió a importar."
+                )
+            elif message is not None and last["progress"].timings:
+                message += f"\n{last['progress'].timings}"
+            job.status = JOB_DONE
+            job.inserted = inserted
+            job.message = message
+        except Exception as e:
+            logger.exception("Falló el trabajo de importación %s", job_id)
+            job.status = JOB_FAILED
+            job.message = f"Error en importación: {e}"
+        finally:
+            job.finished_at = datetime.now()
+            session.commit()
+            if progress_store is not None:
+                progress_store.pop(job_id, None)
+            _remove_files(job, params)
+    finally:
+        session.close()
+
+
+class ImportWorkerPool:
+    """Pool de workers (hilos o procesos) que ejecuta los trabajos de IMPORT_Jobs."""
+
+    def __init__(self, workers: int = IMPORT_WORKERS, mode: str = IMPORT_WORKER_MODE):
+        if mode == "process":
+            self._executor: Executor = ProcessPoolExecutor(max_workers=workers)
+            self._manager = Manager()
+            self.progress: MutableMapping = self._manager.dict()
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import")
+            self._manager = None
+            self.progress = {}
+        self.mode = mode
+        self.workers = workers
+        # Trabajos enviados a este pool que todavía no terminaron
+        self._active: set[int] = set()
+
+    def submit(self, job_id: int, payload: Union[bytes, list, None] = None) -> None:
+        self._active.add(job_id)
+        future = self._executor.submit(run_job, job_id, self.progress, payload)
+
+        def _log_failure(f) -> None:
+            self._active.discard(job_id)
+            # run_job registra los errores del importador; aquí solo llegan fallos del worker
+            if f.exception() is not None:
+                logger.error("Trabajo de importación %s: %s", job_id, f.exception())
+
+        future.add_done_callback(_log_failure)
+
+    def has_job(self, job_id: int) -> bool:
+        """True si el trabajo está pendiente o en curso en este pool."""
+        return job_id in self._active
+
+    def recover(self) -> int:
+        """Reencola trabajos huérfanos (su worker ya no existe) y envía los pendientes.
+
+        Los trabajos en memoria solo puede ejecutarlos el proceso que los
+        encoló (`worker_pid`); si ese proceso ya no existe se marcan fallidos.
+        Se llama al crear el pool, antes de encolar nada: un `worker_pid`
+        igual al de este proceso se toma como de un proceso ya terminado.
+        """
+        SessionFactory = get_session_factory()
+        session = SessionFactory()
+        try:
+            pending = []
+            jobs = session.query(ImportJob).filter(ImportJob.status.in_((JOB_QUEUED, JOB_RUNNING))).all()
+            for job in jobs:
+                in_memory = json.loads(job.params or "{}").get("in_memory", False)
+                # El pool recién se crea: un trabajo con el pid de este proceso es de
+                # una ejecución anterior cuyo pid se reutilizó (reinicio, contenedor)
+                owner_alive = job.worker_pid != os.getpid() and _pid_alive(job.worker_pid)
+                if in_memory:
+                    if not owner_alive:
+                        job.status = JOB_FAILED
+                        job.message = "Error en importación: el servidor se reinició antes de procesar el archivo."
+                        job.finished_at = datetime.now()
+                    continue
+                if job.status == JOB_RUNNING and not owner_alive:
+                    job.status = JOB_QUEUED
+                    job.worker_pid = None
+                if job.status == JOB_QUEUED:
+                    pending.append(job.id)
+            session.commit()
+        finally:
+            session.close()
+        for job_id in pending:
+            self.submit(job_id)
+        return len(pending)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[ImportWorkerPool] = None
+
+
+def get_worker_pool() -> ImportWorkerPool:
+    """Pool del proceso; al crearlo retoma los trabajos pendientes de ejecuciones previas."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ImportWorkerPool()
+                _pool.recover()
+    return _pool
+
+
+def enqueue_import(
+    kind: str, source: Union[str, UploadSpool, Sequence[UploadSpool]], params: Optional[dict] = None
+) -> int:
+    """Registra un trabajo de importación y lo envía al pool. Devuelve el id del trabajo.
+
+    `source` es una ruta, un `UploadSpool` o una lista de spools (importación
+    por lotes, ver `batch_import`). Con un spool en disco el trabajo toma la
+    propiedad del archivo y lo elimina al terminar; con un spool en memoria el
+    contenido se entrega directo al worker, sin pasar por disco. Con una ruta,
+    `params={"delete_file": True}` también elimina el archivo.
+    """
+    params = dict(params or {})
+    payload: Union[bytes, list, None] = None
+    owner_pid: Optional[int] = None
+    if isinstance(source, UploadSpool):
+        if source.in_memory:
+            payload = source.getvalue()
+            file_path = source.filename
+            params["in_memory"] = True
+            owner_pid = os.getpid()
+            source.close()
+        else:
+            file_path = source.detach()
+            params["delete_file"] = True
+    elif isinstance(source, (list, tuple)):
+        files, payload = [], []
+        for spool in source:
+            if spool.in_memory:
+                files.append({"filename": spool.filename, "path": None})
+                payload.append(spool.getvalue())
+                spool.close()
+            else:
+                files.append({"filename": spool.filename, "path": spool.detach()})
+                payload.append(None)
+        params.update(batch=True, files=files, delete_file=True)
+        if any(data is not None for data in payload):
+            params["in_memory"] = True
+            owner_pid = os.getpid()
+        else:
+            payload = None
+        file_path = ", ".join(f["filename"] for f in files)
+    else:
+        file_path = source
+
+    # El pool se crea (y recupera los trabajos previos) antes de registrar este
+    pool = get_worker_pool()
+    job_id = create_job(kind, file_path, params, owner_pid)
+    pool.submit(job_id, payload)
+    return job_id
+
+
+def create_job(kind: str, file_path: str, params: dict, owner_pid: Optional[int] = None) -> int:
+    """Registra un trabajo en cola sin enviarlo a ningún pool (lo ejecuta quien llame a `run_job`)."""
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        job = ImportJob(
+            kind=kind,
+            file_path=file_path,
+            params=json.dumps(params),
+            status=JOB_QUEUED,
+            worker_pid=owner_pid,
+            created_at=datetime.now(),
+        )
+        session.add(job)
+        session.commit()
+        return job.id
+    finally:
+        session.close()
+
+
+def expire_stale_job(job_id: int) -> bool:
+    """Marca fallido un trabajo abandonado. Devuelve True si lo marcó.
+
+    Está abandonado si sigue en cola pasados `JOB_CLAIM_TIMEOUT` segundos sin
+    que el pool de este proceso lo tenga pendiente, o si figura en curso y su
+    worker ya no existe. Solo vale para trabajos encolados por este proceso
+    (p. ej. los que sigue la aplicación tras una subida).
+    """
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        job = session.get(ImportJob, job_id)
+        if job is None:
+            return False
+        if job.status == JOB_QUEUED:
+            waiting = (datetime.now() - job.created_at).total_seconds()
+            if waiting < JOB_CLAIM_TIMEOUT or (_pool is not None and _pool.has_job(job_id)):
+                return False
+            message = "Error en importación: ningún worker tomó el trabajo."
+        elif job.status == JOB_RUNNING:
+            # Con workers en hilos el pid es el de este proceso: vale solo si el pool lo tiene
+            if job.worker_pid == os.getpid():
+                alive = _pool is not None and _pool.has_job(job_id)
+            else:
+                alive = _pid_alive(job.worker_pid)
+            if alive:
+                return False
+            message = "Error en importación: el worker terminó sin informar el resultado."
+        else:
+            return False
+        status = job.status
+        expired = session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == status)
+            .values(status=JOB_FAILED, message=message, finished_at=datetime.now())
+        ).rowcount
+        session.commit()
+        if expired:
+            logger.warning("Trabajo de importación %s abandonado (%s): marcado fallido", job_id, status)
+        return bool(expired)
+    finally:
+        session.close()
+
+
+def get_job(job_id: int) -> Optional[dict]:
+    """Estado actual de un trabajo como dict (None si no existe).
+
+    Mientras corre, `progress` trae la última instantánea de `ImportProgress`
+    publicada por el worker (ver `ImportProgress.as_dict`).
+    """
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        job = session.get(ImportJob, job_id)
+        if job is None:
+            return None
+        params = json.loads(job.params or "{}")
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "batch": bool(params.get("batch")),
+            # True si se omitió la carga porque el contenido ya estaba importado
+            "cached": bool(params.get("cached")),
+            "status": job.status,
+            "message": job.message,
+            "inserted": job.inserted,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "progress": _pool.progress.get(job_id) if _pool is not None else None,
+        }
+    finally:
+        session.close()
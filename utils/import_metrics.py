@@ -0,0 +1,241 @@
+"""Mediciones por etapa de cada importación e historial en IMPORT_Historial.
+
+`ImportMetrics` toma el tiempo de pared, el tiempo de CPU del hilo, las filas
+y (opcionalmente) el pico de memoria de cada etapa. Las etapas son las que
+informa `ProgressReporter.stage` (abrir, encabezados, filas, guardar) más:
+
+- "hash": lectura del archivo para el registro de importaciones, antes de
+  abrirlo (ver `import_registry`).
+- "write": escritura en la base (inserts, updates, deletes y tablas
+  resumen), que se descuenta de "rows" para separar la lectura de la hoja
+  de la carga.
+
+Con IMPORT_METRICS=0 no se crea ningún objeto: el reporter solo compara con
+None en cada cambio de etapa. El pico de memoria usa tracemalloc, que
+encarece cada asignación, por eso se activa aparte con
+IMPORT_METRICS_MEMORY=1; es global al proceso, así que con varias
+importaciones en hilos a la vez los picos se mezclan.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator, Optional
+
+from .db import ImportHistorial, get_session_factory
+from .import_progress import STAGE_CACHED, STAGE_COMMIT, STAGE_HEADERS, STAGE_OPEN, STAGE_ROWS, STAGE_WRITE
+
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.environ.get("IMPORT_METRICS", "1") != "0"
+TRACE_MEMORY = os.environ.get("IMPORT_METRICS_MEMORY", "0") == "1"
+
+STAGE_HASH = "hash"
+
+# Nombre de cada etapa en el resumen
+STAGE_NAMES = {
+    STAGE_HASH: "verificación",
+    STAGE_OPEN: "apertura",
+    STAGE_HEADERS: "encabezados",
+    STAGE_ROWS: "lectura",
+    STAGE_WRITE: "escritura",
+    STAGE_COMMIT: "commit",
+}
+
+HISTORY_OK = "ok"
+HISTORY_CACHED = "cached"
+HISTORY_ERROR = "error"
+
+
+@dataclass
+class StageMetric:
+    """Mediciones de una etapa."""
+
+    stage: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    rows: int = 0
+    peak_kb: Optional[int] = None  # Solo con IMPORT_METRICS_MEMORY=1
+
+
+class ImportMetrics:
+    """Mediciones de una importación; `ProgressReporter` marca el comienzo de cada etapa."""
+
+    def __init__(self, memory: bool = TRACE_MEMORY):
+        self.stages: list[StageMetric] = []
+        self.finished = False
+        # Solo se detiene tracemalloc si lo inició esta medición
+        self._owns_tracing = memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+        self._memory = memory
+        self._carved: list[StageMetric] = []
+        self._start(STAGE_HASH, 0)
+
+    def _start(self, stage: str, rows_read: int) -> None:
+        self._stage = stage
+        self._rows_at = rows_read
+        if self._memory:
+            tracemalloc.reset_peak()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def _close(self, rows_read: int) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        peak = tracemalloc.get_traced_memory()[1] // 1024 if self._memory else None
+        self.stages.append(StageMetric(self._stage, wall, cpu, rows_read - self._rows_at, peak))
+        # Las subetapas descontadas van después de la etapa que las contiene
+        self.stages.extend(self._carved)
+        self._carved = []
+
+    def enter(self, stage: str, rows_read: int) -> None:
+        """Cierra la etapa en curso y comienza `stage` (`rows_read` = filas leídas hasta ahora)."""
+        if self.finished or stage == self._stage:
+            return
+        self._close(rows_read)
+        self._start(stage, rows_read)
+
+    def carve(self, stage: str, wall: float, cpu: float, rows: int) -> None:
+        """Registra `stage` como parte ya medida de la etapa en curso y la descuenta de ella."""
+        if self.finished:
+            return
+        self._wall += wall
+        self._cpu += cpu
+        self._carved.append(StageMetric(stage, wall, cpu, rows))
+
+    def finish(self, rows_read: int) -> None:
+        if self.finished:
+            return
+        self._close(rows_read)
+        self.finished = True
+        if self._owns_tracing:
+            tracemalloc.stop()
+
+    @property
+    def wall(self) -> float:
+        return sum(s.wall for s in self.stages)
+
+    @property
+    def cpu(self) -> float:
+        return sum(s.cpu for s in self.stages)
+
+    @property
+    def peak_kb(self) -> Optional[int]:
+        peaks = [s.peak_kb for s in self.stages if s.peak_kb is not None]
+        return max(peaks) if peaks else None
+
+    def summary(self) -> str:
+        """Una línea con el tiempo de cada etapa, para el mensaje de resultado."""
+        parts = [f"{STAGE_NAMES.get(s.stage, s.stage)} {s.wall:.2f} s" for s in self.stages if s.wall >= 0.005]
+        text = f"Tiempos: {' · '.join(parts) or '-'} (total {self.wall:.2f} s, CPU {self.cpu:.2f} s"
+        if self.peak_kb is not None:
+            text += f", pico {self.peak_kb / 1024:.0f} MB"
+        return text + ")."
+
+    def as_json(self) -> str:
+        return json.dumps([asdict(s) for s in self.stages])
+
+
+def new_metrics() -> Optional[ImportMetrics]:
+    """Mediciones para una importación nueva, o None si están desactivadas."""
+    return ImportMetrics() if METRICS_ENABLED else None
+
+
+def source_name(source, filename: Optional[str] = None) -> Optional[str]:
+    """Nombre para el historial: `filename`, la ruta o el nombre del archivo abierto."""
+    if filename:
+        return str(filename)
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", None)
+
+
+@contextmanager
+def import_history(kind: str, name: Optional[str], reporter) -> Iterator[None]:
+    """Registra en IMPORT_Historial la importación del bloque, termine bien o con error.
+
+    Sin mediciones (`reporter.metrics` None) no hace nada. Un fallo al
+    escribir el historial se registra en el log y no afecta la importación.
+    """
+    metrics: Optional[ImportMetrics] = reporter.metrics
+    if metrics is None:
+        yield
+        return
+    started_at = datetime.now()
+    try:
+        yield
+    except Exception as e:
+        _write(kind, name, reporter, started_at, HISTORY_ERROR, str(e))
+        raise
+    status = HISTORY_CACHED if reporter.progress.stage == STAGE_CACHED else HISTORY_OK
+    _write(kind, name, reporter, started_at, status, None)
+
+
+def _write(kind: str, name: Optional[str], reporter, started_at: datetime, status: str, error: Optional[str]) -> None:
+    metrics: ImportMetrics = reporter.metrics
+    progress = reporter.progress
+    metrics.finish(progress.rows_read)
+    try:
+        SessionFactory = get_session_factory()
+        session = SessionFactory()
+        try:
+            session.add(
+                ImportHistorial(
+                    kind=kind,
+                    filename=name,
+                    status=status,
+                    started_at=started_at,
+                    finished_at=datetime.now(),
+                    rows_read=progress.rows_read,
+                    rows_inserted=progress.rows_inserted,
+                    rows_updated=progress.rows_updated,
+                    rows_deleted=progress.rows_deleted,
+                    rows_skipped=progress.rows_skipped,
+                    wall_seconds=metrics.wall,
+                    cpu_seconds=metrics.cpu,
+                    peak_kb=metrics.peak_kb,
+                    stages=metrics.as_json(),
+                    error=error,
+                )
+            )
+            session.commit()
+        finally:
+            session.close()
+    except Exception:
+        logger.exception("No se pudo registrar la importación en IMPORT_Historial")
+
+
+def recent_history(limit: int = 50) -> list[dict]:
+    """Últimas importaciones registradas (más recientes primero), con sus etapas."""
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        rows = session.query(ImportHistorial).order_by(ImportHistorial.id.desc()).limit(limit).all()
+        return [
+            {
+                "id": row.id,
+                "kind": row.kind,
+                "filename": row.filename,
+                "status": row.status,
+                "started_at": row.started_at,
+                "rows_read": row.rows_read,
+                "rows_inserted": row.rows_inserted,
+                "wall_seconds": row.wall_seconds,
+                "cpu_seconds": row.cpu_seconds,
+                "peak_kb": row.peak_kb,
+                "stages": json.loads(row.stages or "[]"),
+                "error": row.error,
+            }
+            for row in rows
+        ]
+    finally:
+        session.close()
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+
+# Etapas de una importación y su texto para la UI
+STAGE_OPEN = "open"
+STAGE_HEADERS = "headers"
+STAGE_ROWS = "rows"
+STAGE_COMMIT = "commit"
+# Parte de STAGE_ROWS dedicada a escribir en la base (solo en las mediciones, ver import_metrics)
+STAGE_WRITE = "write"
+STAGE_DONE = "done"
+# Importación omitida: el mismo contenido ya está cargado (ver import_registry)
+STAGE_CACHED = "cached"
+
+STAGE_LABELS = {
+    STAGE_OPEN: "Abriendo archivo",
+    STAGE_HEADERS: "Detectando encabezados",
+    STAGE_ROWS: "Procesando filas",
+    STAGE_COMMIT: "Guardando",
+    STAGE_DONE: "Finalizado",
+    STAGE_CACHED: "Sin cambios (ya importado)",
+}
+
+
+@dataclass
+class ImportProgress:
+    """Instantánea del avance de una importación."""
+
+    stage: str = STAGE_OPEN
+    rows_read: int = 0
+    rows_inserted: int = 0
+    rows_updated: int = 0  # Carga incremental: filas existentes modificadas
+    rows_deleted: int = 0  # Carga incremental: filas que ya no vienen en el archivo
+    rows_skipped: int = 0
+    rows_total: Optional[int] = None  # Estimación (dimensión de la hoja), puede faltar
+    elapsed: float = 0.0
+    # Resumen de tiempos por etapa al terminar (ver import_metrics), si se midió
+    timings: str = ""
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if self.stage in (STAGE_DONE, STAGE_CACHED):
+            return 1.0
+        if not self.rows_total:
+            return None
+        return min(self.rows_read / self.rows_total, 1.0)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        fraction = self.fraction
+        if not fraction or self.elapsed <= 0:
+            return None
+        return self.elapsed * (1 - fraction) / fraction
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["fraction"] = self.fraction
+        data["eta_seconds"] = self.eta_seconds
+        return data
+
+
+ProgressCallback = Callable[[ImportProgress], None]
+
+
+class ProgressReporter:
+    """Cuenta filas y notifica el avance de forma limitada (throttled).
+
+    Se notifica cuando pasaron `every_rows` filas o `interval` segundos desde
+    la última notificación (el reloj se consulta solo cada `check_every`
+    filas), y siempre en cada cambio de etapa. Sin callback, los métodos son
+    prácticamente gratuitos.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback] = None,
+        rows_total: Optional[int] = None,
+        every_rows: int = 5000,
+        interval: float = 0.25,
+        check_every: int = 256,
+        metrics=None,
+    ):
+        self.callback = callback
+        # `import_metrics.ImportMetrics` opcional: se le avisa cada cambio de etapa
+        self.metrics = metrics
+        self.progress = ImportProgress(rows_total=rows_total)
+        self.every_rows = every_rows
+        self.interval = interval
+        self.check_every = check_every
+        self._started = time.monotonic()
+        self._last_emit = self._started
+        self._last_emit_rows = 0
+        self._next_check = check_every
+
+    def read(self) -> None:
+        """Registra una fila leída."""
+        self.progress.rows_read += 1
+        if self.callback is not None and self.progress.rows_read >= self._next_check:
+            self._next_check += self.check_every
+            self._maybe_emit()
+
+    def read_many(self, count: int) -> None:
+        """Registra un bloque de `count` filas leídas (extracción columnar)."""
+        self.progress.rows_read += count
+        if self.callback is not None and self.progress.rows_read >= self._next_check:
+            self._next_check = self.progress.rows_read + self.check_every
+            self._maybe_emit()
+
+    def skipped(self, count: int = 1) -> None:
+        """Registra filas leídas y descartadas (vacías o encabezados repetidos)."""
+        self.progress.rows_skipped += count
+
+    def inserted(self, total: int) -> None:
+        """Actualiza el total de filas insertadas (p. ej. tras cada lote)."""
+        self.progress.rows_inserted = total
+
+    def synced(self, inserted: int, updated: int, deleted: int, write_seconds: float = 0.0, write_cpu: float = 0.0) -> None:
+        """Registra el resultado de una carga incremental.
+
+        `write_seconds`/`write_cpu` es el tiempo que la carga pasó escribiendo
+        en la base; las mediciones lo separan de la lectura de filas.
+        """
+        self.progress.rows_inserted = inserted
+        self.progress.rows_updated = updated
+        self.progress.rows_deleted = deleted
+        if self.metrics is not None:
+            self.metrics.carve(STAGE_WRITE, write_seconds, write_cpu, inserted + updated + deleted)
+
+    def stage(self, name: str) -> None:
+        self.progress.stage = name
+        if self.metrics is not None:
+            if name in (STAGE_DONE, STAGE_CACHED):
+                self.metrics.finish(self.progress.rows_read)
+                self.progress.timings = self.metrics.summary()
+            else:
+                self.metrics.enter(name, self.progress.rows_read)
+        self._emit()
+
+    def notify(self) -> None:
+        """Notifica el avance actual sin esperar al límite de frecuencia."""
+        self._emit()
+
+    def _maybe_emit(self) -> None:
+        now = time.monotonic()
+        if (
+            self.progress.rows_read - self._last_emit_rows >= self.every_rows
+            or now - self._last_emit >= self.interval
+        ):
+            self._emit(now)
+
+    def _emit(self, now: Optional[float] = None) -> None:
+        if self.callback is None:
+            return
+        now = now if now is not None else time.monotonic()
+        self.progress.elapsed = now - self._started
+        self._last_emit = now
+        self._last_emit_rows = self.progress.rows_read
+        self.callback(self.progress)
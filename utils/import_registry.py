@@ -0,0 +1,123 @@
+"""Registro de importaciones por hash de contenido, para no reimportar archivos idénticos.
+
+Una entrada (sha256, tipo, parámetros) es válida mientras se cumplan las
+reglas de invalidación:
+- es la última importación registrada para ese tipo (otra importación en la
+  misma tabla la invalida), y
+- la tabla destino no cambió desde la carga (misma huella: cantidad de
+  filas, id máximo y `row_seq` máximo, que toda carga que inserta o
+  modifica filas renueva).
+Las ediciones en el lugar que no pasan por una carga no cambian la huella:
+un trigger sobre cada tabla de staging (migración 0007) borra entonces las
+entradas de su tipo. `invalidate()` descarta entradas explícitamente y
+`force=True` en los importadores ignora el registro (la carga se vuelve a
+registrar).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .db import ImportRegistro, TMPActividades, TMPActividadesDario, get_session_factory
+
+
+# Tabla destino de cada tipo de importación
+KIND_TABLES = {"crm": TMPActividades, "dario": TMPActividadesDario}
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def source_sha256(source) -> str:
+    """SHA-256 del contenido de una ruta, bytes o archivo binario (se restaura su posición)."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+                digest.update(chunk)
+    elif hasattr(source, "getbuffer"):
+        digest.update(source.getbuffer())
+    else:
+        position = source.tell()
+        for chunk in iter(lambda: source.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def combined_sha256(digests: Iterable[str]) -> str:
+    """Hash de un lote de archivos a partir de los hashes individuales (en orden)."""
+    return hashlib.sha256("\n".join(digests).encode("ascii")).hexdigest()
+
+
+def params_key(params: Optional[dict] = None) -> str:
+    """Representación canónica de los parámetros que afectan el resultado."""
+    return json.dumps(params or {}, sort_keys=True, separators=(",", ":"))
+
+
+def _fingerprint(session: Session, kind: str) -> str:
+    model = KIND_TABLES[kind]
+    count, max_id, max_seq = session.execute(select(func.count(), func.max(model.id), func.max(model.row_seq))).one()
+    return f"{count}:{max_id or 0}:{max_seq or 0}"
+
+
+def lookup(kind: str, digest: str, params: Optional[dict] = None) -> Optional[int]:
+    """Cantidad de registros de la importación previa si sigue vigente; None si hay que importar."""
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        latest = session.execute(
+            select(ImportRegistro).where(ImportRegistro.kind == kind).order_by(ImportRegistro.id.desc()).limit(1)
+        ).scalar_one_or_none()
+        if latest is None or latest.sha256 != digest or latest.params_key != params_key(params):
+            return None
+        if latest.fingerprint != _fingerprint(session, kind):
+            return None
+        return latest.rows
+    finally:
+        session.close()
+
+
+def record(session: Session, kind: str, digest: str, params: Optional[dict], rows: int) -> None:
+    """Registra una carga dentro de su misma transacción (antes del commit).
+
+    La entrada se reemplaza para que quede como la más reciente del tipo.
+    """
+    key = params_key(params)
+    session.query(ImportRegistro).filter(
+        ImportRegistro.sha256 == digest, ImportRegistro.kind == kind, ImportRegistro.params_key == key
+    ).delete()
+    session.add(
+        ImportRegistro(
+            sha256=digest,
+            kind=kind,
+            params_key=key,
+            rows=rows,
+            fingerprint=_fingerprint(session, kind),
+            imported_at=datetime.now(),
+        )
+    )
+    session.flush()
+
+
+def invalidate(kind: Optional[str] = None) -> int:
+    """Elimina las entradas del registro (de un tipo o todas). Devuelve cuántas se borraron."""
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        query = session.query(ImportRegistro)
+        if kind is not None:
+            query = query.filter(ImportRegistro.kind == kind)
+        deleted = query.delete()
+        session.commit()
+        return deleted
+    finally:
+        session.close()
@@ -0,0 +1,302 @@
+"""Carga incremental: compara filas por clave natural y escribe solo las diferencias."""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator, Mapping, Optional, Sequence
+
+from sqlalchemy import bindparam, delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from .db import DEFAULT_BATCH_SIZE, BulkInserter, ImportBaja, ImportCarga, begin_immediate
+from .row_spool import RowSpool
+from .rollups import add_load as add_to_rollups, reset as reset_rollups, retract as retract_from_rollups
+
+
+# Modos de carga de los importadores
+LOAD_INCREMENTAL = "incremental"  # Inserta, actualiza y borra solo lo que cambió, por responsable
+LOAD_REPLACE = "replace"  # Vacía la tabla completa y la vuelve a cargar
+LOAD_MODES = (LOAD_INCREMENTAL, LOAD_REPLACE)
+
+# Columnas propias de la carga incremental (no forman parte del hash)
+_META_COLUMNS = ("id", "row_key", "row_hash", "row_seq")
+# Máximo de parámetros por sentencia IN (límite de variables de SQLite)
+_IN_CHUNK = 500
+
+
+@dataclass
+class SyncStats:
+    """Resultado de una carga incremental."""
+
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    # Tiempo de pared y CPU del hilo escribiendo en la base (sin la lectura de filas)
+    write_seconds: float = 0.0
+    write_cpu: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        """Filas vigentes del archivo (nuevas + actualizadas + sin cambios)."""
+        return self.inserted + self.updated + self.unchanged
+
+
+def check_mode(mode: str) -> str:
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Modo de carga desconocido: {mode}")
+    return mode
+
+
+def value_columns(model) -> tuple[str, ...]:
+    """Columnas de datos de `model` (las que entran en el hash de fila)."""
+    return tuple(c.name for c in model.__table__.columns if c.name not in _META_COLUMNS)
+
+
+def keyed_rows(
+    rows: Iterable[Mapping],
+    key_columns: Sequence[str],
+    hash_columns: Sequence[str],
+) -> Iterator[dict]:
+    """Agrega `row_key` y `row_hash` a cada fila.
+
+    `row_key` es la clave natural más un ordinal que distingue las filas
+    repetidas (misma clave) según su orden en el archivo; `row_hash` resume
+    los valores de `hash_columns`.
+    """
+    seen: dict[str, int] = {}
+    for row in rows:
+        natural = "|".join("" if row[c] is None else str(row[c]) for c in key_columns)
+        ordinal = seen.get(natural, 0)
+        seen[natural] = ordinal + 1
+        row = dict(row)
+        row["row_key"] = f"{natural}#{ordinal}"
+        row["row_hash"] = hashlib.blake2b(
+            repr(tuple(row[c] for c in hash_columns)).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        yield row
+
+
+def new_load_seq(session: Session, model) -> int:
+    """Registra una carga en IMPORT_Cargas (dentro de la transacción) y devuelve su número.
+
+    Los números crecen siempre y siguen el orden de los commits (SQLite
+    admite un solo escritor a la vez): "Procesar importaciones" toma como
+    nuevas las filas con `row_seq` mayor a la última carga consolidada.
+    """
+    result = session.execute(insert(ImportCarga).values(tabla=model.__tablename__, created_at=datetime.now()))
+    return result.inserted_primary_key[0]
+
+
+def _record_deleted(session: Session, model, ids: Sequence[int], seq: int) -> None:
+    """Anota en IMPORT_Bajas los ids de `model` que borra la carga `seq` (ver consolidation)."""
+    tabla = model.__tablename__
+    for chunk in _chunks(ids, DEFAULT_BATCH_SIZE):
+        session.execute(insert(ImportBaja), [{"tabla": tabla, "source_id": i, "row_seq": seq} for i in chunk])
+
+
+def _chunks(values: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def sync_rows(
+    session: Session,
+    model,
+    rows: Iterable[dict],
+    scope_column: str = "numero_responsable",
+    scope: Optional[Iterable] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_flush: Optional[Callable[[int], None]] = None,
+) -> SyncStats:
+    """Sincroniza `model` con `rows` (salida de `keyed_rows`) dentro de la transacción de `session`.
+
+    Solo se consideran las filas existentes cuyo `scope_column` esté en
+    `scope` (por defecto, los valores presentes en `rows`): las de otros
+    responsables no se tocan. Dentro del alcance, las claves nuevas se
+    insertan, las de hash distinto se actualizan en su lugar (conservan el
+    id) y las que ya no vienen en el archivo se borran. Las filas cargadas
+    antes de existir `row_key` no tienen clave y se reemplazan. Las tablas
+    resumen (ver `rollups`) se ajustan con las mismas diferencias.
+
+    `rows` se consume primero sin lock, volcándolo por lotes de
+    `batch_size` a un archivo temporal (ver `row_spool`): la lectura de la
+    planilla no bloquea a otros escritores. También sin lock se leen las
+    claves existentes, junto con la última carga de la tabla. Recién la
+    escritura corre con el lock de escritura de SQLite (`BEGIN
+    IMMEDIATE`): si mientras tanto se confirmó otra carga de la tabla, las
+    claves se vuelven a leer con el lock tomado. En memoria solo se
+    mantiene el mapa clave -> (id, hash) de las filas existentes.
+    """
+    table = model.__table__
+    with RowSpool() as spool:
+        scope_values = set(scope) if scope is not None else set()
+        for batch in _batches(rows, batch_size):
+            if scope is None:
+                scope_values.update(row[scope_column] for row in batch)
+            spool.write(batch)
+        spool.finish()
+        # La lectura de `rows` (la planilla) no cuenta como escritura
+        started, cpu = time.perf_counter(), time.thread_time()
+
+        def load_existing() -> tuple[dict[Optional[str], tuple[int, Optional[str]]], list[int]]:
+            existing: dict[Optional[str], tuple[int, Optional[str]]] = {}
+            orphans: list[int] = []
+            for chunk in _chunks(sorted(scope_values)):
+                result = session.execute(
+                    select(table.c.id, table.c.row_key, table.c.row_hash).where(table.c[scope_column].in_(chunk))
+                )
+                for row_id, row_key, row_hash in result:
+                    if row_key is None or row_key in existing:
+                        orphans.append(row_id)
+                    else:
+                        existing[row_key] = (row_id, row_hash)
+            return existing, orphans
+
+        # La última carga se lee antes que las claves: una carga confirmada entre
+        # ambas lecturas también cambia la marca y obliga a releerlas
+        last_load = _last_load_seq(session, model)
+        existing, orphans = load_existing()
+        # Otra carga del mismo responsable no puede insertar las mismas claves en paralelo
+        begin_immediate(session)
+        if _last_load_seq(session, model) != last_load:
+            existing, orphans = load_existing()
+        write_seconds, write_cpu = time.perf_counter() - started, time.thread_time() - cpu
+        stats = _apply(session, model, spool.batches(), existing, orphans, batch_size, on_flush)
+    stats.write_seconds += write_seconds
+    stats.write_cpu += write_cpu
+    return stats
+
+
+def _last_load_seq(session: Session, model) -> int:
+    """Número de la última carga confirmada de `model` (0 si no hubo ninguna)."""
+    return session.execute(
+        select(func.coalesce(func.max(ImportCarga.id), 0)).where(ImportCarga.tabla == model.__tablename__)
+    ).scalar()
+
+
+def _apply(
+    session: Session,
+    model,
+    batches: Iterable[list[dict]],
+    existing: dict[Optional[str], tuple[int, Optional[str]]],
+    orphans: list[int],
+    batch_size: int,
+    on_flush: Optional[Callable[[int], None]],
+) -> SyncStats:
+    """Escribe las diferencias entre `batches` y las filas `existing` (con el lock tomado)."""
+    table = model.__table__
+    stats = SyncStats()
+    seq: Optional[int] = None
+    update_stmt = update(table).where(table.c.id == bindparam("b_id"))
+    write_seconds = write_cpu = 0.0
+    with BulkInserter(session, model, batch_size=batch_size, on_flush=on_flush) as bulk:
+        for batch in batches:
+            to_insert: list[dict] = []
+            to_update: list[dict] = []
+            for row in batch:
+                current = existing.pop(row["row_key"], None)
+                if current is None:
+                    to_insert.append(row)
+                elif current[1] != row["row_hash"]:
+                    to_update.append({"b_id": current[0], **row})
+                else:
+                    stats.unchanged += 1
+            if not (to_insert or to_update):
+                continue
+            started, cpu = time.perf_counter(), time.thread_time()
+            # Las filas insertadas o modificadas quedan marcadas con el número de esta carga
+            if seq is None:
+                seq = new_load_seq(session, model)
+            for row in chain(to_insert, to_update):
+                row["row_seq"] = seq
+            if to_update:
+                # Aportes anteriores de las filas que se actualizan
+                retract_from_rollups(session, model, [row["b_id"] for row in to_update])
+                session.execute(update_stmt, to_update)
+                stats.updated += len(to_update)
+            bulk.extend(to_insert)
+            bulk.flush()
+            write_seconds += time.perf_counter() - started
+            write_cpu += time.thread_time() - cpu
+    stats.inserted = bulk.rows
+
+    started, cpu = time.perf_counter(), time.thread_time()
+    to_delete = orphans + [row_id for row_id, _ in existing.values()]
+    written = seq is not None
+    if to_delete:
+        # Las bajas quedan anotadas con el número de esta carga (ver consolidation)
+        if seq is None:
+            seq = new_load_seq(session, model)
+        _record_deleted(session, model, to_delete, seq)
+    retract_from_rollups(session, model, to_delete)
+    for ids in _chunks(to_delete):
+        session.execute(delete(table).where(table.c.id.in_(ids)))
+    stats.deleted = len(to_delete)
+    if written:
+        add_to_rollups(session, model, seq)
+    stats.write_seconds = write_seconds + time.perf_counter() - started
+    stats.write_cpu = write_cpu + time.thread_time() - cpu
+    return stats
+
+
+def load_rows(
+    session: Session,
+    model,
+    rows: Iterable[dict],
+    mode: str = LOAD_INCREMENTAL,
+    scope: Optional[Iterable] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_flush: Optional[Callable[[int], None]] = None,
+) -> SyncStats:
+    """Carga `rows` (salida de `keyed_rows`) en `model` según `mode`; el llamador hace el commit.
+
+    En modo `LOAD_REPLACE` las filas se vuelcan primero a un archivo
+    temporal; luego la tabla se vacía por completo (en su propia
+    transacción, como hasta ahora) y se insertan todas las filas; en
+    `LOAD_INCREMENTAL` se delega en `sync_rows` con el alcance `scope`.
+    """
+    if check_mode(mode) == LOAD_INCREMENTAL:
+        return sync_rows(session, model, rows, scope=scope, batch_size=batch_size, on_flush=on_flush)
+    # Como en `sync_rows`, las filas se leen antes de tomar el lock (y de vaciar la tabla)
+    with RowSpool() as spool:
+        spool.extend(rows, batch_size)
+        return _replace(session, model, spool, batch_size, on_flush)
+
+
+def _replace(
+    session: Session, model, rows: Iterable[dict], batch_size: int, on_flush: Optional[Callable[[int], None]]
+) -> SyncStats:
+    started, cpu = time.perf_counter(), time.thread_time()
+    # Las bajas llevan su propia carga: se confirman antes de que se inserte la nueva
+    table = model.__table__
+    baja_seq = new_load_seq(session, model)
+    session.execute(
+        insert(ImportBaja).from_select(
+            ["tabla", "source_id", "row_seq"],
+            select(literal(model.__tablename__), table.c.id, literal(baja_seq)),
+        )
+    )
+    deleted = session.query(model).delete()
+    reset_rollups(session, model)
+    session.commit()
+    seq = new_load_seq(session, model)
+    with BulkInserter(session, model, batch_size=batch_size, on_flush=on_flush) as bulk:
+        bulk.extend({**row, "row_seq": seq} for row in rows)
+    add_to_rollups(session, model, seq)
+    return SyncStats(
+        inserted=bulk.rows,
+        deleted=deleted,
+        write_seconds=time.perf_counter() - started,
+        write_cpu=time.thread_time() - cpu,
+    )
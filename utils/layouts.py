@@ -0,0 +1,285 @@
+"""Layouts de hoja declarativos, compilados en funciones de extracción por fila.
+
+Un `LayoutSpec` declara una vez cómo leer un formato de export: columnas de
+origen, campos de salida con sus conversores y reglas para descartar filas o
+terminar la lectura. `LayoutSpec.compile()` genera el código de una función
+`extract(row)` especializada para ese layout (posiciones fijas, conversores
+enlazados como variables locales), sin recorrer la especificación por fila.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping, Optional, Union
+
+
+class _Marker:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+# Resultados especiales de un extractor: descartar la fila o terminar la lectura
+SKIP = _Marker("SKIP")
+STOP = _Marker("STOP")
+
+# Pruebas incorporadas de `RowRule` (se generan en línea)
+ALL_EMPTY = "all_empty"  # Todos los valores vacíos (None o texto en blanco)
+ALL_NONE = "all_none"  # Todos los valores None (p. ej. tras convertir)
+
+# Conversor o prueba: un callable o el nombre de un valor enlazado al compilar
+Binding = Union[Callable, str, None]
+
+
+def is_empty(value) -> bool:
+    """True si el valor es None o string vacío (tras strip)."""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() == ""
+    return False
+
+
+def cell(row: tuple, column: int):
+    """Valor de la columna 1-based `column` en una fila de valores (None si no existe)."""
+    return row[column - 1] if column <= len(row) else None
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """Campo de salida de un layout.
+
+    - `sources`: columnas de origen; el conversor recibe sus valores en orden
+    - `convert`: conversor (sin conversor se copia el único valor de origen)
+    - `empty_as_none`: si el origen está vacío el campo vale None sin convertir
+    - `constant`: nombre de un valor enlazado que se usa tal cual (sin origen)
+    - `vector`: conversor columnar opcional para `compile_chunks`; recibe las
+      columnas de origen completas de un bloque y devuelve la lista convertida
+      (mismo resultado que `convert` fila a fila)
+    """
+
+    name: str
+    sources: tuple[str, ...] = ()
+    convert: Binding = None
+    empty_as_none: bool = False
+    constant: Optional[str] = None
+    vector: Binding = None
+
+
+@dataclass(frozen=True)
+class RowRule:
+    """Regla por fila: `SKIP` descarta la fila y `STOP` termina la lectura.
+
+    `test` recibe los valores de `sources` (columnas de origen, o campos ya
+    convertidos si `after_convert`) y devuelve True si la regla aplica. Las
+    reglas sobre valores crudos se evalúan antes de convertir, en el orden
+    declarado; las de `after_convert`, después.
+    """
+
+    action: _Marker
+    sources: tuple[str, ...]
+    test: Binding = ALL_EMPTY
+    after_convert: bool = False
+
+
+@dataclass(frozen=True)
+class LayoutSpec:
+    """Formato de una hoja: columnas, campos de salida y reglas por fila.
+
+    `columns` fija la posición (1-based) de las columnas conocidas de
+    antemano; las que dependen de los encabezados se indican al compilar.
+    `output` es "tuple" (en el orden de `fields`) o "dict".
+    """
+
+    name: str
+    fields: tuple[ColumnSpec, ...]
+    columns: Mapping[str, int] = field(default_factory=dict)
+    rules: tuple[RowRule, ...] = ()
+    output: str = "tuple"
+
+    @property
+    def field_names(self) -> tuple[str, ...]:
+        return tuple(f.name for f in self.fields)
+
+    @property
+    def width(self) -> int:
+        """Última columna fija del layout (para limitar la lectura de la hoja)."""
+        return max(self.columns.values(), default=0)
+
+    def compile(
+        self,
+        positions: Optional[Mapping[str, int]] = None,
+        bindings: Optional[Mapping[str, Any]] = None,
+    ) -> Callable[[tuple], Any]:
+        """Genera el extractor del layout para una hoja concreta.
+
+        `positions` completa/reemplaza las posiciones de `columns` (p. ej. las
+        detectadas por encabezado) y `bindings` aporta los valores nombrados
+        por conversores, pruebas y constantes (p. ej. un parser de fechas
+        detectado para el archivo, o el número de responsable).
+        """
+        return _compile(self, {**self.columns, **(positions or {})}, dict(bindings or {}))
+
+    def compile_chunks(
+        self,
+        positions: Optional[Mapping[str, int]] = None,
+        bindings: Optional[Mapping[str, Any]] = None,
+    ) -> Callable[[list], tuple[list, int, int, bool]]:
+        """Genera un extractor por bloques: `extract_chunk(rows)`.
+
+        Devuelve (registros, descartadas, consumidas, terminado): las reglas
+        sobre valores crudos se evalúan fila a fila hasta el primer `STOP`,
+        los campos se convierten por columna (con `vector` si el campo lo
+        declara) y luego se aplican las reglas de `after_convert`. Los
+        registros son los mismos que daría `compile()` fila a fila.
+        """
+        return _compile(self, {**self.columns, **(positions or {})}, dict(bindings or {}), chunked=True)
+
+
+def _compile(
+    spec: LayoutSpec, positions: dict[str, int], bindings: dict[str, Any], chunked: bool = False
+) -> Callable:
+    namespace: dict[str, Any] = {"SKIP": SKIP, "STOP": STOP}
+    names: dict[int, str] = {}
+
+    def bind(value, prefix: str) -> str:
+        if isinstance(value, str):
+            try:
+                value = bindings[value]
+            except KeyError:
+                raise ValueError(f"Layout '{spec.name}': falta el valor enlazado '{value}'.") from None
+        key = names.get(id(value))
+        if key is None:
+            key = names[id(value)] = f"{prefix}{len(names)}"
+            namespace[key] = value
+        return key
+
+    # Una variable por posición de la hoja (dos nombres pueden compartir columna)
+    sources: dict[int, str] = {}
+
+    def source(name: str) -> str:
+        try:
+            index = positions[name] - 1
+        except KeyError:
+            raise ValueError(f"Layout '{spec.name}': falta la posición de la columna '{name}'.") from None
+        if index not in sources:
+            sources[index] = f"s{len(sources)}"
+        return sources[index]
+
+    def empty(var: str) -> str:
+        return f"({var} is None or (isinstance({var}, str) and not {var}.strip()))"
+
+    # Acción de cada regla: en el extractor por fila se devuelve el marcador;
+    # en el de bloques se descarta la fila o se corta la lectura del bloque
+    if chunked:
+        actions = {SKIP: "skipped += 1; continue", STOP: "stopped = True; break"}
+    else:
+        actions = {SKIP: "return SKIP", STOP: "return STOP"}
+
+    def rule_line(rule: RowRule, variables: list[str], indent: str) -> str:
+        if rule.test == ALL_EMPTY:
+            condition = " and ".join(empty(v) for v in variables)
+        elif rule.test == ALL_NONE:
+            condition = " and ".join(f"{v} is None" for v in variables)
+        else:
+            condition = f"{bind(rule.test, 't')}({', '.join(variables)})"
+        return f"{indent}if {condition}: {actions[rule.action]}"
+
+    indent = "        " if chunked else "    "
+    select: list[str] = []
+    for rule in spec.rules:
+        if not rule.after_convert:
+            select.append(rule_line(rule, [source(s) for s in rule.sources], indent))
+
+    fields: dict[str, str] = {}
+    # Por fila: asignación de cada campo. Por bloques: columnas F<i> convertidas
+    # de una vez (las constantes se siguen asignando por fila)
+    converts: list[str] = []
+    columns: list[str] = []
+    targets: dict[str, str] = {}
+    for i, column in enumerate(spec.fields):
+        var = fields[column.name] = f"f{i}"
+        if column.constant is not None:
+            converts.append(f"{var} = {bind(column.constant, 'k')}")
+            continue
+        args = [source(s) for s in column.sources]
+        if column.convert is None and len(args) != 1:
+            raise ValueError(f"Layout '{spec.name}': el campo '{column.name}' necesita un conversor.")
+        if not chunked:
+            expr = args[0] if column.convert is None else f"{bind(column.convert, 'c')}({', '.join(args)})"
+            if column.empty_as_none:
+                expr = f"None if {' and '.join(empty(a) for a in args)} else {expr}"
+            converts.append(f"{var} = {expr}")
+            continue
+        target = f"F{i}"
+        items = [f"a{j}" for j in range(len(args))]
+        none_if = f"None if {' and '.join(empty(a) for a in items)} else " if column.empty_as_none else ""
+        if column.vector is not None:
+            columns.append(f"{target} = {bind(column.vector, 'v')}({', '.join(args)})")
+            if none_if:
+                columns.append(f"{target} = [{none_if}r for {', '.join(items)}, r in zip({', '.join(args)}, {target})]")
+        else:
+            expr = items[0] if column.convert is None else f"{bind(column.convert, 'c')}({', '.join(items)})"
+            if len(args) == 1:
+                columns.append(f"{target} = [{none_if}{expr} for a0 in {args[0]}]")
+            else:
+                columns.append(f"{target} = [{none_if}{expr} for {', '.join(items)} in zip({', '.join(args)})]")
+        targets[var] = target
+
+    finish: list[str] = []
+    for rule in spec.rules:
+        if rule.after_convert:
+            if chunked and rule.action is STOP:
+                raise ValueError(f"Layout '{spec.name}': STOP tras convertir no admite extracción por bloques.")
+            finish.append(rule_line(rule, [fields[s] for s in rule.sources], "            " if chunked else "    "))
+
+    if spec.output == "dict":
+        result = "{" + ", ".join(f"{name!r}: {var}" for name, var in fields.items()) + "}"
+    elif spec.output == "tuple":
+        result = "(" + "".join(f"{var}, " for var in fields.values()) + ")"
+    else:
+        raise ValueError(f"Layout '{spec.name}': salida desconocida '{spec.output}'.")
+
+    loads = [f"{indent}{var} = row[{index}] if n > {index} else None" for index, var in sources.items()]
+    if chunked:
+        values = "(" + "".join(f"{var}, " for var in sources.values()) + ")"
+        if targets:
+            row_vars = "(" + "".join(f"{var}, " for var in targets) + ")"
+            row_iter = f"zip({', '.join(targets.values())})"
+        else:
+            row_vars, row_iter = "_", "selected"
+        code = "\n".join(
+            [
+                "def extract_chunk(rows):",
+                "    selected = []",
+                "    skipped = 0",
+                "    stopped = False",
+                "    for row in rows:",
+                "        n = len(row)",
+                *loads,
+                *select,
+                f"        selected.append({values})",
+                "    consumed = len(selected) + skipped + stopped",
+                "    records = []",
+                "    if selected:",
+                f"        {values} = zip(*selected)",
+                *[f"        {line}" for line in columns],
+                f"        for {row_vars} in {row_iter}:",
+                *[f"            {line}" for line in converts],
+                *finish,
+                f"            records.append({result})",
+                "    return records, skipped, consumed, stopped",
+            ]
+        )
+        name = "extract_chunk"
+    else:
+        code = "\n".join(
+            ["def extract(row):", "    n = len(row)", *loads, *select, *[f"    {line}" for line in converts], *finish, f"    return {result}"]
+        )
+        name = "extract"
+    exec(compile(code, f"<layout {spec.name}>", "exec"), namespace)
+    extract = namespace[name]
+    extract.source = code
+    return extract
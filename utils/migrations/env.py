@@ -0,0 +1,48 @@
+"""Entorno de Alembic para Setup.db.
+
+La aplicación ejecuta las migraciones con `db.migrate_schema()`, que pasa su
+propia conexión en `config.attributes["connection"]` (ya dentro de una
+transacción `BEGIN IMMEDIATE`). Desde la línea de comandos (`alembic
+upgrade head`, con el alembic.ini de la raíz) se abre una conexión con la
+URL configurada.
+"""
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from utils.db import DB_URL, Base
+
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def _configure(**kwargs) -> None:
+    # render_as_batch: SQLite no admite la mayoría de los ALTER TABLE
+    context.configure(target_metadata=target_metadata, render_as_batch=True, **kwargs)
+
+
+def run_migrations_offline() -> None:
+    _configure(url=config.get_main_option("sqlalchemy.url") or DB_URL, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    engine = create_engine(config.get_main_option("sqlalchemy.url") or DB_URL)
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,163 @@
+"""Esquema base (tablas existentes antes de las migraciones)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Las bases creadas antes de usar Alembic no tienen historial: esta revisión
+crea solo lo que falta y aplica los ajustes que hacía el arranque anterior
+(tabla TMP_Actividades con numero_act no entero y columnas de la carga
+incremental agregadas a tablas existentes).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _staging_meta() -> list:
+    return [
+        sa.Column("row_key", sa.Text(), nullable=True),
+        sa.Column("row_hash", sa.String(32), nullable=True),
+        sa.Column("row_seq", sa.Integer(), nullable=False, server_default="0"),
+    ]
+
+
+def _tables() -> dict[str, list]:
+    return {
+        "TMP_Actividades": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("numero_responsable", sa.Integer(), nullable=False),
+            sa.Column("fecha", sa.Date(), nullable=True),
+            sa.Column("numero_act", sa.Integer(), nullable=True),
+            sa.Column("asunto", sa.String(512), nullable=True),
+            sa.Column("horas", sa.String(16), nullable=True),
+            *_staging_meta(),
+        ],
+        "TMP_Actividades_Dario": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("size", sa.String(2), nullable=True),
+            sa.Column("numero", sa.Integer(), nullable=True),
+            sa.Column("nombre", sa.Text(), nullable=True),
+            sa.Column("comienzo", sa.DateTime(), nullable=True),
+            sa.Column("fin", sa.DateTime(), nullable=True),
+            sa.Column("sintesis", sa.Text(), nullable=True),
+            sa.Column("observaciones", sa.Text(), nullable=True),
+            sa.Column("vcx_s", sa.Text(), nullable=True),
+            sa.Column("req_sincro", sa.Text(), nullable=True),
+            sa.Column("version", sa.Text(), nullable=True),
+            sa.Column("numero_responsable", sa.Integer(), nullable=False),
+            *_staging_meta(),
+        ],
+        "IMPORT_Jobs": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("kind", sa.String(16), nullable=False),
+            sa.Column("file_path", sa.Text(), nullable=False),
+            sa.Column("params", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(16), nullable=False),
+            sa.Column("message", sa.Text(), nullable=True),
+            sa.Column("inserted", sa.Integer(), nullable=True),
+            sa.Column("worker_pid", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+        ],
+        "IMPORT_Registro": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("sha256", sa.String(64), nullable=False),
+            sa.Column("kind", sa.String(16), nullable=False),
+            sa.Column("params_key", sa.Text(), nullable=False),
+            sa.Column("rows", sa.Integer(), nullable=False),
+            sa.Column("fingerprint", sa.String(64), nullable=False),
+            sa.Column("imported_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("sha256", "kind", "params_key", name="uq_import_registro"),
+        ],
+        "IMPORT_Cargas": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("tabla", sa.String(64), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        ],
+        "PROC_Actividades_Dario": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("source_id", sa.Integer(), nullable=False, unique=True),
+            sa.Column("numero_responsable", sa.Integer(), nullable=False),
+            sa.Column("numero", sa.Integer(), nullable=True),
+            sa.Column("size", sa.String(2), nullable=True),
+            sa.Column("nombre", sa.Text(), nullable=True),
+            sa.Column("fecha", sa.Date(), nullable=True),
+            sa.Column("comienzo", sa.DateTime(), nullable=True),
+            sa.Column("fin", sa.DateTime(), nullable=True),
+            sa.Column("sintesis", sa.Text(), nullable=True),
+            sa.Column("observaciones", sa.Text(), nullable=True),
+            sa.Column("vcx_s", sa.Text(), nullable=True),
+            sa.Column("req_sincro", sa.Text(), nullable=True),
+            sa.Column("version", sa.Text(), nullable=True),
+        ],
+        "PROC_Actividades": [
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("source_id", sa.Integer(), nullable=False, unique=True),
+            sa.Column("numero_responsable", sa.Integer(), nullable=False),
+            sa.Column("fecha", sa.Date(), nullable=True),
+            sa.Column("numero_act", sa.Integer(), nullable=True),
+            sa.Column("asunto", sa.String(512), nullable=True),
+            sa.Column("horas", sa.String(16), nullable=True),
+            sa.Column("dario_id", sa.Integer(), nullable=True),
+            sa.Column("nombre", sa.Text(), nullable=True),
+            sa.Column("size", sa.String(2), nullable=True),
+            sa.Column("version", sa.Text(), nullable=True),
+        ],
+        "PROC_Watermarks": [
+            sa.Column("source", sa.String(64), primary_key=True),
+            sa.Column("last_seq", sa.Integer(), nullable=False),
+            sa.Column("processed_at", sa.DateTime(), nullable=False),
+        ],
+    }
+
+
+_INDEXES = (
+    ("ix_tmp_actividades_row_seq", "TMP_Actividades", ["row_seq"]),
+    ("ix_tmp_actividades_dario_row_seq", "TMP_Actividades_Dario", ["row_seq"]),
+    ("ix_proc_actividades_dario_resp_numero", "PROC_Actividades_Dario", ["numero_responsable", "numero"]),
+    ("ix_proc_actividades_resp_numero", "PROC_Actividades", ["numero_responsable", "numero_act"]),
+    ("ix_proc_actividades_resp_fecha", "PROC_Actividades", ["numero_responsable", "fecha"]),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    # Versiones antiguas guardaban numero_act como texto: la tabla temporal se recrea
+    if "TMP_Actividades" in existing:
+        numero_act = next((c for c in inspector.get_columns("TMP_Actividades") if c["name"] == "numero_act"), None)
+        if numero_act is not None and str(numero_act["type"]).upper() != "INTEGER":
+            op.drop_table("TMP_Actividades")
+            existing.discard("TMP_Actividades")
+
+    for name, columns in _tables().items():
+        if name not in existing:
+            kwargs = {"sqlite_autoincrement": True} if name == "IMPORT_Cargas" else {}
+            op.create_table(name, *columns, **kwargs)
+            continue
+        # Tabla de una versión anterior: agregar las columnas que falten
+        present = {c["name"] for c in inspector.get_columns(name)}
+        for column in columns:
+            if isinstance(column, sa.Column) and column.name not in present:
+                op.add_column(name, column)
+
+    for index, table, columns in _INDEXES:
+        op.create_index(index, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for index, table, _ in reversed(_INDEXES):
+        op.drop_index(index, table_name=table)
+    for name in reversed(list(_tables())):
+        op.drop_table(name)
@@ -0,0 +1,41 @@
+"""Índices de las tablas de staging por responsable, fecha y número
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+La carga incremental filtra y borra por responsable, "Procesar
+importaciones" une CRM y Darío por responsable y número, y las consultas
+filtran por fecha: sin estos índices cada una recorre la tabla completa.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (responsable, número) también sirve para filtrar solo por responsable
+_INDEXES = (
+    ("ix_tmp_actividades_resp_numero", "TMP_Actividades", ["numero_responsable", "numero_act"]),
+    ("ix_tmp_actividades_numero_act", "TMP_Actividades", ["numero_act"]),
+    ("ix_tmp_actividades_fecha", "TMP_Actividades", ["fecha"]),
+    ("ix_tmp_actividades_dario_resp_numero", "TMP_Actividades_Dario", ["numero_responsable", "numero"]),
+    ("ix_tmp_actividades_dario_numero", "TMP_Actividades_Dario", ["numero"]),
+    ("ix_tmp_actividades_dario_comienzo", "TMP_Actividades_Dario", ["comienzo"]),
+)
+
+
+def upgrade() -> None:
+    for index, table, columns in _INDEXES:
+        op.create_index(index, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for index, table, _ in reversed(_INDEXES):
+        op.drop_index(index, table_name=table)
@@ -0,0 +1,70 @@
+"""Duraciones en segundos enteros (horas_seg, duracion_seg)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+TMP_Actividades y PROC_Actividades reemplazan `horas` ("HH:MM:SS") por
+`horas_seg`; las tablas de Darío agregan `duracion_seg` (fin - comienzo).
+Las columnas se completan a partir de los datos existentes y el texto
+"HH:MM:SS" queda como columna derivada de las vistas V_Actividades y
+V_PROC_Actividades.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# "HH:MM:SS" -> segundos (las horas pueden tener más de dos dígitos)
+_HORAS_TO_SECONDS = (
+    "(CAST(substr(horas, 1, instr(horas, ':') - 1) AS INTEGER) * 3600"
+    " + CAST(substr(horas, instr(horas, ':') + 1, 2) AS INTEGER) * 60"
+    " + CAST(substr(horas, instr(horas, ':') + 4, 2) AS INTEGER))"
+)
+_SECONDS_TO_HORAS = "printf('%02d:%02d:%02d', horas_seg / 3600, horas_seg % 3600 / 60, horas_seg % 60)"
+_DURATION = "CAST(round((julianday(fin) - julianday(comienzo)) * 86400) AS INTEGER)"
+
+_VIEWS = {
+    "V_Actividades": (
+        "SELECT id, numero_responsable, fecha, numero_act, asunto, horas_seg, "
+        f"{_SECONDS_TO_HORAS} AS horas FROM TMP_Actividades"
+    ),
+    "V_PROC_Actividades": (
+        "SELECT id, source_id, numero_responsable, fecha, numero_act, asunto, horas_seg, "
+        f"{_SECONDS_TO_HORAS} AS horas, dario_id, nombre, size, version FROM PROC_Actividades"
+    ),
+}
+
+
+def upgrade() -> None:
+    for table in ("TMP_Actividades", "PROC_Actividades"):
+        op.add_column(table, sa.Column("horas_seg", sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {table} SET horas_seg = {_HORAS_TO_SECONDS} WHERE horas IS NOT NULL AND instr(horas, ':') > 0")
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("horas")
+    for table in ("TMP_Actividades_Dario", "PROC_Actividades_Dario"):
+        op.add_column(table, sa.Column("duracion_seg", sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {table} SET duracion_seg = {_DURATION} WHERE comienzo IS NOT NULL AND fin IS NOT NULL")
+    for name, select in _VIEWS.items():
+        op.execute(f"CREATE VIEW IF NOT EXISTS {name} AS {select}")
+
+
+def downgrade() -> None:
+    for name in _VIEWS:
+        op.execute(f"DROP VIEW IF EXISTS {name}")
+    for table in ("TMP_Actividades_Dario", "PROC_Actividades_Dario"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("duracion_seg")
+    for table in ("TMP_Actividades", "PROC_Actividades"):
+        op.add_column(table, sa.Column("horas", sa.String(16), nullable=True))
+        op.execute(f"UPDATE {table} SET horas = {_SECONDS_TO_HORAS} WHERE horas_seg IS NOT NULL")
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("horas_seg")
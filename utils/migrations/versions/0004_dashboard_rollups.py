@@ -0,0 +1,78 @@
+"""Tablas resumen del Dashboard (SUM_)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Horas por responsable y período (día, semana, mes), actividades por número
+y duraciones de Darío por versión. Se completan a partir de las tablas de
+staging existentes; desde aquí las mantiene cada carga (utils.rollups).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_PERIODS = {
+    "dia": "date(fecha)",
+    "semana": "date(fecha, 'weekday 0', '-6 days')",
+    "mes": "date(fecha, 'start of month')",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "SUM_Horas_Responsable",
+        sa.Column("periodo", sa.String(8), primary_key=True),
+        sa.Column("numero_responsable", sa.Integer(), primary_key=True),
+        sa.Column("inicio", sa.Date(), primary_key=True),
+        sa.Column("actividades", sa.Integer(), nullable=False),
+        sa.Column("horas_seg", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "SUM_Actividades_Numero",
+        sa.Column("numero_act", sa.Integer(), primary_key=True),
+        sa.Column("actividades", sa.Integer(), nullable=False),
+        sa.Column("horas_seg", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "SUM_Dario_Version",
+        sa.Column("version", sa.Text(), primary_key=True),
+        sa.Column("actividades", sa.Integer(), nullable=False),
+        sa.Column("duracion_seg", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+    for table in ("SUM_Horas_Responsable", "SUM_Actividades_Numero", "SUM_Dario_Version"):
+        op.execute(f"DELETE FROM {table}")
+    for period, bucket in _PERIODS.items():
+        op.execute(
+            "INSERT INTO SUM_Horas_Responsable (periodo, numero_responsable, inicio, actividades, horas_seg) "
+            f"SELECT '{period}', numero_responsable, {bucket}, COUNT(*), COALESCE(SUM(horas_seg), 0) "
+            f"FROM TMP_Actividades WHERE fecha IS NOT NULL GROUP BY numero_responsable, {bucket}"
+        )
+    op.execute(
+        "INSERT INTO SUM_Actividades_Numero (numero_act, actividades, horas_seg) "
+        "SELECT numero_act, COUNT(*), COALESCE(SUM(horas_seg), 0) "
+        "FROM TMP_Actividades WHERE numero_act IS NOT NULL GROUP BY numero_act"
+    )
+    op.execute(
+        "INSERT INTO SUM_Dario_Version (version, actividades, duracion_seg) "
+        "SELECT COALESCE(version, ''), COUNT(*), COALESCE(SUM(duracion_seg), 0) "
+        "FROM TMP_Actividades_Dario GROUP BY COALESCE(version, '')"
+    )
+
+
+def downgrade() -> None:
+    for table in ("SUM_Dario_Version", "SUM_Actividades_Numero", "SUM_Horas_Responsable"):
+        op.drop_table(table)
@@ -0,0 +1,50 @@
+"""Historial de importaciones con mediciones por etapa (IMPORT_Historial)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+Cada importación (correcta, omitida por estar ya cargada o con error)
+registra sus filas y el tiempo de pared, CPU y memoria de cada etapa (ver
+utils.import_metrics).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "IMPORT_Historial",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("filename", sa.String(512), nullable=True),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=False),
+        sa.Column("rows_read", sa.Integer(), nullable=False),
+        sa.Column("rows_inserted", sa.Integer(), nullable=False),
+        sa.Column("rows_updated", sa.Integer(), nullable=False),
+        sa.Column("rows_deleted", sa.Integer(), nullable=False),
+        sa.Column("rows_skipped", sa.Integer(), nullable=False),
+        sa.Column("wall_seconds", sa.Float(), nullable=False),
+        sa.Column("cpu_seconds", sa.Float(), nullable=False),
+        sa.Column("peak_kb", sa.Integer(), nullable=True),
+        sa.Column("stages", sa.Text(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_import_historial_started_at", "IMPORT_Historial", ["started_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_historial_started_at", table_name="IMPORT_Historial")
+    op.drop_table("IMPORT_Historial")
@@ -0,0 +1,75 @@
+"""Clave de carga única por responsable en las tablas de staging
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+Dos cargas incrementales simultáneas del mismo responsable podían leer las
+mismas claves existentes e insertar ambas las nuevas, dejando `row_key`
+repetidas. Se conservan las filas más antiguas de cada clave repetida y se
+crea un índice único (responsable, row_key); si hubo que borrar filas se
+recalculan las tablas resumen.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_INDEXES = (
+    ("ux_tmp_actividades_row_key", "TMP_Actividades"),
+    ("ux_tmp_actividades_dario_row_key", "TMP_Actividades_Dario"),
+)
+
+_PERIODS = {
+    "dia": "date(fecha)",
+    "semana": "date(fecha, 'weekday 0', '-6 days')",
+    "mes": "date(fecha, 'start of month')",
+}
+
+
+def _rebuild_rollups() -> None:
+    # Mismo cálculo que la migración 0004
+    for table in ("SUM_Horas_Responsable", "SUM_Actividades_Numero", "SUM_Dario_Version"):
+        op.execute(f"DELETE FROM {table}")
+    for period, bucket in _PERIODS.items():
+        op.execute(
+            "INSERT INTO SUM_Horas_Responsable (periodo, numero_responsable, inicio, actividades, horas_seg) "
+            f"SELECT '{period}', numero_responsable, {bucket}, COUNT(*), COALESCE(SUM(horas_seg), 0) "
+            f"FROM TMP_Actividades WHERE fecha IS NOT NULL GROUP BY numero_responsable, {bucket}"
+        )
+    op.execute(
+        "INSERT INTO SUM_Actividades_Numero (numero_act, actividades, horas_seg) "
+        "SELECT numero_act, COUNT(*), COALESCE(SUM(horas_seg), 0) "
+        "FROM TMP_Actividades WHERE numero_act IS NOT NULL GROUP BY numero_act"
+    )
+    op.execute(
+        "INSERT INTO SUM_Dario_Version (version, actividades, duracion_seg) "
+        "SELECT COALESCE(version, ''), COUNT(*), COALESCE(SUM(duracion_seg), 0) "
+        "FROM TMP_Actividades_Dario GROUP BY COALESCE(version, '')"
+    )
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    removed = 0
+    for _, table in _INDEXES:
+        removed += conn.exec_driver_sql(
+            f"DELETE FROM {table} WHERE row_key IS NOT NULL AND id NOT IN ("
+            f"SELECT MIN(id) FROM {table} WHERE row_key IS NOT NULL GROUP BY numero_responsable, row_key)"
+        ).rowcount
+    if removed:
+        _rebuild_rollups()
+    for index, table in _INDEXES:
+        op.create_index(index, table, ["numero_responsable", "row_key"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for index, table in reversed(_INDEXES):
+        op.drop_index(index, table_name=table)
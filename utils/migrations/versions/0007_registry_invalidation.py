@@ -0,0 +1,45 @@
+"""Invalidación del registro de importaciones ante ediciones de staging
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+La huella de la tabla destino (ver utils.import_registry) no cambia si una
+fila se modifica en su lugar sin pasar por una carga, que es la que
+renueva `row_seq`. Estos triggers borran las entradas del registro del
+tipo afectado ante cualquier UPDATE que no renueve `row_seq` (ediciones
+manuales, scripts), venga de la aplicación o de otro cliente SQLite.
+También borran el `row_hash` de la fila editada: la próxima carga
+incremental la ve distinta y la vuelve a escribir desde el archivo.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TRIGGERS = (
+    ("trg_tmp_actividades_registro", "TMP_Actividades", "crm"),
+    ("trg_tmp_actividades_dario_registro", "TMP_Actividades_Dario", "dario"),
+)
+
+
+def upgrade() -> None:
+    for trigger, table, kind in _TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER UPDATE ON {table} "
+            f"WHEN NEW.row_seq IS OLD.row_seq "
+            f"BEGIN DELETE FROM IMPORT_Registro WHERE kind = '{kind}'; "
+            f"UPDATE {table} SET row_hash = NULL WHERE id = NEW.id; END"
+        )
+
+
+def downgrade() -> None:
+    for trigger, _, _ in reversed(_TRIGGERS):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
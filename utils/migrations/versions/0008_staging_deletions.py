@@ -0,0 +1,61 @@
+"""Registro de filas de staging borradas
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+"Procesar importaciones" buscaba las filas borradas comparando las tablas
+PROC_ completas contra staging en cada corrida. Desde esta revisión cada
+carga anota en IMPORT_Bajas los ids que borra, con su número de carga, y
+la consolidación solo lee las bajas posteriores a su marca. Los hechos
+cuya fila de staging ya no existe (bajas anteriores a esta revisión) se
+anotan ahora con una carga nueva para que la próxima corrida los borre.
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_SOURCES = (
+    ("TMP_Actividades", "PROC_Actividades"),
+    ("TMP_Actividades_Dario", "PROC_Actividades_Dario"),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "IMPORT_Bajas",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("tabla", sa.String(64), nullable=False),
+        sa.Column("source_id", sa.Integer(), nullable=False),
+        sa.Column("row_seq", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_import_bajas_tabla_seq", "IMPORT_Bajas", ["tabla", "row_seq"], if_not_exists=True)
+
+    conn = op.get_bind()
+    for source, proc in _SOURCES:
+        orphans = f"FROM {proc} f WHERE NOT EXISTS (SELECT 1 FROM {source} s WHERE s.id = f.source_id)"
+        if conn.execute(sa.text(f"SELECT EXISTS (SELECT 1 {orphans})")).scalar():
+            seq = conn.execute(
+                sa.text("INSERT INTO IMPORT_Cargas (tabla, created_at) VALUES (:tabla, :now)"),
+                {"tabla": source, "now": datetime.now()},
+            ).lastrowid
+            conn.execute(
+                sa.text(f"INSERT INTO IMPORT_Bajas (tabla, source_id, row_seq) SELECT :tabla, f.source_id, :seq {orphans}"),
+                {"tabla": source, "seq": seq},
+            )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_import_bajas_tabla_seq", table_name="IMPORT_Bajas")
+    op.drop_table("IMPORT_Bajas")
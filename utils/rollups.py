@@ -0,0 +1,308 @@
+"""Tablas resumen del Dashboard, mantenidas de forma incremental en cada carga.
+
+Las tablas SUM_ guardan un acumulado por partición (responsable y período,
+número de actividad, versión de Darío). La carga incremental las ajusta en
+su misma transacción, solo en las particiones que tocan las filas que
+cambian:
+
+1. Antes de borrar o actualizar filas de staging se restan sus aportes
+   (`retract`, con los ids afectados).
+2. Después de insertar se suman los aportes de las filas de la carga
+   (`add_load`, por `row_seq`: las nuevas y las actualizadas).
+3. Las particiones que quedan sin actividades se eliminan al restar,
+   buscándolas solo entre las que tocan las filas afectadas.
+
+Cada paso es un INSERT…SELECT … GROUP BY con upsert que suma el delta, de
+modo que el Dashboard lee O(particiones) en lugar de agregar las tablas de
+staging en cada consulta.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from .db import (
+    SUMActividadesNumero,
+    SUMDarioVersion,
+    SUMHorasResponsable,
+    TMPActividades,
+    TMPActividadesDario,
+    get_session_factory,
+)
+
+
+# Primer día de cada período (semanas de lunes a domingo)
+PERIODS = {
+    "dia": "date(s.fecha)",
+    "semana": "date(s.fecha, 'weekday 0', '-6 days')",
+    "mes": "date(s.fecha, 'start of month')",
+}
+PERIOD_LABELS = {"dia": "Día", "semana": "Semana", "mes": "Mes"}
+
+# Filas de la carga en curso, o filas afectadas (ids en la tabla temporal)
+_BY_SEQ = "s.row_seq = :seq"
+_BY_IDS = "s.id IN (SELECT id FROM temp.rollup_ids)"
+_ALL = "1 = 1"
+
+# Máximo de filas por executemany al cargar ids afectados
+_IDS_CHUNK = 5000
+
+
+def _hours_statements(where: str) -> list[str]:
+    return [
+        f"""
+        INSERT INTO SUM_Horas_Responsable (periodo, numero_responsable, inicio, actividades, horas_seg)
+        SELECT '{period}', s.numero_responsable, {bucket}, :sign * COUNT(*), :sign * COALESCE(SUM(s.horas_seg), 0)
+        FROM TMP_Actividades s
+        WHERE {where} AND s.fecha IS NOT NULL
+        GROUP BY s.numero_responsable, {bucket}
+        ON CONFLICT (periodo, numero_responsable, inicio) DO UPDATE SET
+            actividades = actividades + excluded.actividades, horas_seg = horas_seg + excluded.horas_seg
+        """
+        for period, bucket in PERIODS.items()
+    ]
+
+
+def _numero_statements(where: str) -> list[str]:
+    return [
+        f"""
+        INSERT INTO SUM_Actividades_Numero (numero_act, actividades, horas_seg)
+        SELECT s.numero_act, :sign * COUNT(*), :sign * COALESCE(SUM(s.horas_seg), 0)
+        FROM TMP_Actividades s
+        WHERE {where} AND s.numero_act IS NOT NULL
+        GROUP BY s.numero_act
+        ON CONFLICT (numero_act) DO UPDATE SET
+            actividades = actividades + excluded.actividades, horas_seg = horas_seg + excluded.horas_seg
+        """
+    ]
+
+
+def _hours_prune(where: str) -> list[str]:
+    return [
+        f"""
+        DELETE FROM SUM_Horas_Responsable
+        WHERE periodo = '{period}' AND actividades <= 0 AND (numero_responsable, inicio) IN (
+            SELECT s.numero_responsable, {bucket} FROM TMP_Actividades s WHERE {where} AND s.fecha IS NOT NULL
+        )
+        """
+        for period, bucket in PERIODS.items()
+    ]
+
+
+def _numero_prune(where: str) -> list[str]:
+    return [
+        f"""
+        DELETE FROM SUM_Actividades_Numero
+        WHERE actividades <= 0 AND numero_act IN (SELECT s.numero_act FROM TMP_Actividades s WHERE {where})
+        """
+    ]
+
+
+def _version_statements(where: str) -> list[str]:
+    return [
+        f"""
+        INSERT INTO SUM_Dario_Version (version, actividades, duracion_seg)
+        SELECT COALESCE(s.version, ''), :sign * COUNT(*), :sign * COALESCE(SUM(s.duracion_seg), 0)
+        FROM TMP_Actividades_Dario s
+        WHERE {where}
+        GROUP BY COALESCE(s.version, '')
+        ON CONFLICT (version) DO UPDATE SET
+            actividades = actividades + excluded.actividades, duracion_seg = duracion_seg + excluded.duracion_seg
+        """
+    ]
+
+
+def _version_prune(where: str) -> list[str]:
+    return [
+        f"""
+        DELETE FROM SUM_Dario_Version
+        WHERE actividades <= 0
+          AND version IN (SELECT COALESCE(s.version, '') FROM TMP_Actividades_Dario s WHERE {where})
+        """
+    ]
+
+
+@dataclass(frozen=True)
+class _Rollups:
+    """Tablas resumen que dependen de una tabla de staging y sus sentencias de delta."""
+
+    tables: tuple[str, ...]
+    by_seq: tuple
+    by_ids: tuple
+    by_all: tuple
+    # Borra las particiones vacías entre las que tocan las filas afectadas
+    prune_ids: tuple
+
+
+def _rollups(tables: tuple[str, ...], builders: tuple, pruners: tuple) -> _Rollups:
+    def build(where: str, builders: tuple) -> tuple:
+        return tuple(text(sql) for builder in builders for sql in builder(where))
+
+    return _Rollups(
+        tables, build(_BY_SEQ, builders), build(_BY_IDS, builders), build(_ALL, builders), build(_BY_IDS, pruners)
+    )
+
+
+_ROLLUPS = {
+    TMPActividades.__tablename__: _rollups(
+        (SUMHorasResponsable.__tablename__, SUMActividadesNumero.__tablename__),
+        (_hours_statements, _numero_statements),
+        (_hours_prune, _numero_prune),
+    ),
+    TMPActividadesDario.__tablename__: _rollups(
+        (SUMDarioVersion.__tablename__,), (_version_statements,), (_version_prune,)
+    ),
+}
+
+_CREATE_IDS = text("CREATE TEMP TABLE IF NOT EXISTS rollup_ids (id INTEGER PRIMARY KEY)")
+_INSERT_ID = text("INSERT OR IGNORE INTO temp.rollup_ids (id) VALUES (:id)")
+_CLEAR_IDS = text("DELETE FROM temp.rollup_ids")
+
+
+def retract(session: Session, model, ids: Sequence[int]) -> None:
+    """Resta de las tablas resumen los aportes de las filas `ids` de `model` (antes de borrarlas o actualizarlas)."""
+    rollups = _ROLLUPS.get(model.__tablename__)
+    if rollups is None or not ids:
+        return
+    session.execute(_CREATE_IDS)
+    session.execute(_CLEAR_IDS)
+    for start in range(0, len(ids), _IDS_CHUNK):
+        session.execute(_INSERT_ID, [{"id": row_id} for row_id in ids[start : start + _IDS_CHUNK]])
+    for stmt in rollups.by_ids:
+        session.execute(stmt, {"sign": -1})
+    for stmt in rollups.prune_ids:
+        session.execute(stmt)
+    session.execute(_CLEAR_IDS)
+
+
+def add_load(session: Session, model, seq: int) -> None:
+    """Suma a las tablas resumen las filas de `model` escritas por la carga `seq` (nuevas y actualizadas)."""
+    rollups = _ROLLUPS.get(model.__tablename__)
+    if rollups is None:
+        return
+    for stmt in rollups.by_seq:
+        session.execute(stmt, {"sign": 1, "seq": seq})
+
+
+def reset(session: Session, model) -> None:
+    """Vacía las tablas resumen de `model` (la tabla de staging se va a vaciar)."""
+    rollups = _ROLLUPS.get(model.__tablename__)
+    if rollups is None:
+        return
+    for table in rollups.tables:
+        session.execute(text(f"DELETE FROM {table}"))
+
+
+def rebuild(session: Session, model) -> None:
+    """Recalcula desde cero las tablas resumen de `model` (reparación; el llamador hace el commit)."""
+    rollups = _ROLLUPS.get(model.__tablename__)
+    if rollups is None:
+        return
+    reset(session, model)
+    for stmt in rollups.by_all:
+        session.execute(stmt, {"sign": 1})
+
+
+# --- Lecturas del Dashboard (recorren solo las tablas resumen) ---
+
+
+@dataclass
+class Overview:
+    """Totales de la vista general del Dashboard."""
+
+    actividades: int = 0
+    horas_seg: int = 0
+    responsables: int = 0
+    numeros: int = 0
+    dario_actividades: int = 0
+    dario_duracion_seg: int = 0
+    versiones: int = 0
+
+
+def overview() -> Overview:
+    """Totales de actividades CRM (con fecha) y de Darío."""
+    hours = SUMHorasResponsable.__table__
+    numeros = SUMActividadesNumero.__table__
+    versions = SUMDarioVersion.__table__
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        actividades, horas_seg, responsables = session.execute(
+            select(
+                func.coalesce(func.sum(hours.c.actividades), 0),
+                func.coalesce(func.sum(hours.c.horas_seg), 0),
+                func.count(hours.c.numero_responsable.distinct()),
+            ).where(hours.c.periodo == "mes")
+        ).one()
+        numeros_count = session.execute(select(func.count()).select_from(numeros)).scalar()
+        dario_actividades, dario_duracion, versiones = session.execute(
+            select(
+                func.coalesce(func.sum(versions.c.actividades), 0),
+                func.coalesce(func.sum(versions.c.duracion_seg), 0),
+                func.count(),
+            )
+        ).one()
+    finally:
+        session.close()
+    return Overview(
+        actividades=actividades,
+        horas_seg=horas_seg,
+        responsables=responsables,
+        numeros=numeros_count,
+        dario_actividades=dario_actividades,
+        dario_duracion_seg=dario_duracion,
+        versiones=versiones,
+    )
+
+
+def hours_by_responsable(
+    periodo: str = "semana", numero_responsable: Optional[int] = None, limit: int = 200
+) -> list[tuple]:
+    """(responsable, inicio, actividades, horas_seg) de los períodos más recientes."""
+    if periodo not in PERIODS:
+        raise ValueError(f"Período desconocido: {periodo}")
+    table = SUMHorasResponsable.__table__
+    stmt = select(table.c.numero_responsable, table.c.inicio, table.c.actividades, table.c.horas_seg).where(
+        table.c.periodo == periodo
+    )
+    if numero_responsable is not None:
+        stmt = stmt.where(table.c.numero_responsable == numero_responsable)
+    stmt = stmt.order_by(table.c.inicio.desc(), table.c.numero_responsable).limit(limit)
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        return [tuple(row) for row in session.execute(stmt)]
+    finally:
+        session.close()
+
+
+def top_numeros(limit: int = 20) -> list[tuple]:
+    """(numero_act, actividades, horas_seg) de los números con más actividades."""
+    table = SUMActividadesNumero.__table__
+    stmt = (
+        select(table.c.numero_act, table.c.actividades, table.c.horas_seg)
+        .order_by(table.c.actividades.desc(), table.c.numero_act)
+        .limit(limit)
+    )
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        return [tuple(row) for row in session.execute(stmt)]
+    finally:
+        session.close()
+
+
+def durations_by_version() -> list[tuple]:
+    """(version, actividades, duracion_seg) de las actividades de Darío, por versión."""
+    table = SUMDarioVersion.__table__
+    stmt = select(table.c.version, table.c.actividades, table.c.duracion_seg).order_by(table.c.version)
+    SessionFactory = get_session_factory()
+    session = SessionFactory()
+    try:
+        return [tuple(row) for row in session.execute(stmt)]
+    finally:
+        session.close()
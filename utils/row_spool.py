@@ -0,0 +1,96 @@
+"""Filas interpretadas volcadas a un archivo temporal, por lotes.
+
+Permite separar la lectura de una planilla (lenta, sin tocar la base) de su
+escritura: las filas se serializan con pickle a medida que llegan y después
+se vuelven a recorrer por lotes, sin retenerlas en memoria. El archivo
+puede pasar de un proceso a otro por su ruta (ver `batch_import`).
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+from typing import Iterable, Iterator, Optional
+
+
+# Directorio de los archivos temporales de filas
+ROW_SPOOL_DIR = os.environ.get("ROW_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "setup1_rows"))
+
+
+class RowSpool:
+    """Lotes de filas en un archivo temporal: se escriben una vez y se releen en orden.
+
+    `close()` elimina el archivo (también al salir del bloque `with`), salvo
+    que otro componente haya tomado su propiedad con `detach()`.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.rows = 0
+        if path is None:
+            os.makedirs(ROW_SPOOL_DIR, exist_ok=True)
+            fd, path = tempfile.mkstemp(suffix=".rows", dir=ROW_SPOOL_DIR)
+            self._file = os.fdopen(fd, "wb")
+        else:
+            self._file = None
+        self.path: Optional[str] = path
+
+    @classmethod
+    def open(cls, path: str) -> "RowSpool":
+        """Toma un archivo ya escrito (p. ej. por otro proceso) para leerlo y eliminarlo."""
+        return cls(path)
+
+    def write(self, batch: list) -> None:
+        pickle.dump(batch, self._file, pickle.HIGHEST_PROTOCOL)
+        self.rows += len(batch)
+
+    def extend(self, rows: Iterable, batch_size: int) -> None:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+
+    def finish(self) -> None:
+        """Termina la escritura."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def batches(self) -> Iterator[list]:
+        """Lotes en el orden en que se escribieron (se puede recorrer más de una vez)."""
+        self.finish()
+        with open(self.path, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def __iter__(self) -> Iterator:
+        for batch in self.batches():
+            yield from batch
+
+    def detach(self) -> Optional[str]:
+        """Cede la propiedad del archivo: `close()` ya no lo eliminará."""
+        self.finish()
+        path, self.path = self.path, None
+        return path
+
+    def close(self) -> None:
+        self.finish()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "RowSpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,184 @@
+"""Workbooks sintéticos con el formato de los exports CRM y de Darío.
+
+Sirven para medir y probar los importadores sin datos reales:
+
+- CRM: título en A1, "Responsable:  <número>  <nombre>" en A3, encabezados
+  en la fila 4 (Fecha, Número, Cliente, Asunto, ... Hs en J, Min en L),
+  encabezados repetidos por página (con A vacía, como en el export),
+  separadores vacíos y una fila final de totales que corta la lectura.
+- Darío: encabezados en la fila 1 y columnas fijas desde A, con algunas
+  filas sin Size/Número/Nombre que el importador descarta.
+
+Los datos salen de un generador con semilla: el mismo (filas, semilla)
+produce el mismo contenido. El formato se elige por extensión: .xlsx se
+escribe con openpyxl en modo streaming (write_only); .xls requiere el
+paquete opcional `xlwt` y admite como máximo 65.536 filas por hoja (el
+millón de filas solo cabe en .xlsx).
+
+Uso:
+    python -m utils.synthetic_workbooks crm /tmp/crm.xlsx --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+from openpyxl import Workbook
+
+try:
+    import xlwt
+except ImportError:  # Dependencia opcional (solo para generar .xls)
+    xlwt = None
+
+
+KINDS = ("crm", "dario")
+
+# Filas de datos entre encabezados repetidos y entre separadores vacíos (CRM)
+CRM_PAGE_ROWS = 45
+CRM_BLANK_EVERY = 97
+# Cada cuántas filas una fila de Darío viene sin Size/Número/Nombre
+DARIO_EMPTY_EVERY = 41
+
+# Límite de filas de una hoja .xls (BIFF8) y .xlsx
+XLS_MAX_ROWS = 65536
+XLSX_MAX_ROWS = 1_048_576
+
+CRM_HEADERS = ("Fecha", "Número", "Cliente", "Asunto", "Tipo", "Estado", "Contacto", "Canal", "Prioridad", "Hs", "", "Min")
+DARIO_HEADERS = (
+    "Size", "Número", "Nombre", "Comienzo", "Fin", "Síntesis", "Observaciones", "VCX-S", "Req. sincro", "Versión",
+)
+
+_CLIENTES = ("Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka")
+_ASUNTOS = ("Reunión de seguimiento", "Soporte", "Instalación", "Capacitación", "Revisión", "Consulta", "Incidente")
+_ESTADOS = ("Abierta", "Cerrada", "Pendiente")
+_CANALES = ("Teléfono", "Email", "Presencial", "Remoto")
+_SIZES = ("XS", "S", "M", "L", "XL")
+_VERSIONS = ("1.0", "1.1", "1.2", "2.0", "2.1")
+
+
+def crm_rows(rows: int, seed: int = 0, responsable: int = 195, nombre: str = "Dario") -> Iterator[tuple]:
+    """Filas (tuplas de valores, desde la fila 1) de un export CRM con `rows` actividades."""
+    rng = random.Random(seed)
+    yield ("Informe de actividades por responsable",)
+    yield ()
+    yield (f"Responsable:     {responsable}     {nombre}",)
+    yield CRM_HEADERS
+    day = datetime(2024, 1, 1)
+    for i in range(rows):
+        if i and i % CRM_PAGE_ROWS == 0:
+            yield (None, *CRM_HEADERS[1:])
+        if i and i % CRM_BLANK_EVERY == 0:
+            yield ()
+        if rng.random() < 0.3:
+            day += timedelta(days=1)
+        numero = f"{rng.randint(2000, 2025)}-{rng.randint(0, 999_999):07,d}".replace(",", ".")
+        yield (
+            day,
+            numero,
+            rng.choice(_CLIENTES),
+            f"{rng.choice(_ASUNTOS)} {i}",
+            "Visita",
+            rng.choice(_ESTADOS),
+            f"Contacto {rng.randint(1, 500)}",
+            rng.choice(_CANALES),
+            rng.randint(1, 3),
+            rng.randint(0, 8),
+            None,
+            rng.choice((0, 15, 30, 45, 90)),
+        )
+    yield ("Total", None, None, None, None, None, None, None, None, None, None, None)
+    # Después de la fila de totales no se lee nada más
+    yield (day, "2024-000.001", "Acme", "Fuera del informe")
+
+
+def dario_rows(rows: int, seed: int = 0) -> Iterator[tuple]:
+    """Filas de una planilla de Darío (encabezados + `rows` filas de datos)."""
+    rng = random.Random(seed)
+    yield DARIO_HEADERS
+    start = datetime(2024, 1, 1, 8)
+    for i in range(rows):
+        start += timedelta(minutes=rng.randint(10, 240))
+        if i and i % DARIO_EMPTY_EVERY == 0:
+            yield (None, None, None, start)
+            continue
+        yield (
+            rng.choice(_SIZES),
+            rng.randint(1, 999_999),
+            f"Tarea {i}",
+            start,
+            start + timedelta(minutes=rng.randint(5, 480)),
+            f"Síntesis {rng.randint(1, 9999)}",
+            None if rng.random() < 0.7 else "Observación",
+            rng.choice(("Sí", "No")),
+            rng.choice(("Sí", "No")),
+            rng.choice(_VERSIONS),
+        )
+
+
+def _write_xlsx(path: Path, rows: Iterator[tuple]) -> None:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Actividades")
+    for r, row in enumerate(rows):
+        if r >= XLSX_MAX_ROWS:
+            raise ValueError(f"Una hoja .xlsx admite como máximo {XLSX_MAX_ROWS} filas.")
+        ws.append(row)
+    wb.save(path)
+
+
+def _write_xls(path: Path, rows: Iterator[tuple]) -> None:
+    if xlwt is None:
+        raise RuntimeError("Generar .xls requiere el paquete 'xlwt' (pip install xlwt).")
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("Actividades")
+    # Sin estilo de fecha xlwt escribiría los datetime como seriales sin formato
+    date_style = xlwt.easyxf(num_format_str="DD/MM/YYYY HH:MM")
+    for r, row in enumerate(rows):
+        if r >= XLS_MAX_ROWS:
+            raise ValueError(f"Una hoja .xls admite como máximo {XLS_MAX_ROWS} filas; use .xlsx.")
+        for c, value in enumerate(row):
+            if value is None or value == "":
+                continue
+            if isinstance(value, datetime):
+                sheet.write(r, c, value, date_style)
+            else:
+                sheet.write(r, c, value)
+    book.save(str(path))
+
+
+def write_workbook(kind: str, path, rows: int, seed: int = 0, responsable: int = 195) -> Path:
+    """Escribe un workbook `kind` ("crm" o "dario") con `rows` filas de datos en `path` (.xls o .xlsx)."""
+    path = Path(path)
+    if kind == "crm":
+        data = crm_rows(rows, seed, responsable)
+    elif kind == "dario":
+        data = dario_rows(rows, seed)
+    else:
+        raise ValueError(f"Tipo de workbook desconocido: {kind}")
+    suffix = path.suffix.lower()
+    if suffix == ".xlsx":
+        _write_xlsx(path, data)
+    elif suffix == ".xls":
+        _write_xls(path, data)
+    else:
+        raise ValueError(f"Extensión no soportada: {suffix}")
+    return path
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="Archivo de salida (.xls o .xlsx)")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--responsable", type=int, default=195, help="Número en A3 (solo CRM)")
+    args = parser.parse_args(argv)
+    path = write_workbook(args.kind, args.path, args.rows, args.seed, args.responsable)
+    print(f"{path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
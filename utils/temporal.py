@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Union
+
+
+# Sistemas de fecha de Excel (ver `SheetRows.epoch`) y el día 0 de cada uno
+EPOCH_WINDOWS = "windows"
+EPOCH_MAC = "mac"
+_EPOCH_ORDINALS = {
+    EPOCH_WINDOWS: date(1899, 12, 30).toordinal(),
+    EPOCH_MAC: date(1904, 1, 1).toordinal(),
+}
+
+# Formatos de texto admitidos, en orden de preferencia
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%m/%d/%Y")
+DATETIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+# Filas que se examinan para detectar el formato de una columna
+SAMPLE_ROWS = 50
+# Textos y días distintos retenidos en memoria
+TEXT_CACHE_SIZE = 8192
+DAY_CACHE_SIZE = 8192
+
+_MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+@lru_cache(maxsize=DAY_CACHE_SIZE)
+def serial_day(day: int, epoch: str = EPOCH_WINDOWS) -> date:
+    """Fecha del serial entero `day` de Excel según el sistema `epoch`.
+
+    En el sistema 1900 los seriales menores a 60 se corrigen por el 29/02/1900
+    inexistente que Excel cuenta.
+    """
+    ordinal = _EPOCH_ORDINALS[epoch] + day
+    if epoch == EPOCH_WINDOWS and day < 60:
+        ordinal += 1
+    return date.fromordinal(ordinal)
+
+
+def serial_to_datetime(value: Union[int, float], epoch: str = EPOCH_WINDOWS) -> Optional[datetime]:
+    """Convierte un serial de Excel a datetime (None si no representa una fecha)."""
+    if value < 1:
+        # Seriales menores a 1 son solo una hora del día
+        return None
+    day, fraction = divmod(value, 1)
+    try:
+        base = serial_day(int(day), epoch)
+    except (OverflowError, ValueError):
+        return None
+    result = datetime(base.year, base.month, base.day)
+    if fraction:
+        result += timedelta(milliseconds=round(fraction * _MS_PER_DAY))
+    return result
+
+
+def duration_seconds(start: Optional[datetime], end: Optional[datetime]) -> Optional[int]:
+    """Segundos (redondeados) entre `start` y `end`; None si falta alguno de los dos."""
+    if start is None or end is None:
+        return None
+    return round((end - start).total_seconds())
+
+
+def format_duration(seconds: int) -> str:
+    """Segundos -> "HH:MM:SS" (las horas pueden superar 24)."""
+    sign = "-" if seconds < 0 else ""
+    hours, rest = divmod(abs(seconds), 3600)
+    return f"{sign}{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _parse_text(text: str, formats: tuple[str, ...]) -> Optional[datetime]:
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def sniff_format(values: Iterable, formats: Sequence[str]) -> Optional[str]:
+    """Formato de `formats` que interpreta más textos de la muestra `values`.
+
+    Ante un empate gana el primero en `formats`; devuelve None si la muestra
+    no tiene textos o ninguno se puede interpretar.
+    """
+    texts = {value for value in values if isinstance(value, str) and value != ""}
+    best, best_hits = None, 0
+    for fmt in formats:
+        hits = sum(1 for text in texts if _parse_text(text, (fmt,)) is not None)
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+            if hits == len(texts):
+                break
+    return best
+
+
+def sniff_serial(values: Iterable) -> bool:
+    """True si la muestra `values` es una columna de seriales de Excel.
+
+    Lo es si tiene más números que fechas con tipo y textos; los vacíos no
+    cuentan.
+    """
+    numbers = others = 0
+    for value in values:
+        if value is None or value == "" or isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            numbers += 1
+        else:
+            others += 1
+    return numbers > others
+
+
+class TemporalColumn:
+    """Conversor de los valores de una columna a date (`as_date`) o datetime.
+
+    - datetime/date: se devuelven tal cual (ajustados al tipo pedido)
+    - números: seriales de Excel en el sistema `epoch`, vía `serial_day`
+    - textos: primero con el formato detectado en `sample`, luego el resto
+      de `formats`; cada texto distinto se interpreta una sola vez
+    - cualquier otro valor, o uno que no se pueda interpretar -> None
+
+    `is_date` es la prueba estricta según lo detectado en `sample`.
+    """
+
+    def __init__(
+        self,
+        formats: Sequence[str],
+        epoch: str = EPOCH_WINDOWS,
+        as_date: bool = False,
+        sample: Iterable = (),
+    ):
+        if epoch not in _EPOCH_ORDINALS:
+            raise ValueError(f"Sistema de fechas desconocido: {epoch}")
+        self.epoch = epoch
+        self.as_date = as_date
+        detected = sniff_format(sample, formats)
+        self.format = detected
+        self.formats = tuple(dict.fromkeys(((detected,) if detected else ()) + tuple(formats)))
+        self.serial = sniff_serial(sample)
+
+    def is_date(self, value) -> bool:
+        """True si `value` tiene el formato de fecha de la columna.
+
+        Las fechas con tipo siempre lo tienen; los números solo si la muestra
+        era de seriales (`serial`) y los textos solo con el formato detectado
+        (con cualquiera de `formats` si la muestra no tenía textos). Así un
+        total o un pie con un número no pasa por un serial.
+        """
+        if isinstance(value, (datetime, date)):
+            return True
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, (int, float)):
+            return self.serial and self(value) is not None
+        if isinstance(value, str):
+            return _parse_text(value, (self.format,) if self.format else self.formats) is not None
+        return False
+
+    def __call__(self, value) -> Union[date, datetime, None]:
+        if value is None or value == "":
+            return None
+        if isinstance(value, datetime):
+            return value.date() if self.as_date else value
+        if isinstance(value, date):
+            return value if self.as_date else datetime(value.year, value.month, value.day)
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int) and self.as_date:
+            # Caso habitual: serial entero de una fecha sin hora
+            if value < 1:
+                return None
+            try:
+                return serial_day(value, self.epoch)
+            except (OverflowError, ValueError):
+                return None
+        if isinstance(value, (int, float)):
+            result = serial_to_datetime(value, self.epoch)
+        else:
+            result = _parse_text(str(value), self.formats)
+        if result is not None and self.as_date:
+            return result.date()
+        return result
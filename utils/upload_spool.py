@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+
+# Hasta este tamaño el archivo subido se procesa desde memoria; por encima se vuelca a disco
+SPOOL_MAX_MEMORY = int(os.environ.get("UPLOAD_SPOOL_MAX_MEMORY", 16 * 1024 * 1024))
+# Tamaño de cada lectura del archivo subido
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Directorio para los archivos volcados a disco
+SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "setup1_uploads"))
+
+
+class UploadSpool:
+    """Contenido de un archivo subido, en memoria o en disco según su tamaño.
+
+    Se escribe por bloques; al superar `max_memory` el contenido pasa a un
+    archivo en `SPOOL_DIR`. `close()` elimina ese archivo (también al salir
+    del bloque `with`), salvo que otro componente haya tomado su propiedad
+    con `detach()`.
+    """
+
+    def __init__(self, filename: str, max_memory: int = SPOOL_MAX_MEMORY):
+        self.filename = filename
+        self.suffix = Path(filename).suffix.lower()
+        self.max_memory = max_memory
+        self.size = 0
+        self.path: Optional[str] = None
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file: Optional[BinaryIO] = None
+
+    @classmethod
+    async def from_upload(cls, upload, filename: str, max_memory: int = SPOOL_MAX_MEMORY) -> "UploadSpool":
+        """Lee un `UploadFile` (Reflex/Starlette) por bloques sin cargarlo entero en memoria."""
+        spool = cls(filename, max_memory=max_memory)
+        try:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+            spool.finish()
+        except Exception:
+            spool.close()
+            raise
+        return spool
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def write(self, chunk: bytes) -> None:
+        if self._buffer is not None and self.size + len(chunk) > self.max_memory:
+            self._rollover()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+        self.size += len(chunk)
+
+    def _rollover(self) -> None:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(suffix=self.suffix, dir=SPOOL_DIR)
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = None
+
+    def finish(self) -> None:
+        """Termina la escritura (cierra el archivo en disco si lo hay)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def getvalue(self) -> bytes:
+        """Contenido en memoria (solo si no se volcó a disco)."""
+        if self._buffer is None:
+            raise RuntimeError("El archivo subido está en disco; usar `path`.")
+        return self._buffer.getvalue()
+
+    def source(self) -> Union[str, BinaryIO]:
+        """Origen para los importadores: ruta en disco o buffer en memoria."""
+        if self.path is not None:
+            return self.path
+        return io.BytesIO(self.getvalue())
+
+    def detach(self) -> Optional[str]:
+        """Cede la propiedad del archivo en disco: `close()` ya no lo eliminará."""
+        path, self.path = self.path, None
+        self._buffer = None
+        return path
+
+    def close(self) -> None:
+        self.finish()
+        self._buffer = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "UploadSpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
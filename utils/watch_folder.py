@@ -0,0 +1,288 @@
+"""Servicio que vigila una carpeta e importa los exports que aparecen o cambian.
+
+Cada `--interval` segundos se recorre la carpeta buscando .xls/.xlsx (sin
+los archivos de bloqueo "~$..." de Excel). Un archivo se considera completo
+cuando su tamaño y fecha de modificación no cambian durante `--settle`
+segundos: así no se lee un export que todavía se está copiando. Si aun así
+no se puede abrir, se vuelve a intentar cuando cambie.
+
+El tipo de cada archivo se detecta por su contenido (ver `detect_kind`):
+la planilla de Darío tiene sus encabezados fijos en la fila 1 y el export
+CRM tiene Fecha/Número/Asunto en las primeras filas. Las planillas de
+Darío no indican el responsable: se asigna con `--responsable`, igual que
+en `import_cli`.
+
+Cada archivo se registra como un trabajo de IMPORT_Jobs (queda en el
+historial como los subidos desde la aplicación) y se ejecuta con
+`import_jobs.run_job` en un pool propio; `--concurrency` limita cuántos
+corren a la vez. Por defecto solo se importan los archivos nuevos o
+modificados desde el arranque; `--initial` importa también los presentes.
+
+Uso:
+    python -m utils.watch_folder /srv/exports --responsable 195 --concurrency 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .header_index import norm_text
+from .import_cli import EXTENSIONS, parse_responsables, responsable_for
+from .import_jobs import IMPORT_WORKER_MODE, IMPORT_WORKERS, JOB_DONE, create_job, get_job, run_job
+from .incremental_load import LOAD_INCREMENTAL, LOAD_MODES
+from .layouts import cell
+from .xls_import_crm import CRM_HEADERS
+from .xls_reader import open_sheet_rows
+
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0  # Segundos entre recorridas de la carpeta
+SETTLE_SECONDS = 2.0  # Tiempo sin cambios para considerar completo un archivo
+
+# Primeras columnas de la fila 1 de una planilla de Darío (normalizadas)
+_DARIO_HEADERS = ("size", "numero", "nombre", "comienzo")
+# Filas iniciales en las que se buscan los encabezados del export CRM
+_DETECT_ROWS = 20
+
+# Firma de un archivo: (tamaño, fecha de modificación en ns)
+Signature = tuple[int, int]
+
+
+def detect_kind(path) -> Optional[str]:
+    """'dario' o 'crm' según los encabezados de la hoja, o None si no es ninguno.
+
+    Lanza la excepción del lector si el archivo no se puede abrir (p. ej.
+    un .xlsx todavía incompleto).
+    """
+    with open_sheet_rows(path) as sheet:
+        head = []
+        for row in sheet.rows():
+            head.append(row)
+            if len(head) >= _DETECT_ROWS:
+                break
+    if head and tuple(norm_text(cell(head[0], c)) for c in range(1, len(_DARIO_HEADERS) + 1)) == _DARIO_HEADERS:
+        return "dario"
+    headers, row = CRM_HEADERS.find(head)
+    if row != -1 and all(CRM_HEADERS.resolve(headers).values()):
+        return "crm"
+    return None
+
+
+@dataclass
+class _Entry:
+    """Estado de un archivo de la carpeta."""
+
+    signature: Signature
+    stable_since: float
+    # Última firma ya procesada (importada, con error o descartada)
+    handled: Optional[Signature] = None
+    running: bool = False
+
+
+class FolderWatcher:
+    """Vigila `folder` y envía cada archivo completo al importador que corresponde."""
+
+    def __init__(
+        self,
+        folder,
+        responsables: tuple[Optional[int], list[tuple[str, int]]] = (None, []),
+        concurrency: int = IMPORT_WORKERS,
+        mode: str = LOAD_INCREMENTAL,
+        interval: float = POLL_INTERVAL,
+        settle: float = SETTLE_SECONDS,
+        recursive: bool = False,
+        initial: bool = False,
+        executor: Optional[Executor] = None,
+    ):
+        self.folder = Path(folder)
+        self.default_responsable, self.patterns = responsables
+        self.mode = mode
+        self.interval = interval
+        self.settle = settle
+        self.recursive = recursive
+        self.initial = initial
+        self.executor = executor or ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="watch")
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._entries: dict[Path, _Entry] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._stop = asyncio.Event()
+
+    def _scan(self) -> dict[Path, Signature]:
+        pattern = "**/*" if self.recursive else "*"
+        found = {}
+        for path in self.folder.glob(pattern):
+            if path.suffix.lower() not in EXTENSIONS or path.name.startswith("~$"):
+                continue
+            try:
+                st = path.stat()
+            except OSError:  # Borrado o renombrado durante la recorrida
+                continue
+            if path.is_file():
+                found[path] = (st.st_size, st.st_mtime_ns)
+        return found
+
+    async def poll(self) -> None:
+        """Una recorrida: actualiza el estado de cada archivo y lanza los que están completos."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        found = await asyncio.to_thread(self._scan)
+        for path in self._entries.keys() - found.keys():
+            if not self._entries[path].running:
+                del self._entries[path]
+        for path, signature in found.items():
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = _Entry(signature, now)
+            elif entry.signature != signature:
+                entry.signature, entry.stable_since = signature, now
+            if entry.running or entry.handled == signature or now - entry.stable_since < self.settle:
+                continue
+            entry.running = True
+            task = asyncio.create_task(self._ingest(path, entry, signature))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _ingest(self, path: Path, entry: _Entry, signature: Signature) -> None:
+        try:
+            async with self._semaphore:
+                # Otra copia pudo empezar mientras se esperaba turno
+                if self._signature(path) != signature:
+                    return
+                # Pase lo que pase la firma queda procesada: no se reintenta hasta que el archivo cambie
+                try:
+                    await self._import(path)
+                except Exception:
+                    logger.exception("Error al importar %s (se reintenta si cambia)", path)
+                finally:
+                    entry.handled = signature
+        finally:
+            entry.running = False
+
+    async def _import(self, path: Path) -> None:
+        try:
+            kind = await asyncio.to_thread(detect_kind, path)
+        except Exception as e:
+            logger.warning("No se pudo abrir %s (se reintenta si cambia): %s", path, e)
+            return
+        params: dict = {"mode": self.mode}
+        if kind == "dario":
+            numero = responsable_for(path, self.default_responsable, self.patterns)
+            if numero is None:
+                logger.warning("Sin responsable para la planilla de Darío %s (use --responsable)", path)
+                return
+            params["numero_responsable"] = numero
+        elif kind is None:
+            logger.warning("Formato no reconocido: %s", path)
+            return
+        job_id = await asyncio.to_thread(create_job, kind, str(path), params)
+        logger.info("Importando %s (%s, trabajo %s)", path, kind, job_id)
+        await asyncio.get_running_loop().run_in_executor(self.executor, run_job, job_id)
+        job = await asyncio.to_thread(get_job, job_id)
+        log = logger.info if job["status"] == JOB_DONE else logger.error
+        log("%s: %s", path.name, job["message"])
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Signature]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    async def run(self) -> None:
+        """Vigila la carpeta hasta `stop()`; al salir espera las importaciones en curso."""
+        if not self.initial:
+            now = asyncio.get_running_loop().time()
+            for path, signature in (await asyncio.to_thread(self._scan)).items():
+                self._entries[path] = _Entry(signature, now, handled=signature)
+        logger.info("Vigilando %s", self.folder)
+        while not self._stop.is_set():
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Error al recorrer %s", self.folder)
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+async def _serve(watcher: FolderWatcher) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, watcher.stop)
+        except (NotImplementedError, AttributeError):  # Windows: Ctrl+C llega como KeyboardInterrupt
+            pass
+    await watcher.run()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", type=Path)
+    parser.add_argument(
+        "--responsable",
+        action="append",
+        default=[],
+        metavar="[PATRÓN=]NÚMERO",
+        help="Responsable de las planillas de Darío (repetible, ver import_cli)",
+    )
+    parser.add_argument("--concurrency", type=int, default=IMPORT_WORKERS, help="Importaciones simultáneas")
+    parser.add_argument("--mode", choices=LOAD_MODES, default=LOAD_INCREMENTAL)
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Segundos entre recorridas")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS, help="Segundos sin cambios antes de importar")
+    parser.add_argument("--recursive", action="store_true", help="Incluir subcarpetas")
+    parser.add_argument("--initial", action="store_true", help="Importar también los archivos ya presentes")
+    args = parser.parse_args(argv)
+
+    if not args.folder.is_dir():
+        parser.error(f"No es una carpeta: {args.folder}")
+    try:
+        responsables = parse_responsables(args.responsable)
+    except ValueError as e:
+        parser.error(str(e))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Mismo tipo de pool que los trabajos de la aplicación (IMPORT_WORKER_MODE)
+    if IMPORT_WORKER_MODE == "process":
+        executor: Executor = ProcessPoolExecutor(max_workers=args.concurrency)
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="watch")
+
+    async def start() -> None:
+        watcher = FolderWatcher(
+            args.folder,
+            responsables,
+            concurrency=args.concurrency,
+            mode=args.mode,
+            interval=args.interval,
+            settle=args.settle,
+            recursive=args.recursive,
+            initial=args.initial,
+            executor=executor,
+        )
+        await _serve(watcher)
+
+    try:
+        asyncio.run(start())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
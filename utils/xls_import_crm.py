@@ -1,24 +1,51 @@
 from __future__ import annotations
 
-from datetime import datetime, date
-from typing import Optional
-from pathlib import Path
-import os
-import tempfile
-import unicodedata
+from typing import Iterable, Iterator, Optional
+from functools import partial
+from itertools import chain, islice
 import re
 
-from openpyxl import load_workbook, Workbook
-try:
-    # Utilidad para convertir números de serie de Excel a datetime/date
-    from openpyxl.utils.datetime import from_excel as _from_excel
-except Exception:  # pragma: no cover - fallback si cambia API
-    _from_excel = None
-
-from .db import TMPActividades, get_session_factory
-
-
-def _parse_horas(hours_value, minutes_value) -> str:
+from .columnar import CHUNK_ROWS, COLUMNAR_ENABLED, digits_column, seconds_column, serial_date_column
+from .db import DEFAULT_BATCH_SIZE, IMPORT_SQLITE_PROFILE, TMPActividades, profiled_session
+from .header_index import HeaderIndex
+from .import_progress import (
+    STAGE_CACHED,
+    STAGE_COMMIT,
+    STAGE_DONE,
+    STAGE_HEADERS,
+    STAGE_OPEN,
+    STAGE_ROWS,
+    ProgressCallback,
+    ProgressReporter,
+)
+from .import_metrics import import_history, new_metrics, source_name
+from .import_registry import lookup as lookup_import, record as record_import, source_sha256
+from .incremental_load import LOAD_INCREMENTAL, check_mode, keyed_rows, load_rows, value_columns
+from .layouts import ALL_EMPTY, ALL_NONE, SKIP, STOP, ColumnSpec, LayoutSpec, RowRule, cell, is_empty
+from .temporal import DATE_FORMATS, TemporalColumn
+from .xls_reader import SheetSource, open_sheet_rows
+
+
+# Cantidad de filas iniciales en las que se buscan los encabezados
+_HEADER_SCAN_ROWS = 20
+
+# Clave natural de una actividad para la carga incremental
+CRM_KEY_COLUMNS = ("numero_responsable", "fecha", "numero_act")
+
+# Encabezados del export: alias por campo (en orden de preferencia) y nombres
+# que identifican la fila de encabezados
+CRM_HEADERS = HeaderIndex(
+    {
+        "fecha": ("fecha",),
+        "numero": ("numero", "número", "numero act", "num act", "nro", "nº", "no"),
+        "asunto": ("asunto", "asuntos", "descripcion", "descripción", "concepto", "detalle", "subject"),
+    },
+    tokens=("fecha", "numero", "número", "asunto"),
+)
+
+
+def _parse_horas_seg(hours_value, minutes_value) -> int:
+    """Duración en segundos a partir de las columnas de horas y minutos (minutos > 59 se suman)."""
     try:
         hours = int(hours_value or 0)
     except Exception:
@@ -27,42 +54,7 @@ def _parse_horas(hours_value, minutes_value) -> str:
         minutes = int(minutes_value or 0)
     except Exception:
         minutes = 0
-    # Normalizar minutos > 59
-    total_minutes = hours * 60 + minutes
-    hh = total_minutes // 60
-    mm = total_minutes % 60
-    return f"{hh:02d}:{mm:02d}:00"
-
-
-def _parse_fecha(value, epoch: str = "windows") -> Optional[date]:
-    if value is None or value == "":
-        return None
-    if isinstance(value, (datetime, date)):
-        return value.date() if isinstance(value, datetime) else value
-    # Si llega como número de serie Excel (float/int), intentar convertir
-    if isinstance(value, (int, float)) and _from_excel is not None:
-        try:
-            dt = _from_excel(value, epoch=epoch)
-            return dt.date()
-        except Exception:
-            pass
-    # Intentar varios formatos comunes
-    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%m/%d/%Y"):
-        try:
-            return datetime.strptime(str(value), fmt).date()
-        except Exception:
-            continue
-    # Fallback: no convertir
-    return None
-
-
-def _norm(text) -> str:
-    """Normaliza un texto: minúsculas, sin acentos, espacios colapsados."""
-    if text is None:
-        return ""
-    s = str(text).strip().lower()
-    s = "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
-    return " ".join(s.split())
+    return (hours * 60 + minutes) * 60
 
 
 def _parse_numero_act(value) -> Optional[int]:
@@ -91,46 +83,64 @@ def _parse_numero_act(value) -> Optional[int]:
         return None
 
 
-def _find_headers(ws, candidate_rows=None) -> tuple[dict[str, int], int]:
-    """Busca encabezados en filas candidatas y devuelve (mapa_normalizado, fila).
-
-    Si no se especifican filas, escanea automáticamente desde la 1 hasta la 20 (o max_row).
-    """
-    if candidate_rows is None:
-        upper = min(20, ws.max_row or 20)
-        candidate_rows = range(1, upper + 1)
-    for r in candidate_rows:
-        headers: dict[str, int] = {}
-        row = ws[r]
-        if not row:
-            continue
-        for idx, cell in enumerate(row, start=1):
-            key = _norm(cell.value) or f"col{idx}"
-            headers[key] = idx
-        if any(k in headers for k in ("fecha", "numero", "número", "asunto")):
-            return headers, r
-    return {}, -1
-
-
-def _is_empty(value) -> bool:
-    """True si el valor es None o string vacío (tras strip)."""
-    if value is None:
-        return True
-    if isinstance(value, str):
-        return value.strip() == ""
-    return False
-
-
 def _is_header_like(fecha_val, numero_val, asunto_val) -> bool:
     """Detecta si una fila parece repetir encabezados (p. ej., 'Fecha', 'Número', 'Asunto')."""
-    values = {_norm(fecha_val), _norm(numero_val), _norm(asunto_val)}
-    targets = {"fecha", "numero", "número", "asunto"}
-    return len(values & targets) >= 1
-
-
-def _import_xlsx(file_path: str) -> int:
+    return CRM_HEADERS.is_token(fecha_val) or CRM_HEADERS.is_token(numero_val) or CRM_HEADERS.is_token(asunto_val)
+
+
+def _text(value) -> str:
+    return str(value).strip()
+
+
+# Formato del export CRM. Fecha, Número y Asunto se ubican por encabezado al
+# leer cada archivo; las horas y minutos están fijos en J y L, y la columna A
+# marca el fin de los datos.
+CRM_LAYOUT = LayoutSpec(
+    name="crm",
+    columns={"a": 1, "horas": 10, "minutos": 12},
+    fields=(
+        ColumnSpec("numero_responsable", constant="numero_responsable"),
+        ColumnSpec("fecha", ("fecha",), convert="parse_fecha", vector="parse_fecha_column"),
+        ColumnSpec(
+            "numero_act",
+            ("numero",),
+            convert=_parse_numero_act,
+            empty_as_none=True,
+            vector=partial(digits_column, scalar=_parse_numero_act),
+        ),
+        ColumnSpec("asunto", ("asunto",), convert=_text, empty_as_none=True),
+        ColumnSpec(
+            "horas_seg",
+            ("horas", "minutos"),
+            convert=_parse_horas_seg,
+            vector=partial(seconds_column, scalar=_parse_horas_seg),
+        ),
+    ),
+    rules=(
+        # Condición de finalización: la columna A contiene un valor no-fecha
+        RowRule(STOP, ("a",), "not_a_date"),
+        # Fila vacía aparente (previa al parse) o fila con texto de encabezado
+        RowRule(SKIP, ("fecha", "numero", "asunto"), ALL_EMPTY),
+        RowRule(SKIP, ("fecha", "numero", "asunto"), _is_header_like),
+        # Fila vacía real tras normalización/parse: no insertar
+        RowRule(SKIP, ("fecha", "numero_act", "asunto"), ALL_NONE, after_convert=True),
+    ),
+)
+
+
+# Orden de las columnas de cada fila enviada a la carga masiva
+CRM_COLUMNS = CRM_LAYOUT.field_names
+
+
+def _parse_rows(
+    rows: Iterable[tuple], epoch_flag: str, reporter: ProgressReporter, columnar: bool = COLUMNAR_ENABLED
+) -> Iterator[tuple]:
     """
-    Importa actividades desde un archivo Excel a la tabla TMP_Actividades.
+    Interpreta un flujo de filas (tuplas de valores, desde la fila 1) de un
+    export CRM y devuelve un iterador de registros en el orden de `CRM_COLUMNS`.
+
+    Los encabezados se resuelven al llamar la función (los errores de formato
+    se lanzan aquí); las filas de datos se procesan a medida que se consumen.
 
     Reglas específicas:
     - A3: Numero_Responsable (entero) a repetir en cada registro
@@ -139,16 +149,22 @@ def _import_xlsx(file_path: str) -> int:
         Fecha -> col 'Fecha'
         Numero_Act -> col 'Número'
         Asunto -> col 'Asunto'
-        Horas -> combinar col J (horas) y col L (minutos) en HH:MM:SS
+        Horas_Seg -> combinar col J (horas) y col L (minutos) en segundos
+    - Finalizar en la primera fila cuya columna A no sea una fecha
+
+    Con `columnar` (requiere NumPy, ver `columnar`) las filas se procesan en
+    bloques de `CHUNK_ROWS` y fecha, número y horas se convierten por
+    columna; los registros son idénticos a los del camino fila a fila.
     """
-    wb = load_workbook(filename=file_path, data_only=True)
-    ws = wb.active
+    reporter.stage(STAGE_HEADERS)
+    rows = iter(rows)
+    # Solo se retienen en memoria las filas candidatas a encabezado
+    head = list(islice(rows, _HEADER_SCAN_ROWS))
 
     # Numero Responsable en A3
-    num_resp_cell = ws["A3"].value
+    num_resp_cell = cell(head[2], 1) if len(head) >= 3 else None
     try:
         # Extraer el número de responsable desde el formato 'Responsable:     195     Dario'
-        import re
         match = re.search(r"(\d+)", str(num_resp_cell))
         numero_responsable = int(match.group(1)) if match else 0
 
@@ -159,171 +175,198 @@ def _import_xlsx(file_path: str) -> int:
         numero_responsable = 0
 
     # Identificar encabezados por nombre para 'Fecha', 'Número', 'Asunto'
-    headers, header_row_index = _find_headers(ws)
+    headers, header_row_index = CRM_HEADERS.find(head)
     if header_row_index == -1:
         raise RuntimeError("No se encontraron encabezados en filas 3 o 4.")
 
-    def get_any(options: list[str]) -> int | None:
-        for opt in options:
-            key = _norm(opt)
-            if key in headers:
-                return headers[key]
-        return None
-
-    col_fecha = get_any(["fecha"])  
-    col_numero = get_any(["numero", "número", "numero act", "num act", "nro", "nº", "no"])  
-    col_asunto = get_any(["asunto", "asuntos", "descripcion", "descripción", "concepto", "detalle", "subject"])  
+    columns = CRM_HEADERS.resolve(headers)
+    col_fecha = columns["fecha"]
+    col_numero = columns["numero"]
+    col_asunto = columns["asunto"]
 
     missing = [name for name, idx in (("Fecha", col_fecha), ("Número", col_numero), ("Asunto", col_asunto)) if not idx]
     if missing:
         found = ", ".join(headers.keys())
         raise RuntimeError(f"Faltan columnas requeridas: {', '.join(missing)}. Encabezados detectados: {found}")
 
-    # Las columnas de horas/minutos son fijas según requerimiento: J y L
-    col_horas_idx = 10  # J
-    col_minutos_idx = 12  # L
-
-    # Detectar epoch del workbook para convertir seriales Excel correctamente
-    epoch_flag = "windows"
-    try:
-        epoch_dt = getattr(wb, "epoch", None)
-        if epoch_dt is not None and getattr(epoch_dt, "year", 1900) == 1904:
-            epoch_flag = "mac"
-    except Exception:
-        pass
-
-    SessionFactory = get_session_factory()
-    session = SessionFactory()
-    try:
-        # Limpiar tabla
-        session.query(TMPActividades).delete()
-        session.commit()
-
-        inserted = 0
-        start_row = header_row_index + 1
-        # Garantizar que nunca se lea antes de la fila 4 (A3 contiene solo responsable)
-        if start_row < 4:
-            start_row = 4
-        # Si la fila inmediatamente posterior a encabezados está vacía o parece otro encabezado, saltarla
+    start_row = header_row_index + 1
+    # Garantizar que nunca se lea antes de la fila 4 (A3 contiene solo responsable)
+    if start_row < 4:
+        start_row = 4
+    # Formato de fecha detectado sobre las filas de datos del bloque inicial
+    parse_fecha = TemporalColumn(
+        DATE_FORMATS, epoch_flag, as_date=True, sample=[cell(row, col_fecha) for row in head[start_row - 1:]]
+    )
+    # Fin de los datos: la columna A deja de tener fechas en el formato detectado
+    # (un número cuenta como serial solo si la columna es de seriales)
+    column_a = TemporalColumn(
+        DATE_FORMATS, epoch_flag, as_date=True, sample=[cell(row, 1) for row in head[start_row - 1:]]
+    )
+    positions = {"fecha": col_fecha, "numero": col_numero, "asunto": col_asunto}
+    bindings = {
+        "numero_responsable": numero_responsable,
+        "parse_fecha": parse_fecha,
+        "parse_fecha_column": partial(serial_date_column, parse=parse_fecha),
+        "not_a_date": lambda value: not is_empty(value) and not column_a.is_date(value),
+    }
+    # Flujo de datos desde start_row: resto del bloque inicial + filas aún no leídas
+    data_rows = chain(head[start_row - 1:], rows)
+    # Si la fila inmediatamente posterior a encabezados está vacía o parece otro encabezado, saltarla
+    first = next(data_rows, None)
+    if first is not None:
         try:
-            first_fecha = ws.cell(row=start_row, column=col_fecha).value if col_fecha else None
-            first_numero = ws.cell(row=start_row, column=col_numero).value if col_numero else None
-            first_asunto = ws.cell(row=start_row, column=col_asunto).value if col_asunto else None
-            if (_is_empty(first_fecha) and _is_empty(first_numero) and _is_empty(first_asunto)) or _is_header_like(first_fecha, first_numero, first_asunto):
-                start_row += 1
+            first_fecha = cell(first, col_fecha)
+            first_numero = cell(first, col_numero)
+            first_asunto = cell(first, col_asunto)
+            if not ((is_empty(first_fecha) and is_empty(first_numero) and is_empty(first_asunto)) or _is_header_like(first_fecha, first_numero, first_asunto)):
+                data_rows = chain((first,), data_rows)
         except Exception:
-            pass
-        for row_idx in range(start_row, ws.max_row + 1):
-            # Condición de finalización: si la columna A contiene un valor no-fecha, terminar importación
-            try:
-                col_a_val = ws.cell(row=row_idx, column=1).value
-                if not _is_empty(col_a_val):
-                    if _parse_fecha(col_a_val, epoch=epoch_flag) is None:
-                        break
-            except Exception:
-                # Si ocurre algún error inesperado al leer/parsear, continuar con la lógica estándar
-                pass
-            fecha_val = ws.cell(row=row_idx, column=col_fecha).value if col_fecha else None
-            numero_val = ws.cell(row=row_idx, column=col_numero).value if col_numero else None
-            asunto_val = ws.cell(row=row_idx, column=col_asunto).value if col_asunto else None
-            horas_val = ws.cell(row=row_idx, column=col_horas_idx).value
-            minutos_val = ws.cell(row=row_idx, column=col_minutos_idx).value
-
-            # Fila vacía aparente (previa al parse) o fila con texto de encabezado
-            if _is_empty(fecha_val) and _is_empty(numero_val) and _is_empty(asunto_val):
-                continue
-            if _is_header_like(fecha_val, numero_val, asunto_val):
+            data_rows = chain((first,), data_rows)
+
+    # Las filas previas al inicio de datos cuentan como leídas
+    reporter.progress.rows_read = start_row - 1
+
+    if columnar:
+        extract_chunk = CRM_LAYOUT.compile_chunks(positions, bindings)
+
+        def chunks() -> Iterator[tuple]:
+            while True:
+                chunk = list(islice(data_rows, CHUNK_ROWS))
+                if not chunk:
+                    return
+                records, skipped, consumed, stopped = extract_chunk(chunk)
+                reporter.read_many(consumed)
+                reporter.skipped(skipped)
+                yield from records
+                if stopped:
+                    return
+
+        return chunks()
+
+    extract = CRM_LAYOUT.compile(positions, bindings)
+
+    def records() -> Iterator[tuple]:
+        for row in data_rows:
+            reporter.read()
+            record = extract(row)
+            if record is STOP:
+                break
+            if record is SKIP:
+                reporter.skipped()
                 continue
+            yield record
 
-            fecha = _parse_fecha(fecha_val, epoch=epoch_flag)
-            numero_act = None if _is_empty(numero_val) else _parse_numero_act(numero_val)
-            asunto = None if _is_empty(asunto_val) else str(asunto_val).strip()
+    return records()
 
-            # Fila vacía real tras normalización/parse: no insertar
-            if fecha is None and numero_act is None and asunto is None:
-                continue
-            horas = _parse_horas(horas_val, minutos_val)
-
-            session.add(
-                TMPActividades(
-                    numero_responsable=numero_responsable,
-                    fecha=fecha,
-                    numero_act=numero_act,
-                    asunto=asunto,
-                    horas=horas,
-                )
-            )
-            inserted += 1
 
-        session.commit()
-        return inserted
-    finally:
-        session.close()
+def _load_records(
+    records: Iterable[tuple],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    reporter: Optional[ProgressReporter] = None,
+    registry_key: Optional[tuple[str, dict]] = None,
+    mode: str = LOAD_INCREMENTAL,
+) -> int:
+    """Carga `records` (orden de `CRM_COLUMNS`) en TMP_Actividades según `mode`.
 
+    En modo incremental solo se tocan los responsables presentes en
+    `records` y se escriben únicamente las filas que cambiaron (clave natural
+    `CRM_KEY_COLUMNS`); `LOAD_REPLACE` vacía la tabla completa. Devuelve la
+    cantidad de registros del archivo.
 
-def _convert_xls_to_temp_xlsx(file_path: str) -> str:
+    Con `registry_key` = (sha256, parámetros) la carga se anota en el registro
+    de importaciones dentro de la misma transacción.
     """
-    Convierte un archivo .xls a un .xlsx temporal copiando únicamente valores
-    (y convirtiendo fechas correctamente) para ser procesado con openpyxl.
-
-    Retorna la ruta del archivo .xlsx temporal generado. El llamador es
-    responsable de eliminarlo.
+    reporter = reporter or ProgressReporter()
+    rows = keyed_rows(
+        (dict(zip(CRM_COLUMNS, record)) for record in records), CRM_KEY_COLUMNS, value_columns(TMPActividades)
+    )
+    with profiled_session(profile) as session:
+        reporter.stage(STAGE_ROWS)
+        stats = load_rows(
+            session, TMPActividades, rows, mode=mode, batch_size=batch_size, on_flush=reporter.inserted
+        )
+        reporter.synced(stats.inserted, stats.updated, stats.deleted, stats.write_seconds, stats.write_cpu)
+
+        if registry_key is not None:
+            record_import(session, "crm", registry_key[0], registry_key[1], stats.rows)
+        reporter.stage(STAGE_COMMIT)
+        session.commit()
+    reporter.stage(STAGE_DONE)
+    return stats.rows
+
+
+def _import_rows(
+    rows: Iterable[tuple],
+    epoch_flag: str = "windows",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    reporter: Optional[ProgressReporter] = None,
+    registry_key: Optional[tuple[str, dict]] = None,
+    mode: str = LOAD_INCREMENTAL,
+) -> int:
+    """Importa a TMP_Actividades un flujo de filas (tuplas de valores, desde la fila 1)."""
+    reporter = reporter or ProgressReporter()
+    records = _parse_rows(rows, epoch_flag, reporter)
+    return _load_records(
+        records, batch_size=batch_size, profile=profile, reporter=reporter, registry_key=registry_key, mode=mode
+    )
+
+
+def parse_actividades(source: SheetSource, filename: Optional[str] = None) -> Iterator[tuple]:
+    """Lee un export CRM y genera sus registros (orden de `CRM_COLUMNS`) sin tocar la base.
+
+    La hoja queda abierta hasta agotar el iterador. Pensada para ejecutarse
+    en procesos separados (ver `batch_import`).
     """
-    try:
-        import xlrd
-    except Exception as e:
-        raise RuntimeError("El formato .xls requiere la librería 'xlrd'.") from e
-
-    book = xlrd.open_workbook(file_path)
-    sheet = book.sheet_by_index(0)
-
-    # Crear archivo temporal .xlsx (cerrar descriptor para Windows)
-    fd, temp_path = tempfile.mkstemp(suffix=".xlsx")
-    os.close(fd)
-
-    wb_out = Workbook()
-    ws_out = wb_out.active
-
-    for r in range(sheet.nrows):
-        for c in range(sheet.ncols):
-            cell_type = sheet.cell_type(r, c)
-            cell_value = sheet.cell_value(r, c)
-
-            # Convertir fechas desde número serial Excel
-            if cell_type == xlrd.XL_CELL_DATE:
-                try:
-                    y, m, d, hh, mm, ss = xlrd.xldate_as_tuple(cell_value, book.datemode)
-                    # Si hay hora 0,0,0 lo escribimos como date; si no, datetime
-                    if (hh, mm, ss) == (0, 0, 0):
-                        value_converted = date(y, m, d)
-                    else:
-                        value_converted = datetime(y, m, d, hh, mm, ss)
-                except Exception:
-                    value_converted = cell_value
-            else:
-                value_converted = cell_value
-
-            ws_out.cell(row=r + 1, column=c + 1, value=value_converted)
-
-    wb_out.save(temp_path)
-    return temp_path
-
-
-def import_actividades_from_excel(file_path: str) -> int:
-    ext = Path(file_path).suffix.lower()
-    if ext == ".xlsx":
-        return _import_xlsx(file_path)
-    if ext == ".xls":
-        temp_xlsx: Optional[str] = None
-        try:
-            temp_xlsx = _convert_xls_to_temp_xlsx(file_path)
-            return _import_xlsx(temp_xlsx)
-        finally:
-            if temp_xlsx and os.path.exists(temp_xlsx):
-                try:
-                    os.remove(temp_xlsx)
-                except Exception:
-                    pass
-    raise RuntimeError("Extensión no soportada. Usa .xls o .xlsx")
-
-
+    with open_sheet_rows(source, filename) as sheet:
+        yield from _parse_rows(sheet.rows(), sheet.epoch, ProgressReporter())
+
+
+def import_actividades_from_excel(
+    source: SheetSource,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    progress: Optional[ProgressCallback] = None,
+    filename: Optional[str] = None,
+    force: bool = False,
+    mode: str = LOAD_INCREMENTAL,
+) -> int:
+    """Importa actividades CRM desde un .xls/.xlsx leyendo la hoja fila a fila.
+
+    Las filas se insertan en lotes de `batch_size` con executemany, sobre una
+    conexión con el perfil SQLite `profile` (ver `db.SQLITE_PROFILES`).
+    `progress` recibe instantáneas `ImportProgress` limitadas en frecuencia.
+
+    `source` es una ruta o un archivo binario abierto (p. ej. un upload en
+    memoria); en ese caso `filename` indica la extensión.
+
+    Si el mismo contenido ya es la carga vigente de TMP_Actividades (ver
+    `import_registry`), no se reimporta: se devuelve la cantidad registrada y
+    `progress` recibe la etapa `STAGE_CACHED`. `force=True` reimporta igual.
+
+    `mode` elige la carga incremental por responsable (por defecto) o el
+    reemplazo completo de la tabla (ver `incremental_load`).
+    """
+    reporter = ProgressReporter(progress, metrics=new_metrics())
+    with import_history("crm", source_name(source, filename), reporter):
+        digest = source_sha256(source)
+        params = {"mode": check_mode(mode)}
+        if not force:
+            cached = lookup_import("crm", digest, params)
+            if cached is not None:
+                reporter.inserted(cached)
+                reporter.stage(STAGE_CACHED)
+                return cached
+        reporter.stage(STAGE_OPEN)
+        with open_sheet_rows(source, filename) as sheet:
+            reporter.progress.rows_total = sheet.total_rows
+            return _import_rows(
+                sheet.rows(),
+                sheet.epoch,
+                batch_size=batch_size,
+                profile=profile,
+                reporter=reporter,
+                registry_key=(digest, params),
+                mode=mode,
+            )
@@ -1,150 +1,226 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
-from pathlib import Path
-import os
-import tempfile
-
-from openpyxl import load_workbook, Workbook
-
-try:
-    from openpyxl.utils.datetime import from_excel as _from_excel
-except Exception:
-    _from_excel = None
-
-from .db import TMPActividadesDario, get_session_factory
-
-
-def _parse_datetime(value, epoch: str = "windows") -> Optional[datetime]:
-    """Parsea un valor a datetime, manejando seriales de Excel y strings."""
-    if value is None or value == "":
-        return None
-    if isinstance(value, datetime):
-        return value
-    if isinstance(value, (int, float)) and _from_excel is not None:
-        try:
-            return _from_excel(value, epoch=epoch)
-        except Exception:
-            pass
-    if isinstance(value, str):
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
-            try:
-                return datetime.strptime(value, fmt)
-            except Exception:
-                continue
-    return None
-
-
-def _is_empty(value) -> bool:
-    """True si el valor es None o string vacío (tras strip)."""
-    if value is None:
-        return True
-    if isinstance(value, str):
-        return value.strip() == ""
-    return False
-
-
-def _import_xlsx_dario(file_path: str, numero_responsable: int) -> int:
-    """Importa datos desde un archivo Excel a la tabla TMP_Actividades_Dario."""
-    wb = load_workbook(filename=file_path, data_only=True)
-    ws = wb.active
-    
-    epoch_flag = "windows"
-    try:
-        if getattr(getattr(wb, "epoch", None), "year", 1900) == 1904:
-            epoch_flag = "mac"
-    except Exception:
-        pass
-
-    SessionFactory = get_session_factory()
-    session = SessionFactory()
-    try:
-        # Limpiar tabla antes de importar
-        session.query(TMPActividadesDario).delete()
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional
+
+from .db import DEFAULT_BATCH_SIZE, IMPORT_SQLITE_PROFILE, TMPActividadesDario, profiled_session
+from .import_progress import (
+    STAGE_CACHED,
+    STAGE_COMMIT,
+    STAGE_DONE,
+    STAGE_OPEN,
+    STAGE_ROWS,
+    ProgressCallback,
+    ProgressReporter,
+)
+from .import_metrics import import_history, new_metrics, source_name
+from .import_registry import lookup as lookup_import, record as record_import, source_sha256
+from .incremental_load import LOAD_INCREMENTAL, check_mode, keyed_rows, load_rows, value_columns
+from .layouts import ALL_EMPTY, SKIP, ColumnSpec, LayoutSpec, RowRule, cell
+from .temporal import DATETIME_FORMATS, SAMPLE_ROWS, TemporalColumn, duration_seconds
+from .xls_reader import SheetSource, open_sheet_rows
+
+
+# Clave natural de una actividad para la carga incremental
+DARIO_KEY_COLUMNS = ("numero_responsable", "numero", "comienzo")
+
+# Formato de la planilla de Darío: encabezado en la fila 1 y columnas fijas
+# desde A. Se descartan las filas con las tres primeras columnas vacías.
+DARIO_LAYOUT = LayoutSpec(
+    name="dario",
+    columns={
+        "size": 1,
+        "numero": 2,
+        "nombre": 3,
+        "comienzo": 4,
+        "fin": 5,
+        "sintesis": 6,
+        "observaciones": 7,
+        "vcx_s": 8,
+        "req_sincro": 9,
+        "version": 10,
+    },
+    fields=(
+        ColumnSpec("size", ("size",), convert=str, empty_as_none=True),
+        ColumnSpec("numero", ("numero",), convert=int, empty_as_none=True),
+        ColumnSpec("nombre", ("nombre",), convert=str, empty_as_none=True),
+        ColumnSpec("comienzo", ("comienzo",), convert="parse_comienzo"),
+        ColumnSpec("fin", ("fin",), convert="parse_fin"),
+        ColumnSpec("sintesis", ("sintesis",), convert=str, empty_as_none=True),
+        ColumnSpec("observaciones", ("observaciones",), convert=str, empty_as_none=True),
+        ColumnSpec("vcx_s", ("vcx_s",), convert=str, empty_as_none=True),
+        ColumnSpec("req_sincro", ("req_sincro",), convert=str, empty_as_none=True),
+        ColumnSpec("version", ("version",), convert=str, empty_as_none=True),
+        ColumnSpec("numero_responsable", constant="numero_responsable"),
+    ),
+    rules=(RowRule(SKIP, ("size", "numero", "nombre"), ALL_EMPTY),),
+    output="dict",
+)
+
+
+def _parse_rows_dario(
+    rows: Iterable[tuple],
+    numero_responsable: int,
+    epoch_flag: str,
+    reporter: ProgressReporter,
+) -> Iterator[dict]:
+    """Convierte filas de datos (sin encabezado) en mapeos de TMPActividadesDario.
+
+    El formato de las columnas Comienzo y Fin se detecta sobre las primeras
+    `SAMPLE_ROWS` filas; `duracion_seg` es la diferencia entre ambas.
+    """
+    rows = iter(rows)
+    sample = list(islice(rows, SAMPLE_ROWS))
+    columns = DARIO_LAYOUT.columns
+    extract = DARIO_LAYOUT.compile(
+        bindings={
+            "numero_responsable": numero_responsable,
+            "parse_comienzo": TemporalColumn(
+                DATETIME_FORMATS, epoch_flag, sample=[cell(row, columns["comienzo"]) for row in sample]
+            ),
+            "parse_fin": TemporalColumn(DATETIME_FORMATS, epoch_flag, sample=[cell(row, columns["fin"]) for row in sample]),
+        }
+    )
+    for row_values in chain(sample, rows):
+        reporter.read()
+        mapping = extract(row_values)
+        # Si las primeras columnas importantes están vacías, saltar fila
+        if mapping is SKIP:
+            reporter.skipped()
+            continue
+        mapping["duracion_seg"] = duration_seconds(mapping["comienzo"], mapping["fin"])
+        yield mapping
+
+
+def _load_records_dario(
+    records: Iterable[dict],
+    numero_responsable: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    reporter: Optional[ProgressReporter] = None,
+    registry_key: Optional[tuple[str, dict]] = None,
+    mode: str = LOAD_INCREMENTAL,
+) -> int:
+    """Carga `records` en TMP_Actividades_Dario según `mode`.
+
+    En modo incremental solo se sincronizan las filas de `numero_responsable`
+    (clave natural `DARIO_KEY_COLUMNS`): las de otros responsables no se
+    tocan. `LOAD_REPLACE` vacía la tabla completa. Devuelve la cantidad de
+    registros del archivo.
+
+    Con `registry_key` = (sha256, parámetros) la carga se anota en el registro
+    de importaciones dentro de la misma transacción.
+    """
+    reporter = reporter or ProgressReporter()
+    rows = keyed_rows(records, DARIO_KEY_COLUMNS, value_columns(TMPActividadesDario))
+    with profiled_session(profile) as session:
+        reporter.stage(STAGE_ROWS)
+        stats = load_rows(
+            session,
+            TMPActividadesDario,
+            rows,
+            mode=mode,
+            scope=(numero_responsable,),
+            batch_size=batch_size,
+            on_flush=reporter.inserted,
+        )
+        reporter.synced(stats.inserted, stats.updated, stats.deleted, stats.write_seconds, stats.write_cpu)
+
+        if registry_key is not None:
+            record_import(session, "dario", registry_key[0], registry_key[1], stats.rows)
+        reporter.stage(STAGE_COMMIT)
         session.commit()
-
-        inserted = 0
-        # Omitir la primera fila (encabezados)
-        for row_idx in range(2, ws.max_row + 1):
-            row_values = [ws.cell(row=row_idx, column=c).value for c in range(1, 12)]
-            
-            # Si las primeras columnas importantes están vacías, saltar fila
-            if all(_is_empty(v) for v in row_values[:3]):
-                continue
-
-            # Mapeo de columnas a modelo
-            actividad = TMPActividadesDario(
-                size=str(row_values[0]) if not _is_empty(row_values[0]) else None,
-                numero=int(row_values[1]) if not _is_empty(row_values[1]) else None,
-                nombre=str(row_values[2]) if not _is_empty(row_values[2]) else None,
-                comienzo=_parse_datetime(row_values[3], epoch=epoch_flag),
-                fin=_parse_datetime(row_values[4], epoch=epoch_flag),
-                sintesis=str(row_values[5]) if not _is_empty(row_values[5]) else None,
-                observaciones=str(row_values[6]) if not _is_empty(row_values[6]) else None,
-                vcx_s=str(row_values[7]) if not _is_empty(row_values[7]) else None,
-                req_sincro=str(row_values[8]) if not _is_empty(row_values[8]) else None,
-                version=str(row_values[9]) if not _is_empty(row_values[9]) else None,
-                numero_responsable=numero_responsable,
+    reporter.stage(STAGE_DONE)
+    return stats.rows
+
+
+def _import_rows_dario(
+    rows: Iterable[tuple],
+    numero_responsable: int,
+    epoch_flag: str = "windows",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    reporter: Optional[ProgressReporter] = None,
+    registry_key: Optional[tuple[str, dict]] = None,
+    mode: str = LOAD_INCREMENTAL,
+) -> int:
+    """Importa a TMP_Actividades_Dario un flujo de filas de datos (sin encabezado)."""
+    reporter = reporter or ProgressReporter()
+    # Fila de encabezados
+    reporter.progress.rows_read = 1
+    records = _parse_rows_dario(rows, numero_responsable, epoch_flag, reporter)
+    return _load_records_dario(
+        records,
+        numero_responsable,
+        batch_size=batch_size,
+        profile=profile,
+        reporter=reporter,
+        registry_key=registry_key,
+        mode=mode,
+    )
+
+
+def parse_actividades_dario(
+    source: SheetSource, numero_responsable: int, filename: Optional[str] = None
+) -> Iterator[dict]:
+    """Lee un archivo de Darío y genera sus mapeos de columnas sin tocar la base.
+
+    La hoja queda abierta hasta agotar el iterador. Pensada para ejecutarse
+    en procesos separados (ver `batch_import`).
+    """
+    with open_sheet_rows(source, filename) as sheet:
+        rows = sheet.rows(min_row=2, max_col=DARIO_LAYOUT.width)
+        yield from _parse_rows_dario(rows, numero_responsable, sheet.epoch, ProgressReporter())
+
+
+def import_actividades_dario(
+    source: SheetSource,
+    numero_responsable: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: str = IMPORT_SQLITE_PROFILE,
+    progress: Optional[ProgressCallback] = None,
+    filename: Optional[str] = None,
+    force: bool = False,
+    mode: str = LOAD_INCREMENTAL,
+) -> int:
+    """Función principal para importar actividades desde un archivo Excel.
+
+    Las filas se insertan en lotes de `batch_size` con executemany, sobre una
+    conexión con el perfil SQLite `profile` (ver `db.SQLITE_PROFILES`).
+    `progress` recibe instantáneas `ImportProgress` limitadas en frecuencia.
+
+    `source` es una ruta o un archivo binario abierto (p. ej. un upload en
+    memoria); en ese caso `filename` indica la extensión.
+
+    Si el mismo contenido (con el mismo responsable) ya es la carga vigente
+    (ver `import_registry`), no se reimporta: se devuelve la cantidad
+    registrada y `progress` recibe `STAGE_CACHED`. `force=True` reimporta igual.
+
+    `mode` elige la carga incremental de las filas de `numero_responsable`
+    (por defecto) o el reemplazo completo de la tabla (ver `incremental_load`).
+    """
+    reporter = ProgressReporter(progress, metrics=new_metrics())
+    with import_history("dario", source_name(source, filename), reporter):
+        digest = source_sha256(source)
+        params = {"numero_responsable": numero_responsable, "mode": check_mode(mode)}
+        if not force:
+            cached = lookup_import("dario", digest, params)
+            if cached is not None:
+                reporter.inserted(cached)
+                reporter.stage(STAGE_CACHED)
+                return cached
+        reporter.stage(STAGE_OPEN)
+        with open_sheet_rows(source, filename) as sheet:
+            reporter.progress.rows_total = sheet.total_rows
+            # Omitir la primera fila (encabezados)
+            rows = sheet.rows(min_row=2, max_col=DARIO_LAYOUT.width)
+            return _import_rows_dario(
+                rows,
+                numero_responsable,
+                sheet.epoch,
+                batch_size=batch_size,
+                profile=profile,
+                reporter=reporter,
+                registry_key=(digest, params),
+                mode=mode,
             )
-            session.add(actividad)
-            inserted += 1
-
-        session.commit()
-        return inserted
-    finally:
-        session.close()
-
-
-def _convert_xls_to_temp_xlsx(file_path: str) -> str:
-    """Convierte un archivo .xls a un .xlsx temporal."""
-    try:
-        import xlrd
-    except Exception as e:
-        raise RuntimeError("El formato .xls requiere la librería 'xlrd'.") from e
-
-    book = xlrd.open_workbook(file_path)
-    sheet = book.sheet_by_index(0)
-
-    fd, temp_path = tempfile.mkstemp(suffix=".xlsx")
-    os.close(fd)
-
-    wb_out = Workbook()
-    ws_out = wb_out.active
-
-    for r in range(sheet.nrows):
-        for c in range(sheet.ncols):
-            cell_type = sheet.cell_type(r, c)
-            cell_value = sheet.cell_value(r, c)
-            if cell_type == xlrd.XL_CELL_DATE:
-                try:
-                    dt_tuple = xlrd.xldate_as_tuple(cell_value, book.datemode)
-                    value_converted = datetime(*dt_tuple)
-                except Exception:
-                    value_converted = cell_value
-            else:
-                value_converted = cell_value
-            ws_out.cell(row=r + 1, column=c + 1, value=value_converted)
-
-    wb_out.save(temp_path)
-    return temp_path
-
-
-def import_actividades_dario(file_path: str, numero_responsable: int) -> int:
-    """Función principal para importar actividades desde un archivo Excel."""
-    ext = Path(file_path).suffix.lower()
-    if ext == ".xlsx":
-        return _import_xlsx_dario(file_path, numero_responsable)
-    if ext == ".xls":
-        temp_xlsx: Optional[str] = None
-        try:
-            temp_xlsx = _convert_xls_to_temp_xlsx(file_path)
-            return _import_xlsx_dario(temp_xlsx, numero_responsable)
-        finally:
-            if temp_xlsx and os.path.exists(temp_xlsx):
-                try:
-                    os.remove(temp_xlsx)
-                except Exception:
-                    pass
-    raise RuntimeError("Extensión no soportada. Usa .xls o .xlsx")
-
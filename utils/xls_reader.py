@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+from openpyxl import load_workbook
+
+
+SUPPORTED_EXTENSIONS = (".xls", ".xlsx")
+
+# Ruta en disco o archivo binario abierto (p. ej. un buffer en memoria)
+SheetSource = Union[str, os.PathLike, BinaryIO]
+
+
+class SheetRows:
+    """Filas de la hoja principal de un workbook como tuplas de valores normalizados.
+
+    - Celdas vacías -> None
+    - Fechas -> datetime (en .xls se convierten con el datemode del workbook)
+    - Números enteros en .xls -> int (xlrd los entrega como float)
+
+    `epoch` vale "windows" o "mac" (sistema 1904) y se usa para convertir los
+    seriales numéricos que queden sin tipo fecha.
+    """
+
+    epoch: str = "windows"
+
+    @property
+    def total_rows(self) -> Optional[int]:
+        """Cantidad de filas declarada por la hoja (estimación; None si se desconoce)."""
+        return None
+
+    def rows(self, min_row: int = 1, max_col: Optional[int] = None) -> Iterator[tuple]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "SheetRows":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _XlsxRows(SheetRows):
+    """Lectura en modo solo lectura con openpyxl."""
+
+    def __init__(self, source: SheetSource):
+        self._wb = load_workbook(filename=source, read_only=True, data_only=True)
+        self._ws = self._wb.active
+        try:
+            if getattr(getattr(self._wb, "epoch", None), "year", 1900) == 1904:
+                self.epoch = "mac"
+        except Exception:
+            pass
+
+    @property
+    def total_rows(self) -> Optional[int]:
+        try:
+            return self._ws.max_row
+        except Exception:
+            return None
+
+    def rows(self, min_row: int = 1, max_col: Optional[int] = None) -> Iterator[tuple]:
+        # openpyxl interpreta todas las celdas de cada fila del XML aunque se
+        # pida `max_col`: el costo de leer la hoja está en ese parseo
+        return self._ws.iter_rows(min_row=min_row, max_col=max_col, values_only=True)
+
+    def close(self) -> None:
+        # En modo solo lectura el workbook mantiene el archivo abierto
+        self._wb.close()
+
+
+class _XlsRows(SheetRows):
+    """Lectura directa con xlrd, fila a fila, sin conversión intermedia a .xlsx."""
+
+    def __init__(self, source: SheetSource):
+        try:
+            import xlrd
+        except Exception as e:
+            raise RuntimeError("El formato .xls requiere la librería 'xlrd'.") from e
+        self._xlrd = xlrd
+        if isinstance(source, (str, os.PathLike)):
+            self._book = xlrd.open_workbook(os.fspath(source), on_demand=True)
+        else:
+            contents = source.getvalue() if hasattr(source, "getvalue") else source.read()
+            self._book = xlrd.open_workbook(file_contents=contents, on_demand=True)
+        self._sheet = self._book.sheet_by_index(0)
+        if self._book.datemode == 1:
+            self.epoch = "mac"
+
+    @property
+    def total_rows(self) -> Optional[int]:
+        return self._sheet.nrows
+
+    def rows(self, min_row: int = 1, max_col: Optional[int] = None) -> Iterator[tuple]:
+        xlrd = self._xlrd
+        sheet = self._sheet
+        datemode = self._book.datemode
+        empty_types = (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR)
+        for r in range(max(min_row, 1) - 1, sheet.nrows):
+            values = sheet.row_values(r, 0, max_col)
+            types = sheet.row_types(r, 0, max_col)
+            out = []
+            for ctype, value in zip(types, values):
+                if ctype in empty_types:
+                    value = None
+                elif ctype == xlrd.XL_CELL_NUMBER:
+                    if value.is_integer():
+                        value = int(value)
+                elif ctype == xlrd.XL_CELL_DATE:
+                    try:
+                        value = datetime(*xlrd.xldate_as_tuple(value, datemode))
+                    except Exception:
+                        pass
+                elif ctype == xlrd.XL_CELL_BOOLEAN:
+                    value = bool(value)
+                out.append(value)
+            yield tuple(out)
+
+    def close(self) -> None:
+        self._book.release_resources()
+
+
+def open_sheet_rows(source: SheetSource, filename: Optional[str] = None) -> SheetRows:
+    """Abre la primera hoja de un .xls/.xlsx para recorrerla fila a fila.
+
+    `source` puede ser una ruta o un archivo binario abierto; el formato se
+    decide por la extensión de `filename` (o de la ruta / `source.name`).
+    """
+    if filename is None:
+        filename = os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    ext = Path(str(filename)).suffix.lower()
+    if ext == ".xlsx":
+        return _XlsxRows(source)
+    if ext == ".xls":
+        return _XlsRows(source)
+    raise RuntimeError("Extensión no soportada. Usa .xls o .xlsx")